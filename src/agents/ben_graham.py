@@ -1,13 +1,18 @@
 from langchain_openai import ChatOpenAI
 from graph.state import AgentState, show_agent_reasoning
-from tools.api import get_financial_metrics, get_market_cap, search_line_items
+from tools.data_context import get_data_context
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
+from utils.batching import generate_signals_batched
+from utils.memo import memoize_signal
 from utils.llm import call_llm
+from utils.prompt_format import format_data
+from utils.rule_based import rule_based_signal
 import math
 
 
@@ -17,6 +22,43 @@ class BenGrahamSignal(BaseModel):
     reasoning: str
 
 
+SYSTEM_PROMPT = """You are a Benjamin Graham AI agent, making investment decisions using his principles:
+1. Insist on a margin of safety by buying below intrinsic value (e.g., using Graham Number, net-net).
+2. Emphasize the company's financial strength (low leverage, ample current assets).
+3. Prefer stable earnings over multiple years.
+4. Consider dividend record for extra safety.
+5. Avoid speculative or high-growth assumptions; focus on proven metrics.
+
+When providing your reasoning, be thorough and specific by:
+1. Explaining the key valuation metrics that influenced your decision the most (Graham Number, NCAV, P/E, etc.)
+2. Highlighting the specific financial strength indicators (current ratio, debt levels, etc.)
+3. Referencing the stability or instability of earnings over time
+4. Providing quantitative evidence with precise numbers
+5. Comparing current metrics to Graham's specific thresholds (e.g., "Current ratio of 2.5 exceeds Graham's minimum of 2.0")
+6. Using Benjamin Graham's conservative, analytical voice and style in your explanation
+
+For example, if bullish: "The stock trades at a 35% discount to net current asset value, providing an ample margin of safety. The current ratio of 2.5 and debt-to-equity of 0.3 indicate strong financial position..."
+For example, if bearish: "Despite consistent earnings, the current price of $50 exceeds our calculated Graham Number of $35, offering no margin of safety. Additionally, the current ratio of only 1.2 falls below Graham's preferred 2.0 threshold..."
+
+Return a rational recommendation: bullish, bearish, or neutral, with a confidence level (0-100) and thorough reasoning.
+"""
+
+
+# Line items the agent analyzes, also declared as its data requirement in utils.analysts
+LINE_ITEMS = [
+    "earnings_per_share",
+    "revenue",
+    "net_income",
+    "book_value_per_share",
+    "total_assets",
+    "total_liabilities",
+    "current_assets",
+    "current_liabilities",
+    "dividends_and_other_cash_distributions",
+    "outstanding_shares",
+]
+
+
 def ben_graham_agent(state: AgentState):
     """
     Analyzes stocks using Benjamin Graham's classic value-investing principles:
@@ -28,19 +70,21 @@ def ben_graham_agent(state: AgentState):
     data = state["data"]
     end_date = data["end_date"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
+    no_llm = state["metadata"].get("no_llm")
+    batch_size = None if no_llm else state["metadata"].get("llm_batch_size")
 
     analysis_data = {}
-    graham_analysis = {}
 
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("ben_graham_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=10)
+        metrics = data_context.get_financial_metrics(ticker, end_date, period="annual", limit=10)
 
         progress.update_status("ben_graham_agent", ticker, "Gathering financial line items")
-        financial_line_items = search_line_items(ticker, ["earnings_per_share", "revenue", "net_income", "book_value_per_share", "total_assets", "total_liabilities", "current_assets", "current_liabilities", "dividends_and_other_cash_distributions", "outstanding_shares"], end_date, period="annual", limit=10)
+        financial_line_items = data_context.search_line_items(ticker, LINE_ITEMS, end_date, period="annual", limit=10)
 
         progress.update_status("ben_graham_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
+        market_cap = data_context.get_market_cap(ticker, end_date)
 
         # Perform sub-analyses
         progress.update_status("ben_graham_agent", ticker, "Analyzing earnings stability")
@@ -66,17 +110,42 @@ def ben_graham_agent(state: AgentState):
 
         analysis_data[ticker] = {"signal": signal, "score": total_score, "max_score": max_possible_score, "earnings_analysis": earnings_analysis, "strength_analysis": strength_analysis, "valuation_analysis": valuation_analysis}
 
+        if no_llm:
+            # Confidence and reasoning come from the scores computed above
+            progress.update_status("ben_graham_agent", ticker, "Done")
+            return rule_based_signal(analysis_data[ticker])
+
+        if batch_size:
+            # The signal is generated below, together with other tickers'
+            return None
+
         progress.update_status("ben_graham_agent", ticker, "Generating Ben Graham analysis")
         graham_output = generate_graham_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
 
-        graham_analysis[ticker] = {"signal": graham_output.signal, "confidence": graham_output.confidence, "reasoning": graham_output.reasoning}
+        ticker_signal = {"signal": graham_output.signal, "confidence": graham_output.confidence, "reasoning": graham_output.reasoning}
 
         progress.update_status("ben_graham_agent", ticker, "Done")
+        return ticker_signal
+
+    graham_analysis = run_per_ticker(tickers, analyze_ticker, state["metadata"]["model_provider"])
+    if batch_size:
+        graham_analysis = generate_signals_batched(
+            tickers,
+            graham_analysis,
+            analysis_data,
+            generate_graham_output,
+            BenGrahamSignal,
+            SYSTEM_PROMPT,
+            "ben_graham_agent",
+            state["metadata"]["model_name"],
+            state["metadata"]["model_provider"],
+            batch_size,
+        )
 
     # Wrap results in a single message for the chain
     message = HumanMessage(content=json.dumps(graham_analysis), name="ben_graham_agent")
@@ -276,6 +345,7 @@ def analyze_valuation_graham(financial_line_items: list, market_cap: float) -> d
     return {"score": score, "details": "; ".join(details)}
 
 
+@memoize_signal("ben_graham_agent")
 def generate_graham_output(
     ticker: str,
     analysis_data: dict[str, any],
@@ -289,29 +359,7 @@ def generate_graham_output(
     """
 
     template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Benjamin Graham AI agent, making investment decisions using his principles:
-            1. Insist on a margin of safety by buying below intrinsic value (e.g., using Graham Number, net-net).
-            2. Emphasize the company's financial strength (low leverage, ample current assets).
-            3. Prefer stable earnings over multiple years.
-            4. Consider dividend record for extra safety.
-            5. Avoid speculative or high-growth assumptions; focus on proven metrics.
-            
-            When providing your reasoning, be thorough and specific by:
-            1. Explaining the key valuation metrics that influenced your decision the most (Graham Number, NCAV, P/E, etc.)
-            2. Highlighting the specific financial strength indicators (current ratio, debt levels, etc.)
-            3. Referencing the stability or instability of earnings over time
-            4. Providing quantitative evidence with precise numbers
-            5. Comparing current metrics to Graham's specific thresholds (e.g., "Current ratio of 2.5 exceeds Graham's minimum of 2.0")
-            6. Using Benjamin Graham's conservative, analytical voice and style in your explanation
-            
-            For example, if bullish: "The stock trades at a 35% discount to net current asset value, providing an ample margin of safety. The current ratio of 2.5 and debt-to-equity of 0.3 indicate strong financial position..."
-            For example, if bearish: "Despite consistent earnings, the current price of $50 exceeds our calculated Graham Number of $35, offering no margin of safety. Additionally, the current ratio of only 1.2 falls below Graham's preferred 2.0 threshold..."
-                        
-            Return a rational recommendation: bullish, bearish, or neutral, with a confidence level (0-100) and thorough reasoning.
-            """
-        ),
+        ("system", SYSTEM_PROMPT),
         (
             "human",
             """Based on the following analysis, create a Graham-style investment signal:
@@ -330,7 +378,7 @@ def generate_graham_output(
     ])
 
     prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
+        "analysis_data": format_data(analysis_data),
         "ticker": ticker
     })
 
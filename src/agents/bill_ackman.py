@@ -1,13 +1,18 @@
 from langchain_openai import ChatOpenAI
 from graph.state import AgentState, show_agent_reasoning
-from tools.api import get_financial_metrics, get_market_cap, search_line_items
+from tools.data_context import get_data_context
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
+from utils.batching import generate_signals_batched
+from utils.memo import memoize_signal
 from utils.llm import call_llm
+from utils.prompt_format import format_data
+from utils.rule_based import rule_based_signal
 
 
 class BillAckmanSignal(BaseModel):
@@ -16,6 +21,42 @@ class BillAckmanSignal(BaseModel):
     reasoning: str
 
 
+SYSTEM_PROMPT = """You are a Bill Ackman AI agent, making investment decisions using his principles:
+
+1. Seek high-quality businesses with durable competitive advantages (moats), often in well-known consumer or service brands.
+2. Prioritize consistent free cash flow and growth potential over the long term.
+3. Advocate for strong financial discipline (reasonable leverage, efficient capital allocation).
+4. Valuation matters: target intrinsic value with a margin of safety.
+5. Consider activism where management or operational improvements can unlock substantial upside.
+6. Concentrate on a few high-conviction investments.
+
+In your reasoning:
+- Emphasize brand strength, moat, or unique market positioning.
+- Review free cash flow generation and margin trends as key signals.
+- Analyze leverage, share buybacks, and dividends as capital discipline metrics.
+- Provide a valuation assessment with numerical backup (DCF, multiples, etc.).
+- Identify any catalysts for activism or value creation (e.g., cost cuts, better capital allocation).
+- Use a confident, analytic, and sometimes confrontational tone when discussing weaknesses or opportunities.
+
+Return your final recommendation (signal: bullish, neutral, or bearish) with a 0-100 confidence and a thorough reasoning section.
+"""
+
+
+# Line items the agent analyzes, also declared as its data requirement in utils.analysts
+LINE_ITEMS = [
+    "revenue",
+    "operating_margin",
+    "debt_to_equity",
+    "free_cash_flow",
+    "total_assets",
+    "total_liabilities",
+    "dividends_and_other_cash_distributions",
+    "outstanding_shares",
+    # Optional: intangible_assets if available
+    # "intangible_assets"
+]
+
+
 def bill_ackman_agent(state: AgentState):
     """
     Analyzes stocks using Bill Ackman's investing principles and LLM reasoning.
@@ -25,37 +66,28 @@ def bill_ackman_agent(state: AgentState):
     data = state["data"]
     end_date = data["end_date"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
+    no_llm = state["metadata"].get("no_llm")
+    batch_size = None if no_llm else state["metadata"].get("llm_batch_size")
     
     analysis_data = {}
-    ackman_analysis = {}
     
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("bill_ackman_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+        metrics = data_context.get_financial_metrics(ticker, end_date, period="annual", limit=5)
         
         progress.update_status("bill_ackman_agent", ticker, "Gathering financial line items")
         # Request multiple periods of data (annual or TTM) for a more robust long-term view.
-        financial_line_items = search_line_items(
+        financial_line_items = data_context.search_line_items(
             ticker,
-            [
-                "revenue",
-                "operating_margin",
-                "debt_to_equity",
-                "free_cash_flow",
-                "total_assets",
-                "total_liabilities",
-                "dividends_and_other_cash_distributions",
-                "outstanding_shares",
-                # Optional: intangible_assets if available
-                # "intangible_assets"
-            ],
+            LINE_ITEMS,
             end_date,
             period="annual",
             limit=5
         )
         
         progress.update_status("bill_ackman_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
+        market_cap = data_context.get_market_cap(ticker, end_date)
         
         progress.update_status("bill_ackman_agent", ticker, "Analyzing business quality")
         quality_analysis = analyze_business_quality(metrics, financial_line_items)
@@ -96,21 +128,46 @@ def bill_ackman_agent(state: AgentState):
             "valuation_analysis": valuation_analysis
         }
         
+        if no_llm:
+            # Confidence and reasoning come from the scores computed above
+            progress.update_status("bill_ackman_agent", ticker, "Done")
+            return rule_based_signal(analysis_data[ticker])
+
+        if batch_size:
+            # The signal is generated below, together with other tickers'
+            return None
+
         progress.update_status("bill_ackman_agent", ticker, "Generating Bill Ackman analysis")
         ackman_output = generate_ackman_output(
             ticker=ticker, 
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
         
-        ackman_analysis[ticker] = {
+        ticker_signal = {
             "signal": ackman_output.signal,
             "confidence": ackman_output.confidence,
             "reasoning": ackman_output.reasoning
         }
         
         progress.update_status("bill_ackman_agent", ticker, "Done")
+        return ticker_signal
+
+    ackman_analysis = run_per_ticker(tickers, analyze_ticker, state["metadata"]["model_provider"])
+    if batch_size:
+        ackman_analysis = generate_signals_batched(
+            tickers,
+            ackman_analysis,
+            analysis_data,
+            generate_ackman_output,
+            BillAckmanSignal,
+            SYSTEM_PROMPT,
+            "bill_ackman_agent",
+            state["metadata"]["model_name"],
+            state["metadata"]["model_provider"],
+            batch_size,
+        )
     
     # Wrap results in a single message for the chain
     message = HumanMessage(
@@ -393,6 +450,7 @@ def analyze_valuation(financial_line_items: list, market_cap: float) -> dict:
     }
 
 
+@memoize_signal("bill_ackman_agent")
 def generate_ackman_output(
     ticker: str,
     analysis_data: dict[str, any],
@@ -405,28 +463,7 @@ def generate_ackman_output(
     catalysts, and management changes in the system prompt.
     """
     template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Bill Ackman AI agent, making investment decisions using his principles:
-
-            1. Seek high-quality businesses with durable competitive advantages (moats), often in well-known consumer or service brands.
-            2. Prioritize consistent free cash flow and growth potential over the long term.
-            3. Advocate for strong financial discipline (reasonable leverage, efficient capital allocation).
-            4. Valuation matters: target intrinsic value with a margin of safety.
-            5. Consider activism where management or operational improvements can unlock substantial upside.
-            6. Concentrate on a few high-conviction investments.
-
-            In your reasoning:
-            - Emphasize brand strength, moat, or unique market positioning.
-            - Review free cash flow generation and margin trends as key signals.
-            - Analyze leverage, share buybacks, and dividends as capital discipline metrics.
-            - Provide a valuation assessment with numerical backup (DCF, multiples, etc.).
-            - Identify any catalysts for activism or value creation (e.g., cost cuts, better capital allocation).
-            - Use a confident, analytic, and sometimes confrontational tone when discussing weaknesses or opportunities.
-
-            Return your final recommendation (signal: bullish, neutral, or bearish) with a 0-100 confidence and a thorough reasoning section.
-            """
-        ),
+        ("system", SYSTEM_PROMPT),
         (
             "human",
             """Based on the following analysis, create an Ackman-style investment signal.
@@ -445,7 +482,7 @@ def generate_ackman_output(
     ])
 
     prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
+        "analysis_data": format_data(analysis_data),
         "ticker": ticker
     })
 
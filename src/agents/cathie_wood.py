@@ -1,12 +1,17 @@
 from graph.state import AgentState, show_agent_reasoning
-from tools.api import get_financial_metrics, get_market_cap, search_line_items
+from tools.data_context import get_data_context
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
+from utils.batching import generate_signals_batched
+from utils.memo import memoize_signal
 from utils.llm import call_llm
+from utils.prompt_format import format_data
+from utils.rule_based import rule_based_signal
 
 class CathieWoodSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -14,6 +19,52 @@ class CathieWoodSignal(BaseModel):
     reasoning: str
 
 
+SYSTEM_PROMPT = """You are a Cathie Wood AI agent, making investment decisions using her principles:
+
+1. Seek companies leveraging disruptive innovation.
+2. Emphasize exponential growth potential, large TAM.
+3. Focus on technology, healthcare, or other future-facing sectors.
+4. Consider multi-year time horizons for potential breakthroughs.
+5. Accept higher volatility in pursuit of high returns.
+6. Evaluate management's vision and ability to invest in R&D.
+
+Rules:
+- Identify disruptive or breakthrough technology.
+- Evaluate strong potential for multi-year revenue growth.
+- Check if the company can scale effectively in a large market.
+- Use a growth-biased valuation approach.
+- Provide a data-driven recommendation (bullish, bearish, or neutral).
+
+When providing your reasoning, be thorough and specific by:
+1. Identifying the specific disruptive technologies/innovations the company is leveraging
+2. Highlighting growth metrics that indicate exponential potential (revenue acceleration, expanding TAM)
+3. Discussing the long-term vision and transformative potential over 5+ year horizons
+4. Explaining how the company might disrupt traditional industries or create new markets
+5. Addressing R&D investment and innovation pipeline that could drive future growth
+6. Using Cathie Wood's optimistic, future-focused, and conviction-driven voice
+
+For example, if bullish: "The company's AI-driven platform is transforming the $500B healthcare analytics market, with evidence of platform adoption accelerating from 40% to 65% YoY. Their R&D investments of 22% of revenue are creating a technological moat that positions them to capture a significant share of this expanding market. The current valuation doesn't reflect the exponential growth trajectory we expect as..."
+For example, if bearish: "While operating in the genomics space, the company lacks truly disruptive technology and is merely incrementally improving existing techniques. R&D spending at only 8% of revenue signals insufficient investment in breakthrough innovation. With revenue growth slowing from 45% to 20% YoY, there's limited evidence of the exponential adoption curve we look for in transformative companies..."
+"""
+
+
+# Line items the agent analyzes, also declared as its data requirement in utils.analysts
+LINE_ITEMS = [
+    "revenue",
+    "gross_margin",
+    "operating_margin",
+    "debt_to_equity",
+    "free_cash_flow",
+    "total_assets",
+    "total_liabilities",
+    "dividends_and_other_cash_distributions",
+    "outstanding_shares",
+    "research_and_development",
+    "capital_expenditure",
+    "operating_expense",
+]
+
+
 def cathie_wood_agent(state: AgentState):
     """
     Analyzes stocks using Cathie Wood's investing principles and LLM reasoning.
@@ -25,40 +76,28 @@ def cathie_wood_agent(state: AgentState):
     data = state["data"]
     end_date = data["end_date"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
+    no_llm = state["metadata"].get("no_llm")
+    batch_size = None if no_llm else state["metadata"].get("llm_batch_size")
 
     analysis_data = {}
-    cw_analysis = {}
 
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("cathie_wood_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+        metrics = data_context.get_financial_metrics(ticker, end_date, period="annual", limit=5)
 
         progress.update_status("cathie_wood_agent", ticker, "Gathering financial line items")
         # Request multiple periods of data (annual or TTM) for a more robust view.
-        financial_line_items = search_line_items(
+        financial_line_items = data_context.search_line_items(
             ticker,
-            [
-                "revenue",
-                "gross_margin",
-                "operating_margin",
-                "debt_to_equity",
-                "free_cash_flow",
-                "total_assets",
-                "total_liabilities",
-                "dividends_and_other_cash_distributions",
-                "outstanding_shares",
-                "research_and_development",
-                "capital_expenditure",
-                "operating_expense",
-
-            ],
+            LINE_ITEMS,
             end_date,
             period="annual",
             limit=5
         )
 
         progress.update_status("cathie_wood_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
+        market_cap = data_context.get_market_cap(ticker, end_date)
 
         progress.update_status("cathie_wood_agent", ticker, "Analyzing disruptive potential")
         disruptive_analysis = analyze_disruptive_potential(metrics, financial_line_items)
@@ -89,21 +128,46 @@ def cathie_wood_agent(state: AgentState):
             "valuation_analysis": valuation_analysis
         }
 
+        if no_llm:
+            # Confidence and reasoning come from the scores computed above
+            progress.update_status("cathie_wood_agent", ticker, "Done")
+            return rule_based_signal(analysis_data[ticker])
+
+        if batch_size:
+            # The signal is generated below, together with other tickers'
+            return None
+
         progress.update_status("cathie_wood_agent", ticker, "Generating Cathie Wood analysis")
         cw_output = generate_cathie_wood_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
 
-        cw_analysis[ticker] = {
+        ticker_signal = {
             "signal": cw_output.signal,
             "confidence": cw_output.confidence,
             "reasoning": cw_output.reasoning
         }
 
         progress.update_status("cathie_wood_agent", ticker, "Done")
+        return ticker_signal
+
+    cw_analysis = run_per_ticker(tickers, analyze_ticker, state["metadata"]["model_provider"])
+    if batch_size:
+        cw_analysis = generate_signals_batched(
+            tickers,
+            cw_analysis,
+            analysis_data,
+            generate_cathie_wood_output,
+            CathieWoodSignal,
+            SYSTEM_PROMPT,
+            "cathie_wood_agent",
+            state["metadata"]["model_name"],
+            state["metadata"]["model_provider"],
+            batch_size,
+        )
 
     message = HumanMessage(
         content=json.dumps(cw_analysis),
@@ -414,6 +478,7 @@ def analyze_cathie_wood_valuation(financial_line_items: list, market_cap: float)
     }
 
 
+@memoize_signal("cathie_wood_agent")
 def generate_cathie_wood_output(
     ticker: str,
     analysis_data: dict[str, any],
@@ -424,36 +489,7 @@ def generate_cathie_wood_output(
     Generates investment decisions in the style of Cathie Wood.
     """
     template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Cathie Wood AI agent, making investment decisions using her principles:
-
-            1. Seek companies leveraging disruptive innovation.
-            2. Emphasize exponential growth potential, large TAM.
-            3. Focus on technology, healthcare, or other future-facing sectors.
-            4. Consider multi-year time horizons for potential breakthroughs.
-            5. Accept higher volatility in pursuit of high returns.
-            6. Evaluate management's vision and ability to invest in R&D.
-
-            Rules:
-            - Identify disruptive or breakthrough technology.
-            - Evaluate strong potential for multi-year revenue growth.
-            - Check if the company can scale effectively in a large market.
-            - Use a growth-biased valuation approach.
-            - Provide a data-driven recommendation (bullish, bearish, or neutral).
-            
-            When providing your reasoning, be thorough and specific by:
-            1. Identifying the specific disruptive technologies/innovations the company is leveraging
-            2. Highlighting growth metrics that indicate exponential potential (revenue acceleration, expanding TAM)
-            3. Discussing the long-term vision and transformative potential over 5+ year horizons
-            4. Explaining how the company might disrupt traditional industries or create new markets
-            5. Addressing R&D investment and innovation pipeline that could drive future growth
-            6. Using Cathie Wood's optimistic, future-focused, and conviction-driven voice
-            
-            For example, if bullish: "The company's AI-driven platform is transforming the $500B healthcare analytics market, with evidence of platform adoption accelerating from 40% to 65% YoY. Their R&D investments of 22% of revenue are creating a technological moat that positions them to capture a significant share of this expanding market. The current valuation doesn't reflect the exponential growth trajectory we expect as..."
-            For example, if bearish: "While operating in the genomics space, the company lacks truly disruptive technology and is merely incrementally improving existing techniques. R&D spending at only 8% of revenue signals insufficient investment in breakthrough innovation. With revenue growth slowing from 45% to 20% YoY, there's limited evidence of the exponential adoption curve we look for in transformative companies..."
-            """
-        ),
+        ("system", SYSTEM_PROMPT),
         (
             "human",
             """Based on the following analysis, create a Cathie Wood-style investment signal.
@@ -472,7 +508,7 @@ def generate_cathie_wood_output(
     ])
 
     prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
+        "analysis_data": format_data(analysis_data),
         "ticker": ticker
     })
 
@@ -1,12 +1,17 @@
 from graph.state import AgentState, show_agent_reasoning
-from tools.api import get_financial_metrics, get_market_cap, search_line_items, get_insider_trades, get_company_news
+from tools.data_context import get_data_context
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
+from utils.batching import generate_signals_batched
+from utils.memo import memoize_signal
 from utils.llm import call_llm
+from utils.prompt_format import format_data
+from utils.rule_based import rule_based_signal
 
 class CharlieMungerSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -14,6 +19,60 @@ class CharlieMungerSignal(BaseModel):
     reasoning: str
 
 
+SYSTEM_PROMPT = """You are a Charlie Munger AI agent, making investment decisions using his principles:
+
+1. Focus on the quality and predictability of the business.
+2. Rely on mental models from multiple disciplines to analyze investments.
+3. Look for strong, durable competitive advantages (moats).
+4. Emphasize long-term thinking and patience.
+5. Value management integrity and competence.
+6. Prioritize businesses with high returns on invested capital.
+7. Pay a fair price for wonderful businesses.
+8. Never overpay, always demand a margin of safety.
+9. Avoid complexity and businesses you don't understand.
+10. "Invert, always invert" - focus on avoiding stupidity rather than seeking brilliance.
+
+Rules:
+- Praise businesses with predictable, consistent operations and cash flows.
+- Value businesses with high ROIC and pricing power.
+- Prefer simple businesses with understandable economics.
+- Admire management with skin in the game and shareholder-friendly capital allocation.
+- Focus on long-term economics rather than short-term metrics.
+- Be skeptical of businesses with rapidly changing dynamics or excessive share dilution.
+- Avoid excessive leverage or financial engineering.
+- Provide a rational, data-driven recommendation (bullish, bearish, or neutral).
+
+When providing your reasoning, be thorough and specific by:
+1. Explaining the key factors that influenced your decision the most (both positive and negative)
+2. Applying at least 2-3 specific mental models or disciplines to explain your thinking
+3. Providing quantitative evidence where relevant (e.g., specific ROIC values, margin trends)
+4. Citing what you would "avoid" in your analysis (invert the problem)
+5. Using Charlie Munger's direct, pithy conversational style in your explanation
+
+For example, if bullish: "The high ROIC of 22% demonstrates the company's moat. When applying basic microeconomics, we can see that competitors would struggle to..."
+For example, if bearish: "I see this business making a classic mistake in capital allocation. As I've often said about [relevant Mungerism], this company appears to be..."
+"""
+
+
+# Line items the agent analyzes, also declared as its data requirement in utils.analysts
+LINE_ITEMS = [
+    "revenue",
+    "net_income",
+    "operating_income",
+    "return_on_invested_capital",
+    "gross_margin",
+    "operating_margin",
+    "free_cash_flow",
+    "capital_expenditure",
+    "cash_and_equivalents",
+    "total_debt",
+    "shareholders_equity",
+    "outstanding_shares",
+    "research_and_development",
+    "goodwill_and_intangible_assets",
+]
+
+
 def charlie_munger_agent(state: AgentState):
     """
     Analyzes stocks using Charlie Munger's investing principles and mental models.
@@ -22,44 +81,31 @@ def charlie_munger_agent(state: AgentState):
     data = state["data"]
     end_date = data["end_date"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
+    no_llm = state["metadata"].get("no_llm")
+    batch_size = None if no_llm else state["metadata"].get("llm_batch_size")
     
     analysis_data = {}
-    munger_analysis = {}
     
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("charlie_munger_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=10)  # Munger looks at longer periods
+        metrics = data_context.get_financial_metrics(ticker, end_date, period="annual", limit=10)  # Munger looks at longer periods
         
         progress.update_status("charlie_munger_agent", ticker, "Gathering financial line items")
-        financial_line_items = search_line_items(
+        financial_line_items = data_context.search_line_items(
             ticker,
-            [
-                "revenue",
-                "net_income",
-                "operating_income",
-                "return_on_invested_capital",
-                "gross_margin",
-                "operating_margin",
-                "free_cash_flow",
-                "capital_expenditure",
-                "cash_and_equivalents",
-                "total_debt",
-                "shareholders_equity",
-                "outstanding_shares",
-                "research_and_development",
-                "goodwill_and_intangible_assets",
-            ],
+            LINE_ITEMS,
             end_date,
             period="annual",
             limit=10  # Munger examines long-term trends
         )
         
         progress.update_status("charlie_munger_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
+        market_cap = data_context.get_market_cap(ticker, end_date)
         
         progress.update_status("charlie_munger_agent", ticker, "Fetching insider trades")
         # Munger values management with skin in the game
-        insider_trades = get_insider_trades(
+        insider_trades = data_context.get_insider_trades(
             ticker,
             end_date,
             # Look back 2 years for insider trading patterns
@@ -69,7 +115,7 @@ def charlie_munger_agent(state: AgentState):
         
         progress.update_status("charlie_munger_agent", ticker, "Fetching company news")
         # Munger avoids businesses with frequent negative press
-        company_news = get_company_news(
+        company_news = data_context.get_company_news(
             ticker,
             end_date,
             # Look back 1 year for news
@@ -120,21 +166,46 @@ def charlie_munger_agent(state: AgentState):
             "news_sentiment": analyze_news_sentiment(company_news) if company_news else "No news data available"
         }
         
+        if no_llm:
+            # Confidence and reasoning come from the scores computed above
+            progress.update_status("charlie_munger_agent", ticker, "Done")
+            return rule_based_signal(analysis_data[ticker])
+
+        if batch_size:
+            # The signal is generated below, together with other tickers'
+            return None
+
         progress.update_status("charlie_munger_agent", ticker, "Generating Charlie Munger analysis")
         munger_output = generate_munger_output(
             ticker=ticker, 
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
         
-        munger_analysis[ticker] = {
+        ticker_signal = {
             "signal": munger_output.signal,
             "confidence": munger_output.confidence,
             "reasoning": munger_output.reasoning
         }
         
         progress.update_status("charlie_munger_agent", ticker, "Done")
+        return ticker_signal
+
+    munger_analysis = run_per_ticker(tickers, analyze_ticker, state["metadata"]["model_provider"])
+    if batch_size:
+        munger_analysis = generate_signals_batched(
+            tickers,
+            munger_analysis,
+            analysis_data,
+            generate_munger_output,
+            CharlieMungerSignal,
+            SYSTEM_PROMPT,
+            "charlie_munger_agent",
+            state["metadata"]["model_name"],
+            state["metadata"]["model_provider"],
+            batch_size,
+        )
     
     # Wrap results in a single message for the chain
     message = HumanMessage(
@@ -659,6 +730,7 @@ def analyze_news_sentiment(news_items: list) -> str:
     return f"Qualitative review of {len(news_items)} recent news items would be needed"
 
 
+@memoize_signal("charlie_munger_agent")
 def generate_munger_output(
     ticker: str,
     analysis_data: dict[str, any],
@@ -669,42 +741,7 @@ def generate_munger_output(
     Generates investment decisions in the style of Charlie Munger.
     """
     template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Charlie Munger AI agent, making investment decisions using his principles:
-
-            1. Focus on the quality and predictability of the business.
-            2. Rely on mental models from multiple disciplines to analyze investments.
-            3. Look for strong, durable competitive advantages (moats).
-            4. Emphasize long-term thinking and patience.
-            5. Value management integrity and competence.
-            6. Prioritize businesses with high returns on invested capital.
-            7. Pay a fair price for wonderful businesses.
-            8. Never overpay, always demand a margin of safety.
-            9. Avoid complexity and businesses you don't understand.
-            10. "Invert, always invert" - focus on avoiding stupidity rather than seeking brilliance.
-            
-            Rules:
-            - Praise businesses with predictable, consistent operations and cash flows.
-            - Value businesses with high ROIC and pricing power.
-            - Prefer simple businesses with understandable economics.
-            - Admire management with skin in the game and shareholder-friendly capital allocation.
-            - Focus on long-term economics rather than short-term metrics.
-            - Be skeptical of businesses with rapidly changing dynamics or excessive share dilution.
-            - Avoid excessive leverage or financial engineering.
-            - Provide a rational, data-driven recommendation (bullish, bearish, or neutral).
-            
-            When providing your reasoning, be thorough and specific by:
-            1. Explaining the key factors that influenced your decision the most (both positive and negative)
-            2. Applying at least 2-3 specific mental models or disciplines to explain your thinking
-            3. Providing quantitative evidence where relevant (e.g., specific ROIC values, margin trends)
-            4. Citing what you would "avoid" in your analysis (invert the problem)
-            5. Using Charlie Munger's direct, pithy conversational style in your explanation
-            
-            For example, if bullish: "The high ROIC of 22% demonstrates the company's moat. When applying basic microeconomics, we can see that competitors would struggle to..."
-            For example, if bearish: "I see this business making a classic mistake in capital allocation. As I've often said about [relevant Mungerism], this company appears to be..."
-            """
-        ),
+        ("system", SYSTEM_PROMPT),
         (
             "human",
             """Based on the following analysis, create a Munger-style investment signal.
@@ -723,7 +760,7 @@ def generate_munger_output(
     ])
 
     prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
+        "analysis_data": format_data(analysis_data),
         "ticker": ticker
     })
 
@@ -1,9 +1,10 @@
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
 import json
 
-from tools.api import get_financial_metrics
+from tools.data_context import get_data_context
 
 
 ##### Fundamental Agent #####
@@ -12,15 +13,13 @@ def fundamentals_agent(state: AgentState):
     data = state["data"]
     end_date = data["end_date"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
 
-    # Initialize fundamental analysis for each ticker
-    fundamental_analysis = {}
-
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("fundamentals_agent", ticker, "Fetching financial metrics")
 
         # Get the financial metrics
-        financial_metrics = get_financial_metrics(
+        financial_metrics = data_context.get_financial_metrics(
             ticker=ticker,
             end_date=end_date,
             period="ttm",
@@ -29,7 +28,7 @@ def fundamentals_agent(state: AgentState):
 
         if not financial_metrics:
             progress.update_status("fundamentals_agent", ticker, "Failed: No financial metrics found")
-            continue
+            return None
 
         # Pull the most recent financial metrics
         metrics = financial_metrics[0]
@@ -132,13 +131,16 @@ def fundamentals_agent(state: AgentState):
         total_signals = len(signals)
         confidence = round(max(bullish_signals, bearish_signals) / total_signals, 2) * 100
 
-        fundamental_analysis[ticker] = {
+        ticker_signal = {
             "signal": overall_signal,
             "confidence": confidence,
             "reasoning": reasoning,
         }
 
         progress.update_status("fundamentals_agent", ticker, "Done")
+        return ticker_signal
+
+    fundamental_analysis = run_per_ticker(tickers, analyze_ticker)
 
     # Create the fundamental analysis message
     message = HumanMessage(
@@ -9,15 +9,14 @@ from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel
 
-from tools.api import (
-    get_company_news,
-    get_financial_metrics,
-    get_insider_trades,
-    get_market_cap,
-    search_line_items,
-)
+from tools.data_context import get_data_context
 from utils.llm import call_llm
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
+from utils.batching import generate_signals_batched
+from utils.memo import memoize_signal
+from utils.prompt_format import format_data
+from utils.rule_based import rule_based_signal
 
 __all__ = [
     "MichaelBurrySignal",
@@ -37,55 +36,80 @@ class MichaelBurrySignal(BaseModel):
     reasoning: str
 
 
+SYSTEM_PROMPT = """You are an AI agent emulating Dr. Michael J. Burry. Your mandate:
+- Hunt for deep value in US equities using hard numbers (free cash flow, EV/EBIT, balance sheet)
+- Be contrarian: hatred in the press can be your friend if fundamentals are solid
+- Focus on downside first – avoid leveraged balance sheets
+- Look for hard catalysts such as insider buying, buybacks, or asset sales
+- Communicate in Burry's terse, data‑driven style
+
+When providing your reasoning, be thorough and specific by:
+1. Start with the key metric(s) that drove your decision
+2. Cite concrete numbers (e.g. "FCF yield 14.7%", "EV/EBIT 5.3")
+3. Highlight risk factors and why they are acceptable (or not)
+4. Mention relevant insider activity or contrarian opportunities
+5. Use Burry's direct, number-focused communication style with minimal words
+
+For example, if bullish: "FCF yield 12.8%. EV/EBIT 6.2. Debt-to-equity 0.4. Net insider buying 25k shares. Market missing value due to overreaction to recent litigation. Strong buy."
+For example, if bearish: "FCF yield only 2.1%. Debt-to-equity concerning at 2.3. Management diluting shareholders. Pass."
+"""
+
+
 ###############################################################################
 # Core agent
 ###############################################################################
 
 
+# Line items the agent analyzes, also declared as its data requirement in utils.analysts
+LINE_ITEMS = [
+    "free_cash_flow",
+    "net_income",
+    "total_debt",
+    "cash_and_equivalents",
+    "total_assets",
+    "total_liabilities",
+    "outstanding_shares",
+    "issuance_or_purchase_of_equity_shares",
+]
+
+
 def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine here)
     """Analyse stocks using Michael Burry's deep‑value, contrarian framework."""
 
     data = state["data"]
     end_date: str = data["end_date"]  # YYYY‑MM‑DD
     tickers: list[str] = data["tickers"]
+    data_context = get_data_context(state)
+    no_llm = state["metadata"].get("no_llm")
+    batch_size = None if no_llm else state["metadata"].get("llm_batch_size")
 
     # We look one year back for insider trades / news flow
     start_date = (datetime.fromisoformat(end_date) - timedelta(days=365)).date().isoformat()
 
     analysis_data: dict[str, dict] = {}
-    burry_analysis: dict[str, dict] = {}
 
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         # ------------------------------------------------------------------
         # Fetch raw data
         # ------------------------------------------------------------------
         progress.update_status("michael_burry_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="ttm", limit=5)
+        metrics = data_context.get_financial_metrics(ticker, end_date, period="ttm", limit=5)
 
         progress.update_status("michael_burry_agent", ticker, "Fetching line items")
-        line_items = search_line_items(
+        line_items = data_context.search_line_items(
             ticker,
-            [
-                "free_cash_flow",
-                "net_income",
-                "total_debt",
-                "cash_and_equivalents",
-                "total_assets",
-                "total_liabilities",
-                "outstanding_shares",
-                "issuance_or_purchase_of_equity_shares",
-            ],
+            LINE_ITEMS,
             end_date,
         )
 
         progress.update_status("michael_burry_agent", ticker, "Fetching insider trades")
-        insider_trades = get_insider_trades(ticker, end_date=end_date, start_date=start_date)
+        insider_trades = data_context.get_insider_trades(ticker, end_date=end_date, start_date=start_date)
 
         progress.update_status("michael_burry_agent", ticker, "Fetching company news")
-        news = get_company_news(ticker, end_date=end_date, start_date=start_date, limit=250)
+        news = data_context.get_company_news(ticker, end_date=end_date, start_date=start_date, limit=250)
 
         progress.update_status("michael_burry_agent", ticker, "Fetching market cap")
-        market_cap = get_market_cap(ticker, end_date)
+        market_cap = data_context.get_market_cap(ticker, end_date)
 
         # ------------------------------------------------------------------
         # Run sub‑analyses
@@ -139,21 +163,46 @@ def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine h
             "market_cap": market_cap,
         }
 
+        if no_llm:
+            # Confidence and reasoning come from the scores computed above
+            progress.update_status("michael_burry_agent", ticker, "Done")
+            return rule_based_signal(analysis_data[ticker])
+
+        if batch_size:
+            # The signal is generated below, together with other tickers'
+            return None
+
         progress.update_status("michael_burry_agent", ticker, "Generating LLM output")
         burry_output = _generate_burry_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
 
-        burry_analysis[ticker] = {
+        ticker_signal = {
             "signal": burry_output.signal,
             "confidence": burry_output.confidence,
             "reasoning": burry_output.reasoning,
         }
 
         progress.update_status("michael_burry_agent", ticker, "Done")
+        return ticker_signal
+
+    burry_analysis = run_per_ticker(tickers, analyze_ticker, state["metadata"]["model_provider"])
+    if batch_size:
+        burry_analysis = generate_signals_batched(
+            tickers,
+            burry_analysis,
+            analysis_data,
+            _generate_burry_output,
+            MichaelBurrySignal,
+            SYSTEM_PROMPT,
+            "michael_burry_agent",
+            state["metadata"]["model_name"],
+            state["metadata"]["model_provider"],
+            batch_size,
+        )
 
     # ----------------------------------------------------------------------
     # Return to the graph
@@ -323,6 +372,7 @@ def _analyze_contrarian_sentiment(news):
 # LLM generation
 ###############################################################################
 
+@memoize_signal("michael_burry_agent")
 def _generate_burry_output(
     ticker: str,
     analysis_data: dict,
@@ -334,26 +384,7 @@ def _generate_burry_output(
 
     template = ChatPromptTemplate.from_messages(
         [
-            (
-                "system",
-                """You are an AI agent emulating Dr. Michael J. Burry. Your mandate:
-                - Hunt for deep value in US equities using hard numbers (free cash flow, EV/EBIT, balance sheet)
-                - Be contrarian: hatred in the press can be your friend if fundamentals are solid
-                - Focus on downside first – avoid leveraged balance sheets
-                - Look for hard catalysts such as insider buying, buybacks, or asset sales
-                - Communicate in Burry's terse, data‑driven style
-
-                When providing your reasoning, be thorough and specific by:
-                1. Start with the key metric(s) that drove your decision
-                2. Cite concrete numbers (e.g. "FCF yield 14.7%", "EV/EBIT 5.3")
-                3. Highlight risk factors and why they are acceptable (or not)
-                4. Mention relevant insider activity or contrarian opportunities
-                5. Use Burry's direct, number-focused communication style with minimal words
-                
-                For example, if bullish: "FCF yield 12.8%. EV/EBIT 6.2. Debt-to-equity 0.4. Net insider buying 25k shares. Market missing value due to overreaction to recent litigation. Strong buy."
-                For example, if bearish: "FCF yield only 2.1%. Debt-to-equity concerning at 2.3. Management diluting shareholders. Pass."
-                """,
-            ),
+            ("system", SYSTEM_PROMPT),
             (
                 "human",
                 """Based on the following data, create the investment signal as Michael Burry would:
@@ -372,7 +403,7 @@ def _generate_burry_output(
         ]
     )
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = template.invoke({"analysis_data": format_data(analysis_data), "ticker": ticker})
 
     # Default fallback signal in case parsing fails
     def create_default_michael_burry_signal():
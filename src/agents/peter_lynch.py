@@ -1,19 +1,17 @@
 from graph.state import AgentState, show_agent_reasoning
-from tools.api import (
-    get_financial_metrics,
-    get_market_cap,
-    search_line_items,
-    get_insider_trades,
-    get_company_news,
-    get_prices,
-)
+from tools.data_context import get_data_context
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
+from utils.batching import generate_signals_batched
+from utils.memo import memoize_signal
 from utils.llm import call_llm
+from utils.prompt_format import format_data
+from utils.rule_based import rule_based_signal
 
 
 class PeterLynchSignal(BaseModel):
@@ -25,6 +23,49 @@ class PeterLynchSignal(BaseModel):
     reasoning: str
 
 
+SYSTEM_PROMPT = """You are a Peter Lynch AI agent. You make investment decisions based on Peter Lynch's well-known principles:
+
+1. Invest in What You Know: Emphasize understandable businesses, possibly discovered in everyday life.
+2. Growth at a Reasonable Price (GARP): Rely on the PEG ratio as a prime metric.
+3. Look for 'Ten-Baggers': Companies capable of growing earnings and share price substantially.
+4. Steady Growth: Prefer consistent revenue/earnings expansion, less concern about short-term noise.
+5. Avoid High Debt: Watch for dangerous leverage.
+6. Management & Story: A good 'story' behind the stock, but not overhyped or too complex.
+
+When you provide your reasoning, do it in Peter Lynch's voice:
+- Cite the PEG ratio
+- Mention 'ten-bagger' potential if applicable
+- Refer to personal or anecdotal observations (e.g., "If my kids love the product...")
+- Use practical, folksy language
+- Provide key positives and negatives
+- Conclude with a clear stance (bullish, bearish, or neutral)
+
+Return your final output strictly in JSON with the fields:
+{{
+  "signal": "bullish" | "bearish" | "neutral",
+  "confidence": 0 to 100,
+  "reasoning": "string"
+}}
+"""
+
+
+# Line items the agent analyzes, also declared as its data requirement in utils.analysts
+LINE_ITEMS = [
+    "revenue",
+    "earnings_per_share",
+    "net_income",
+    "operating_income",
+    "gross_margin",
+    "operating_margin",
+    "free_cash_flow",
+    "capital_expenditure",
+    "cash_and_equivalents",
+    "total_debt",
+    "shareholders_equity",
+    "outstanding_shares",
+]
+
+
 def peter_lynch_agent(state: AgentState):
     """
     Analyzes stocks using Peter Lynch's investing principles:
@@ -44,48 +85,37 @@ def peter_lynch_agent(state: AgentState):
     start_date = data["start_date"]
     end_date = data["end_date"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
+    no_llm = state["metadata"].get("no_llm")
+    batch_size = None if no_llm else state["metadata"].get("llm_batch_size")
 
     analysis_data = {}
-    lynch_analysis = {}
 
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("peter_lynch_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+        metrics = data_context.get_financial_metrics(ticker, end_date, period="annual", limit=5)
 
         progress.update_status("peter_lynch_agent", ticker, "Gathering financial line items")
         # Relevant line items for Peter Lynch's approach
-        financial_line_items = search_line_items(
+        financial_line_items = data_context.search_line_items(
             ticker,
-            [
-                "revenue",
-                "earnings_per_share",
-                "net_income",
-                "operating_income",
-                "gross_margin",
-                "operating_margin",
-                "free_cash_flow",
-                "capital_expenditure",
-                "cash_and_equivalents",
-                "total_debt",
-                "shareholders_equity",
-                "outstanding_shares",
-            ],
+            LINE_ITEMS,
             end_date,
             period="annual",
             limit=5,
         )
 
         progress.update_status("peter_lynch_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
+        market_cap = data_context.get_market_cap(ticker, end_date)
 
         progress.update_status("peter_lynch_agent", ticker, "Fetching insider trades")
-        insider_trades = get_insider_trades(ticker, end_date, start_date=None, limit=50)
+        insider_trades = data_context.get_insider_trades(ticker, end_date, start_date=None, limit=50)
 
         progress.update_status("peter_lynch_agent", ticker, "Fetching company news")
-        company_news = get_company_news(ticker, end_date, start_date=None, limit=50)
+        company_news = data_context.get_company_news(ticker, end_date, start_date=None, limit=50)
 
         progress.update_status("peter_lynch_agent", ticker, "Fetching recent price data for reference")
-        prices = get_prices(ticker, start_date=start_date, end_date=end_date)
+        prices = data_context.get_prices(ticker, start_date=start_date, end_date=end_date)
 
         # Perform sub-analyses:
         progress.update_status("peter_lynch_agent", ticker, "Analyzing growth")
@@ -135,6 +165,15 @@ def peter_lynch_agent(state: AgentState):
             "insider_activity": insider_activity,
         }
 
+        if no_llm:
+            # Confidence and reasoning come from the scores computed above
+            progress.update_status("peter_lynch_agent", ticker, "Done")
+            return rule_based_signal(analysis_data[ticker])
+
+        if batch_size:
+            # The signal is generated below, together with other tickers'
+            return None
+
         progress.update_status("peter_lynch_agent", ticker, "Generating Peter Lynch analysis")
         lynch_output = generate_lynch_output(
             ticker=ticker,
@@ -143,13 +182,29 @@ def peter_lynch_agent(state: AgentState):
             model_provider=state["metadata"]["model_provider"],
         )
 
-        lynch_analysis[ticker] = {
+        ticker_signal = {
             "signal": lynch_output.signal,
             "confidence": lynch_output.confidence,
             "reasoning": lynch_output.reasoning,
         }
 
         progress.update_status("peter_lynch_agent", ticker, "Done")
+        return ticker_signal
+
+    lynch_analysis = run_per_ticker(tickers, analyze_ticker, state["metadata"]["model_provider"])
+    if batch_size:
+        lynch_analysis = generate_signals_batched(
+            tickers,
+            lynch_analysis,
+            analysis_data,
+            generate_lynch_output,
+            PeterLynchSignal,
+            SYSTEM_PROMPT,
+            "peter_lynch_agent",
+            state["metadata"]["model_name"],
+            state["metadata"]["model_provider"],
+            batch_size,
+        )
 
     # Wrap up results
     message = HumanMessage(content=json.dumps(lynch_analysis), name="peter_lynch_agent")
@@ -436,6 +491,7 @@ def analyze_insider_activity(insider_trades: list) -> dict:
     return {"score": score, "details": "; ".join(details)}
 
 
+@memoize_signal("peter_lynch_agent")
 def generate_lynch_output(
     ticker: str,
     analysis_data: dict[str, any],
@@ -447,33 +503,7 @@ def generate_lynch_output(
     """
     template = ChatPromptTemplate.from_messages(
         [
-            (
-                "system",
-                """You are a Peter Lynch AI agent. You make investment decisions based on Peter Lynch's well-known principles:
-                
-                1. Invest in What You Know: Emphasize understandable businesses, possibly discovered in everyday life.
-                2. Growth at a Reasonable Price (GARP): Rely on the PEG ratio as a prime metric.
-                3. Look for 'Ten-Baggers': Companies capable of growing earnings and share price substantially.
-                4. Steady Growth: Prefer consistent revenue/earnings expansion, less concern about short-term noise.
-                5. Avoid High Debt: Watch for dangerous leverage.
-                6. Management & Story: A good 'story' behind the stock, but not overhyped or too complex.
-                
-                When you provide your reasoning, do it in Peter Lynch's voice:
-                - Cite the PEG ratio
-                - Mention 'ten-bagger' potential if applicable
-                - Refer to personal or anecdotal observations (e.g., "If my kids love the product...")
-                - Use practical, folksy language
-                - Provide key positives and negatives
-                - Conclude with a clear stance (bullish, bearish, or neutral)
-                
-                Return your final output strictly in JSON with the fields:
-                {{
-                  "signal": "bullish" | "bearish" | "neutral",
-                  "confidence": 0 to 100,
-                  "reasoning": "string"
-                }}
-                """,
-            ),
+            ("system", SYSTEM_PROMPT),
             (
                 "human",
                 """Based on the following analysis data for {ticker}, produce your Peter Lynch–style investment signal.
@@ -487,7 +517,7 @@ def generate_lynch_output(
         ]
     )
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = template.invoke({"analysis_data": format_data(analysis_data), "ticker": ticker})
 
     def create_default_signal():
         return PeterLynchSignal(
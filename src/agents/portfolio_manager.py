@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field
 from typing_extensions import Literal
 from utils.progress import progress
 from utils.llm import call_llm
+from utils.prompt_format import format_data, format_table
 
 
 class PortfolioDecision(BaseModel):
@@ -20,6 +21,10 @@ class PortfolioManagerOutput(BaseModel):
     decisions: dict[str, PortfolioDecision] = Field(description="Dictionary of ticker to trading decisions")
 
 
+# Net analyst conviction (-100 to 100) beyond which the rule-based manager trades
+RULE_BASED_CONVICTION = 20
+
+
 ##### Portfolio Management Agent #####
 def portfolio_management_agent(state: AgentState):
     """Makes final trading decisions and generates orders for multiple tickers"""
@@ -53,22 +58,26 @@ def portfolio_management_agent(state: AgentState):
         # Get signals for the ticker
         ticker_signals = {}
         for agent, signals in analyst_signals.items():
-            if agent != "risk_management_agent" and ticker in signals:
+            # Analysts that missed their deadline have no opinion on the ticker
+            if agent != "risk_management_agent" and ticker in signals and not signals[ticker].get("timed_out"):
                 ticker_signals[agent] = {"signal": signals[ticker]["signal"], "confidence": signals[ticker]["confidence"]}
         signals_by_ticker[ticker] = ticker_signals
 
     progress.update_status("portfolio_management_agent", None, "Making trading decisions")
 
     # Generate the trading decision
-    result = generate_trading_decision(
-        tickers=tickers,
-        signals_by_ticker=signals_by_ticker,
-        current_prices=current_prices,
-        max_shares=max_shares,
-        portfolio=portfolio,
-        model_name=state["metadata"]["model_name"],
-        model_provider=state["metadata"]["model_provider"],
-    )
+    if state["metadata"].get("no_llm"):
+        result = generate_rule_based_decisions(tickers, signals_by_ticker, max_shares, portfolio)
+    else:
+        result = generate_trading_decision(
+            tickers=tickers,
+            signals_by_ticker=signals_by_ticker,
+            current_prices=current_prices,
+            max_shares=max_shares,
+            portfolio=portfolio,
+            model_name=state["metadata"]["model_name"],
+            model_provider=state["metadata"]["model_provider"],
+        )
 
     # Create the portfolio management message
     message = HumanMessage(
@@ -88,6 +97,44 @@ def portfolio_management_agent(state: AgentState):
     }
 
 
+def generate_rule_based_decisions(
+    tickers: list[str],
+    signals_by_ticker: dict[str, dict[str, dict]],
+    max_shares: dict[str, int],
+    portfolio: dict[str, float],
+) -> PortfolioManagerOutput:
+    """
+    Decide without the LLM: net each ticker's analyst signals, weighted by confidence, and
+    trade when the conviction passes RULE_BASED_CONVICTION.
+
+    Bullish tickers cover an open short, or else buy up to max_shares; bearish tickers sell
+    an open long, or else short up to max_shares. Everything else is held.
+    """
+    positions = portfolio.get("positions", {})
+    decisions = {}
+    for ticker in tickers:
+        signals = list(signals_by_ticker.get(ticker, {}).values())
+        direction = {"bullish": 1, "bearish": -1}
+        conviction = sum(direction.get(signal["signal"], 0) * signal["confidence"] for signal in signals) / len(signals) if signals else 0.0
+        position = positions.get(ticker, {})
+
+        action, quantity = "hold", 0
+        if conviction >= RULE_BASED_CONVICTION:
+            action, quantity = ("cover", position["short"]) if position.get("short", 0) > 0 else ("buy", max_shares.get(ticker, 0))
+        elif conviction <= -RULE_BASED_CONVICTION:
+            action, quantity = ("sell", position["long"]) if position.get("long", 0) > 0 else ("short", max_shares.get(ticker, 0))
+        if quantity <= 0:
+            action, quantity = "hold", 0
+
+        decisions[ticker] = PortfolioDecision(
+            action=action,
+            quantity=int(quantity),
+            confidence=round(abs(conviction), 1),
+            reasoning=f"Net analyst conviction {conviction:+.1f} across {len(signals)} signals (trades beyond ±{RULE_BASED_CONVICTION})",
+        )
+    return PortfolioManagerOutput(decisions=decisions)
+
+
 def generate_trading_decision(
     tickers: list[str],
     signals_by_ticker: dict[str, dict],
@@ -130,7 +177,7 @@ def generate_trading_decision(
               - "hold": No action
 
               Inputs:
-              - signals_by_ticker: dictionary of ticker → signals
+              - signals_by_ticker: each analyst's signal and confidence for each ticker
               - max_shares: maximum shares allowed per ticker
               - portfolio_cash: current cash in portfolio
               - portfolio_positions: current positions (both long and short)
@@ -180,11 +227,11 @@ def generate_trading_decision(
     # Generate the prompt
     prompt = template.invoke(
         {
-            "signals_by_ticker": json.dumps(signals_by_ticker, indent=2),
-            "current_prices": json.dumps(current_prices, indent=2),
-            "max_shares": json.dumps(max_shares, indent=2),
+            "signals_by_ticker": format_table(signals_by_ticker, nested="agent"),
+            "current_prices": format_data(current_prices),
+            "max_shares": format_data(max_shares),
             "portfolio_cash": f"{portfolio.get('cash', 0):.2f}",
-            "portfolio_positions": json.dumps(portfolio.get('positions', {}), indent=2),
+            "portfolio_positions": format_table(portfolio.get('positions', {})),
             "margin_requirement": f"{portfolio.get('margin_requirement', 0):.2f}",
             "total_margin_used": f"{portfolio.get('margin_used', 0):.2f}",
         }
@@ -1,7 +1,8 @@
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from utils.progress import progress
-from tools.api import get_prices, prices_to_df
+from tools.api import prices_to_df
+from tools.data_context import get_data_context
 import json
 
 
@@ -11,6 +12,7 @@ def risk_management_agent(state: AgentState):
     portfolio = state["data"]["portfolio"]
     data = state["data"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
 
     # Initialize risk analysis for each ticker
     risk_analysis = {}
@@ -19,7 +21,7 @@ def risk_management_agent(state: AgentState):
     for ticker in tickers:
         progress.update_status("risk_management_agent", ticker, "Analyzing price data")
 
-        prices = get_prices(
+        prices = data_context.get_prices(
             ticker=ticker,
             start_date=data["start_date"],
             end_date=data["end_date"],
@@ -1,11 +1,12 @@
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
 import pandas as pd
 import numpy as np
 import json
 
-from tools.api import get_insider_trades, get_company_news
+from tools.data_context import get_data_context
 
 
 ##### Sentiment Agent #####
@@ -14,15 +15,13 @@ def sentiment_agent(state: AgentState):
     data = state.get("data", {})
     end_date = data.get("end_date")
     tickers = data.get("tickers")
+    data_context = get_data_context(state)
 
-    # Initialize sentiment analysis for each ticker
-    sentiment_analysis = {}
-
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("sentiment_agent", ticker, "Fetching insider trades")
 
         # Get the insider trades
-        insider_trades = get_insider_trades(
+        insider_trades = data_context.get_insider_trades(
             ticker=ticker,
             end_date=end_date,
             limit=1000,
@@ -37,7 +36,7 @@ def sentiment_agent(state: AgentState):
         progress.update_status("sentiment_agent", ticker, "Fetching company news")
 
         # Get the company news
-        company_news = get_company_news(ticker, end_date, limit=100)
+        company_news = data_context.get_company_news(ticker, end_date, limit=100)
 
         # Get the sentiment from the company news
         sentiment = pd.Series([n.sentiment for n in company_news]).dropna()
@@ -73,13 +72,16 @@ def sentiment_agent(state: AgentState):
             confidence = round(max(bullish_signals, bearish_signals) / total_weighted_signals, 2) * 100
         reasoning = f"Weighted Bullish signals: {bullish_signals:.1f}, Weighted Bearish signals: {bearish_signals:.1f}"
 
-        sentiment_analysis[ticker] = {
+        ticker_signal = {
             "signal": overall_signal,
             "confidence": confidence,
             "reasoning": reasoning,
         }
 
         progress.update_status("sentiment_agent", ticker, "Done")
+        return ticker_signal
+
+    sentiment_analysis = run_per_ticker(tickers, analyze_ticker)
 
     # Create the sentiment message
     message = HumanMessage(
@@ -8,8 +8,18 @@ import json
 import pandas as pd
 import numpy as np
 
-from tools.api import get_prices, prices_to_df
+from tools.api import prices_to_df
+from tools.data_context import get_data_context
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
+from utils.panel import align_prices, compute_panel_metrics, hurst_exponents
+
+# Number of tickers from which the agent switches to the vectorized panel
+PANEL_MIN_TICKERS = 10
+
+# Daily bars the indicators need regardless of the run's start date: 6-month momentum
+# sums 126 daily returns, the longest window of any strategy
+WARMUP_BARS = 127
 
 
 ##### Technical Analyst #####
@@ -23,99 +33,60 @@ def technical_analyst_agent(state: AgentState):
     5. Statistical Arbitrage Signals
     """
     data = state["data"]
-    start_date = data["start_date"]
     end_date = data["end_date"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
 
-    # Initialize analysis for each ticker
-    technical_analysis = {}
-
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("technical_analyst_agent", ticker, "Analyzing price data")
 
-        # Get the historical price data
-        prices = get_prices(
+        # Get the historical price data, including the indicators' warm-up
+        prices = data_context.get_price_history(
             ticker=ticker,
-            start_date=start_date,
             end_date=end_date,
+            bars=WARMUP_BARS,
         )
 
         if not prices:
             progress.update_status("technical_analyst_agent", ticker, "Failed: No price data found")
-            continue
+            return None
 
         # Convert prices to a DataFrame
         prices_df = prices_to_df(prices)
+        # EMAs, RSIs, ADX and ATR kept up to date bar by bar by the price history, if it has them
+        indicators = data_context.get_indicators(ticker, end_date)
 
         progress.update_status("technical_analyst_agent", ticker, "Calculating trend signals")
-        trend_signals = calculate_trend_signals(prices_df)
+        trend_signals = calculate_trend_signals(prices_df, indicators)
 
         progress.update_status("technical_analyst_agent", ticker, "Calculating mean reversion")
-        mean_reversion_signals = calculate_mean_reversion_signals(prices_df)
+        mean_reversion_signals = calculate_mean_reversion_signals(prices_df, indicators)
 
         progress.update_status("technical_analyst_agent", ticker, "Calculating momentum")
         momentum_signals = calculate_momentum_signals(prices_df)
 
         progress.update_status("technical_analyst_agent", ticker, "Analyzing volatility")
-        volatility_signals = calculate_volatility_signals(prices_df)
+        volatility_signals = calculate_volatility_signals(prices_df, indicators)
 
         progress.update_status("technical_analyst_agent", ticker, "Statistical analysis")
         stat_arb_signals = calculate_stat_arb_signals(prices_df)
 
-        # Combine all signals using a weighted ensemble approach
-        strategy_weights = {
-            "trend": 0.25,
-            "mean_reversion": 0.20,
-            "momentum": 0.25,
-            "volatility": 0.15,
-            "stat_arb": 0.15,
-        }
-
         progress.update_status("technical_analyst_agent", ticker, "Combining signals")
-        combined_signal = weighted_signal_combination(
-            {
-                "trend": trend_signals,
-                "mean_reversion": mean_reversion_signals,
-                "momentum": momentum_signals,
-                "volatility": volatility_signals,
-                "stat_arb": stat_arb_signals,
-            },
-            strategy_weights,
-        )
+        ticker_signal = combine_strategy_signals(trend_signals, mean_reversion_signals, momentum_signals, volatility_signals, stat_arb_signals)
 
-        # Generate detailed analysis report for this ticker
-        technical_analysis[ticker] = {
-            "signal": combined_signal["signal"],
-            "confidence": round(combined_signal["confidence"] * 100),
-            "strategy_signals": {
-                "trend_following": {
-                    "signal": trend_signals["signal"],
-                    "confidence": round(trend_signals["confidence"] * 100),
-                    "metrics": normalize_pandas(trend_signals["metrics"]),
-                },
-                "mean_reversion": {
-                    "signal": mean_reversion_signals["signal"],
-                    "confidence": round(mean_reversion_signals["confidence"] * 100),
-                    "metrics": normalize_pandas(mean_reversion_signals["metrics"]),
-                },
-                "momentum": {
-                    "signal": momentum_signals["signal"],
-                    "confidence": round(momentum_signals["confidence"] * 100),
-                    "metrics": normalize_pandas(momentum_signals["metrics"]),
-                },
-                "volatility": {
-                    "signal": volatility_signals["signal"],
-                    "confidence": round(volatility_signals["confidence"] * 100),
-                    "metrics": normalize_pandas(volatility_signals["metrics"]),
-                },
-                "statistical_arbitrage": {
-                    "signal": stat_arb_signals["signal"],
-                    "confidence": round(stat_arb_signals["confidence"] * 100),
-                    "metrics": normalize_pandas(stat_arb_signals["metrics"]),
-                },
-            },
-        }
         progress.update_status("technical_analyst_agent", ticker, "Done")
+        return ticker_signal
+
+    if len(tickers) >= PANEL_MIN_TICKERS or state["metadata"].get("technical_panel"):
+        # Screen the whole universe with one set of vectorized passes
+        progress.update_status("technical_analyst_agent", None, "Fetching price data")
+        prices_by_ticker = {ticker: data_context.get_price_history(ticker=ticker, end_date=end_date, bars=WARMUP_BARS) for ticker in tickers}
+
+        progress.update_status("technical_analyst_agent", None, f"Calculating signals for {len(tickers)} tickers")
+        technical_analysis = calculate_panel_signals(prices_by_ticker)
+        progress.update_status("technical_analyst_agent", None, "Done")
+    else:
+        technical_analysis = run_per_ticker(tickers, analyze_ticker)
 
     # Create the technical analyst message
     message = HumanMessage(
@@ -135,10 +106,99 @@ def technical_analyst_agent(state: AgentState):
     }
 
 
-def calculate_trend_signals(prices_df):
+def combine_strategy_signals(trend_signals, mean_reversion_signals, momentum_signals, volatility_signals, stat_arb_signals):
+    """Combine the five strategy signals into the per-ticker technical analysis report"""
+    # Combine all signals using a weighted ensemble approach
+    strategy_weights = {
+        "trend": 0.25,
+        "mean_reversion": 0.20,
+        "momentum": 0.25,
+        "volatility": 0.15,
+        "stat_arb": 0.15,
+    }
+
+    combined_signal = weighted_signal_combination(
+        {
+            "trend": trend_signals,
+            "mean_reversion": mean_reversion_signals,
+            "momentum": momentum_signals,
+            "volatility": volatility_signals,
+            "stat_arb": stat_arb_signals,
+        },
+        strategy_weights,
+    )
+
+    # Generate detailed analysis report for this ticker
+    return {
+        "signal": combined_signal["signal"],
+        "confidence": round(combined_signal["confidence"] * 100),
+        "strategy_signals": {
+            "trend_following": {
+                "signal": trend_signals["signal"],
+                "confidence": round(trend_signals["confidence"] * 100),
+                "metrics": normalize_pandas(trend_signals["metrics"]),
+            },
+            "mean_reversion": {
+                "signal": mean_reversion_signals["signal"],
+                "confidence": round(mean_reversion_signals["confidence"] * 100),
+                "metrics": normalize_pandas(mean_reversion_signals["metrics"]),
+            },
+            "momentum": {
+                "signal": momentum_signals["signal"],
+                "confidence": round(momentum_signals["confidence"] * 100),
+                "metrics": normalize_pandas(momentum_signals["metrics"]),
+            },
+            "volatility": {
+                "signal": volatility_signals["signal"],
+                "confidence": round(volatility_signals["confidence"] * 100),
+                "metrics": normalize_pandas(volatility_signals["metrics"]),
+            },
+            "statistical_arbitrage": {
+                "signal": stat_arb_signals["signal"],
+                "confidence": round(stat_arb_signals["confidence"] * 100),
+                "metrics": normalize_pandas(stat_arb_signals["metrics"]),
+            },
+        },
+    }
+
+
+def calculate_panel_signals(prices_by_ticker: dict[str, list]) -> dict[str, dict]:
+    """
+    Technical analysis for many tickers at once.
+
+    Aligns all tickers into (dates x tickers) arrays and computes every strategy's metrics
+    in vectorized passes, then applies the same signal rules as the per-ticker path.
+    """
+    tickers, panel = align_prices(prices_by_ticker)
+    if not tickers:
+        return {}
+    metrics = compute_panel_metrics(panel)
+    hurst = hurst_exponents(panel["close"])
+
+    technical_analysis = {}
+    for column, ticker in enumerate(tickers):
+        m = {name: values[column] for name, values in metrics.items()}
+
+        technical_analysis[ticker] = combine_strategy_signals(
+            trend_signal(m["ema_8"] > m["ema_21"], m["ema_21"] > m["ema_55"], m["adx"]),
+            mean_reversion_signal(m["z_score"], m["price_vs_bb"], m["rsi_14"], m["rsi_28"]),
+            momentum_signal(m["momentum_1m"], m["momentum_3m"], m["momentum_6m"], m["volume_momentum"]),
+            volatility_signal(m["historical_volatility"], m["volatility_regime"], m["volatility_z_score"], m["atr_ratio"]),
+            stat_arb_signal(hurst[column], m["skewness"], m["kurtosis"]),
+        )
+    return technical_analysis
+
+
+def calculate_trend_signals(prices_df, indicators=None):
     """
     Advanced trend following strategy using multiple timeframes and indicators
+
+    `indicators` are incrementally maintained values (see utils.indicators) used
+    instead of recomputing the EMAs and ADX over `prices_df`.
     """
+    if indicators is not None:
+        return trend_signal(indicators["ema_8"] > indicators["ema_21"], indicators["ema_21"] > indicators["ema_55"], indicators["adx"])
+
     # Calculate EMAs for multiple timeframes
     ema_8 = calculate_ema(prices_df, 8)
     ema_21 = calculate_ema(prices_df, 21)
@@ -151,13 +211,18 @@ def calculate_trend_signals(prices_df):
     short_trend = ema_8 > ema_21
     medium_trend = ema_21 > ema_55
 
+    return trend_signal(short_trend.iloc[-1], medium_trend.iloc[-1], adx["adx"].iloc[-1])
+
+
+def trend_signal(short_trend, medium_trend, adx):
+    """Trend signal from the latest EMA crossovers and ADX"""
     # Combine signals with confidence weighting
-    trend_strength = adx["adx"].iloc[-1] / 100.0
+    trend_strength = adx / 100.0
 
-    if short_trend.iloc[-1] and medium_trend.iloc[-1]:
+    if short_trend and medium_trend:
         signal = "bullish"
         confidence = trend_strength
-    elif not short_trend.iloc[-1] and not medium_trend.iloc[-1]:
+    elif not short_trend and not medium_trend:
         signal = "bearish"
         confidence = trend_strength
     else:
@@ -168,15 +233,17 @@ def calculate_trend_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "adx": float(adx["adx"].iloc[-1]),
+            "adx": float(adx),
             "trend_strength": float(trend_strength),
         },
     }
 
 
-def calculate_mean_reversion_signals(prices_df):
+def calculate_mean_reversion_signals(prices_df, indicators=None):
     """
     Mean reversion strategy using statistical measures and Bollinger Bands
+
+    `indicators` supply incrementally maintained RSIs, if given.
     """
     # Calculate z-score of price relative to moving average
     ma_50 = prices_df["close"].rolling(window=50).mean()
@@ -187,19 +254,27 @@ def calculate_mean_reversion_signals(prices_df):
     bb_upper, bb_lower = calculate_bollinger_bands(prices_df)
 
     # Calculate RSI with multiple timeframes
-    rsi_14 = calculate_rsi(prices_df, 14)
-    rsi_28 = calculate_rsi(prices_df, 28)
+    if indicators is not None:
+        rsi_14, rsi_28 = indicators["rsi_14"], indicators["rsi_28"]
+    else:
+        rsi_14 = calculate_rsi(prices_df, 14).iloc[-1]
+        rsi_28 = calculate_rsi(prices_df, 28).iloc[-1]
 
     # Mean reversion signals
     price_vs_bb = (prices_df["close"].iloc[-1] - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1])
 
+    return mean_reversion_signal(z_score.iloc[-1], price_vs_bb, rsi_14, rsi_28)
+
+
+def mean_reversion_signal(z_score, price_vs_bb, rsi_14, rsi_28):
+    """Mean reversion signal from the latest z-score, Bollinger position and RSIs"""
     # Combine signals
-    if z_score.iloc[-1] < -2 and price_vs_bb < 0.2:
+    if z_score < -2 and price_vs_bb < 0.2:
         signal = "bullish"
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
-    elif z_score.iloc[-1] > 2 and price_vs_bb > 0.8:
+        confidence = min(abs(z_score) / 4, 1.0)
+    elif z_score > 2 and price_vs_bb > 0.8:
         signal = "bearish"
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
+        confidence = min(abs(z_score) / 4, 1.0)
     else:
         signal = "neutral"
         confidence = 0.5
@@ -208,10 +283,10 @@ def calculate_mean_reversion_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "z_score": float(z_score.iloc[-1]),
+            "z_score": float(z_score),
             "price_vs_bb": float(price_vs_bb),
-            "rsi_14": float(rsi_14.iloc[-1]),
-            "rsi_28": float(rsi_28.iloc[-1]),
+            "rsi_14": float(rsi_14),
+            "rsi_28": float(rsi_28),
         },
     }
 
@@ -233,11 +308,16 @@ def calculate_momentum_signals(prices_df):
     # Relative strength
     # (would compare to market/sector in real implementation)
 
+    return momentum_signal(mom_1m.iloc[-1], mom_3m.iloc[-1], mom_6m.iloc[-1], volume_momentum.iloc[-1])
+
+
+def momentum_signal(mom_1m, mom_3m, mom_6m, volume_momentum):
+    """Momentum signal from the latest 1/3/6-month returns and volume momentum"""
     # Calculate momentum score
-    momentum_score = (0.4 * mom_1m + 0.3 * mom_3m + 0.3 * mom_6m).iloc[-1]
+    momentum_score = 0.4 * mom_1m + 0.3 * mom_3m + 0.3 * mom_6m
 
     # Volume confirmation
-    volume_confirmation = volume_momentum.iloc[-1] > 1.0
+    volume_confirmation = volume_momentum > 1.0
 
     if momentum_score > 0.05 and volume_confirmation:
         signal = "bullish"
@@ -253,17 +333,19 @@ def calculate_momentum_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "momentum_1m": float(mom_1m.iloc[-1]),
-            "momentum_3m": float(mom_3m.iloc[-1]),
-            "momentum_6m": float(mom_6m.iloc[-1]),
-            "volume_momentum": float(volume_momentum.iloc[-1]),
+            "momentum_1m": float(mom_1m),
+            "momentum_3m": float(mom_3m),
+            "momentum_6m": float(mom_6m),
+            "volume_momentum": float(volume_momentum),
         },
     }
 
 
-def calculate_volatility_signals(prices_df):
+def calculate_volatility_signals(prices_df, indicators=None):
     """
     Volatility-based trading strategy
+
+    `indicators` supply an incrementally maintained ATR, if given.
     """
     # Calculate various volatility metrics
     returns = prices_df["close"].pct_change()
@@ -279,13 +361,15 @@ def calculate_volatility_signals(prices_df):
     vol_z_score = (hist_vol - vol_ma) / hist_vol.rolling(63).std()
 
     # ATR ratio
-    atr = calculate_atr(prices_df)
-    atr_ratio = atr / prices_df["close"]
+    atr = indicators["atr"] if indicators is not None else calculate_atr(prices_df).iloc[-1]
+    atr_ratio = atr / prices_df["close"].iloc[-1]
 
-    # Generate signal based on volatility regime
-    current_vol_regime = vol_regime.iloc[-1]
-    vol_z = vol_z_score.iloc[-1]
+    return volatility_signal(hist_vol.iloc[-1], vol_regime.iloc[-1], vol_z_score.iloc[-1], atr_ratio)
 
+
+def volatility_signal(hist_vol, current_vol_regime, vol_z, atr_ratio):
+    """Volatility signal from the latest volatility regime and its z-score"""
+    # Generate signal based on volatility regime
     if current_vol_regime < 0.8 and vol_z < -1:
         signal = "bullish"  # Low vol regime, potential for expansion
         confidence = min(abs(vol_z) / 3, 1.0)
@@ -300,10 +384,10 @@ def calculate_volatility_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "historical_volatility": float(hist_vol.iloc[-1]),
+            "historical_volatility": float(hist_vol),
             "volatility_regime": float(current_vol_regime),
             "volatility_z_score": float(vol_z),
-            "atr_ratio": float(atr_ratio.iloc[-1]),
+            "atr_ratio": float(atr_ratio),
         },
     }
 
@@ -325,11 +409,16 @@ def calculate_stat_arb_signals(prices_df):
     # Correlation analysis
     # (would include correlation with related securities in real implementation)
 
+    return stat_arb_signal(hurst, skew.iloc[-1], kurt.iloc[-1])
+
+
+def stat_arb_signal(hurst, skew, kurt):
+    """Statistical arbitrage signal from the Hurst exponent and the latest return skew/kurtosis"""
     # Generate signal based on statistical properties
-    if hurst < 0.4 and skew.iloc[-1] > 1:
+    if hurst < 0.4 and skew > 1:
         signal = "bullish"
         confidence = (0.5 - hurst) * 2
-    elif hurst < 0.4 and skew.iloc[-1] < -1:
+    elif hurst < 0.4 and skew < -1:
         signal = "bearish"
         confidence = (0.5 - hurst) * 2
     else:
@@ -341,8 +430,8 @@ def calculate_stat_arb_signals(prices_df):
         "confidence": confidence,
         "metrics": {
             "hurst_exponent": float(hurst),
-            "skewness": float(skew.iloc[-1]),
-            "kurtosis": float(kurt.iloc[-1]),
+            "skewness": float(skew),
+            "kurtosis": float(kurt),
         },
     }
 
@@ -432,6 +521,8 @@ def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     """
     Calculate Average Directional Index (ADX)
 
+    Works on local NumPy buffers and leaves `df` untouched.
+
     Args:
         df: DataFrame with OHLC data
         period: Period for calculations
@@ -439,26 +530,49 @@ def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     Returns:
         DataFrame with ADX values
     """
-    # Calculate True Range
-    df["high_low"] = df["high"] - df["low"]
-    df["high_close"] = abs(df["high"] - df["close"].shift())
-    df["low_close"] = abs(df["low"] - df["close"].shift())
-    df["tr"] = df[["high_low", "high_close", "low_close"]].max(axis=1)
-
-    # Calculate Directional Movement
-    df["up_move"] = df["high"] - df["high"].shift()
-    df["down_move"] = df["low"].shift() - df["low"]
-
-    df["plus_dm"] = np.where((df["up_move"] > df["down_move"]) & (df["up_move"] > 0), df["up_move"], 0)
-    df["minus_dm"] = np.where((df["down_move"] > df["up_move"]) & (df["down_move"] > 0), df["down_move"], 0)
-
-    # Calculate ADX
-    df["+di"] = 100 * (df["plus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean())
-    df["-di"] = 100 * (df["minus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean())
-    df["dx"] = 100 * abs(df["+di"] - df["-di"]) / (df["+di"] + df["-di"])
-    df["adx"] = df["dx"].ewm(span=period).mean()
-
-    return df[["adx", "+di", "-di"]]
+    high = df["high"].to_numpy(dtype=float)
+    low = df["low"].to_numpy(dtype=float)
+    close = df["close"].to_numpy(dtype=float)
+    n = len(close)
+
+    # Scratch columns (true range, +DM, -DM), column-major so each column is contiguous
+    work = np.empty((n, 3), order="F")
+    tr, plus_dm, minus_dm = work[:, 0], work[:, 1], work[:, 2]
+    moves = np.empty((2, max(n - 1, 0)))
+    up_move, down_move = moves[0], moves[1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Calculate True Range, ignoring the missing previous close on the first bar
+        np.subtract(high, low, out=tr)
+        np.subtract(high[1:], close[:-1], out=up_move)
+        np.fmax(tr[1:], np.abs(up_move, out=up_move), out=tr[1:])
+        np.subtract(low[1:], close[:-1], out=up_move)
+        np.fmax(tr[1:], np.abs(up_move, out=up_move), out=tr[1:])
+
+        # Calculate Directional Movement
+        np.subtract(high[1:], high[:-1], out=up_move)
+        np.subtract(low[:-1], low[1:], out=down_move)
+        plus_dm.fill(0.0)
+        minus_dm.fill(0.0)
+        np.copyto(plus_dm[1:], up_move, where=(up_move > down_move) & (up_move > 0))
+        np.copyto(minus_dm[1:], down_move, where=(down_move > up_move) & (down_move > 0))
+
+        # Smooth all three columns in one pass
+        smoothed = pd.DataFrame(work, copy=False).ewm(span=period).mean().to_numpy()
+
+        # Calculate ADX
+        result = np.empty((n, 3), order="F")
+        adx, plus_di, minus_di = result[:, 0], result[:, 1], result[:, 2]
+        np.multiply(np.divide(smoothed[:, 1], smoothed[:, 0], out=plus_di), 100, out=plus_di)
+        np.multiply(np.divide(smoothed[:, 2], smoothed[:, 0], out=minus_di), 100, out=minus_di)
+
+        # The true range buffer is free again; reuse it for DX
+        dx, di_sum = work[:, 0], work[:, 1]
+        np.multiply(np.abs(np.subtract(plus_di, minus_di, out=dx), out=dx), 100, out=dx)
+        np.divide(dx, np.add(plus_di, minus_di, out=di_sum), out=dx)
+        adx[:] = pd.Series(dx, copy=False).ewm(span=period).mean().to_numpy()
+
+    return pd.DataFrame(result, index=df.index, columns=["adx", "+di", "-di"], copy=False)
 
 
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
@@ -496,14 +610,4 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> floa
     Returns:
         float: Hurst exponent
     """
-    lags = range(2, max_lag)
-    # Add small epsilon to avoid log(0)
-    tau = [max(1e-8, np.sqrt(np.std(np.subtract(price_series[lag:], price_series[:-lag])))) for lag in lags]
-
-    # Return the Hurst exponent from linear fit
-    try:
-        reg = np.polyfit(np.log(lags), np.log(tau), 1)
-        return reg[0]  # Hurst exponent is the slope
-    except (ValueError, RuntimeWarning):
-        # Return 0.5 (random walk) if calculation fails
-        return 0.5
+    return float(hurst_exponents(np.asarray(price_series, dtype=float), max_lag)[0])
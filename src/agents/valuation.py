@@ -11,12 +11,19 @@ import json
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
+
+from tools.data_context import get_data_context
+
+# Line items the agent analyzes, also declared as its data requirement in utils.analysts
+LINE_ITEMS = [
+    "free_cash_flow",
+    "net_income",
+    "depreciation_and_amortization",
+    "capital_expenditure",
+    "working_capital",
+]
 
-from tools.api import (
-    get_financial_metrics,
-    get_market_cap,
-    search_line_items,
-)
 
 def valuation_agent(state: AgentState):
     """Run valuation across tickers and write signals back to `state`."""
@@ -24,14 +31,13 @@ def valuation_agent(state: AgentState):
     data = state["data"]
     end_date = data["end_date"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
 
-    valuation_analysis: dict[str, dict] = {}
-
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("valuation_agent", ticker, "Fetching financial data")
 
         # --- Historical financial metrics (pull 8 latest TTM snapshots for medians) ---
-        financial_metrics = get_financial_metrics(
+        financial_metrics = data_context.get_financial_metrics(
             ticker=ticker,
             end_date=end_date,
             period="ttm",
@@ -39,27 +45,21 @@ def valuation_agent(state: AgentState):
         )
         if not financial_metrics:
             progress.update_status("valuation_agent", ticker, "Failed: No financial metrics found")
-            continue
+            return None
         most_recent_metrics = financial_metrics[0]
 
         # --- Fine‑grained line‑items (need two periods to calc WC change) ---
         progress.update_status("valuation_agent", ticker, "Gathering line items")
-        line_items = search_line_items(
+        line_items = data_context.search_line_items(
             ticker=ticker,
-            line_items=[
-                "free_cash_flow",
-                "net_income",
-                "depreciation_and_amortization",
-                "capital_expenditure",
-                "working_capital",
-            ],
+            line_items=LINE_ITEMS,
             end_date=end_date,
             period="ttm",
             limit=2,
         )
         if len(line_items) < 2:
             progress.update_status("valuation_agent", ticker, "Failed: Insufficient financial line items")
-            continue
+            return None
         li_curr, li_prev = line_items[0], line_items[1]
 
         # ------------------------------------------------------------------
@@ -99,10 +99,10 @@ def valuation_agent(state: AgentState):
         # ------------------------------------------------------------------
         # Aggregate & signal
         # ------------------------------------------------------------------
-        market_cap = get_market_cap(ticker, end_date)
+        market_cap = data_context.get_market_cap(ticker, end_date)
         if not market_cap:
             progress.update_status("valuation_agent", ticker, "Failed: Market cap unavailable")
-            continue
+            return None
 
         method_values = {
             "dcf": {"value": dcf_val, "weight": 0.35},
@@ -114,7 +114,7 @@ def valuation_agent(state: AgentState):
         total_weight = sum(v["weight"] for v in method_values.values() if v["value"] > 0)
         if total_weight == 0:
             progress.update_status("valuation_agent", ticker, "Failed: All valuation methods zero")
-            continue
+            return None
 
         for v in method_values.values():
             v["gap"] = (v["value"] - market_cap) / market_cap if v["value"] > 0 else None
@@ -140,12 +140,15 @@ def valuation_agent(state: AgentState):
             for m, vals in method_values.items() if vals["value"] > 0
         }
 
-        valuation_analysis[ticker] = {
+        ticker_signal = {
             "signal": signal,
             "confidence": confidence,
             "reasoning": reasoning,
         }
         progress.update_status("valuation_agent", ticker, "Done")
+        return ticker_signal
+
+    valuation_analysis = run_per_ticker(tickers, analyze_ticker)
 
     # ---- Emit message (for LLM tool chain) ----
     msg = HumanMessage(content=json.dumps(valuation_analysis), name="valuation_agent")
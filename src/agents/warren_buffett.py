@@ -4,9 +4,14 @@ from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
-from tools.api import get_financial_metrics, get_market_cap, search_line_items
+from tools.data_context import get_data_context
 from utils.llm import call_llm
 from utils.progress import progress
+from utils.concurrency import run_per_ticker
+from utils.batching import generate_signals_batched
+from utils.memo import memoize_signal
+from utils.prompt_format import format_data
+from utils.rule_based import rule_based_signal
 
 
 class WarrenBuffettSignal(BaseModel):
@@ -15,40 +20,69 @@ class WarrenBuffettSignal(BaseModel):
     reasoning: str
 
 
+SYSTEM_PROMPT = """You are a Warren Buffett AI agent. Decide on investment signals based on Warren Buffett's principles:
+- Circle of Competence: Only invest in businesses you understand
+- Margin of Safety (> 30%): Buy at a significant discount to intrinsic value
+- Economic Moat: Look for durable competitive advantages
+- Quality Management: Seek conservative, shareholder-oriented teams
+- Financial Strength: Favor low debt, strong returns on equity
+- Long-term Horizon: Invest in businesses, not just stocks
+- Sell only if fundamentals deteriorate or valuation far exceeds intrinsic value
+
+When providing your reasoning, be thorough and specific by:
+1. Explaining the key factors that influenced your decision the most (both positive and negative)
+2. Highlighting how the company aligns with or violates specific Buffett principles
+3. Providing quantitative evidence where relevant (e.g., specific margins, ROE values, debt levels)
+4. Concluding with a Buffett-style assessment of the investment opportunity
+5. Using Warren Buffett's voice and conversational style in your explanation
+
+For example, if bullish: "I'm particularly impressed with [specific strength], reminiscent of our early investment in See's Candies where we saw [similar attribute]..."
+For example, if bearish: "The declining returns on capital remind me of the textile operations at Berkshire that we eventually exited because..."
+
+Follow these guidelines strictly.
+"""
+
+
+# Line items the agent analyzes, also declared as its data requirement in utils.analysts
+LINE_ITEMS = [
+    "capital_expenditure",
+    "depreciation_and_amortization",
+    "net_income",
+    "outstanding_shares",
+    "total_assets",
+    "total_liabilities",
+    "dividends_and_other_cash_distributions",
+    "issuance_or_purchase_of_equity_shares",
+]
+
+
 def warren_buffett_agent(state: AgentState):
     """Analyzes stocks using Buffett's principles and LLM reasoning."""
     data = state["data"]
     end_date = data["end_date"]
     tickers = data["tickers"]
+    data_context = get_data_context(state)
+    no_llm = state["metadata"].get("no_llm")
+    batch_size = None if no_llm else state["metadata"].get("llm_batch_size")
 
     # Collect all analysis for LLM reasoning
     analysis_data = {}
-    buffett_analysis = {}
 
-    for ticker in tickers:
+    def analyze_ticker(ticker: str) -> dict | None:
         progress.update_status("warren_buffett_agent", ticker, "Fetching financial metrics")
         # Fetch required data
-        metrics = get_financial_metrics(ticker, end_date, period="ttm", limit=5)
+        metrics = data_context.get_financial_metrics(ticker, end_date, period="ttm", limit=5)
 
         progress.update_status("warren_buffett_agent", ticker, "Gathering financial line items")
-        financial_line_items = search_line_items(
+        financial_line_items = data_context.search_line_items(
             ticker,
-            [
-                "capital_expenditure",
-                "depreciation_and_amortization",
-                "net_income",
-                "outstanding_shares",
-                "total_assets",
-                "total_liabilities",
-                "dividends_and_other_cash_distributions",
-                "issuance_or_purchase_of_equity_shares",
-            ],
+            LINE_ITEMS,
             end_date,
         )
 
         progress.update_status("warren_buffett_agent", ticker, "Getting market cap")
         # Get current market cap
-        market_cap = get_market_cap(ticker, end_date)
+        market_cap = data_context.get_market_cap(ticker, end_date)
 
         progress.update_status("warren_buffett_agent", ticker, "Analyzing fundamentals")
         # Analyze fundamentals
@@ -104,22 +138,47 @@ def warren_buffett_agent(state: AgentState):
             "margin_of_safety": margin_of_safety,
         }
 
+        if no_llm:
+            # Confidence and reasoning come from the scores computed above
+            progress.update_status("warren_buffett_agent", ticker, "Done")
+            return rule_based_signal(analysis_data[ticker])
+
+        if batch_size:
+            # The signal is generated below, together with other tickers'
+            return None
+
         progress.update_status("warren_buffett_agent", ticker, "Generating Warren Buffett analysis")
         buffett_output = generate_buffett_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
 
         # Store analysis in consistent format with other agents
-        buffett_analysis[ticker] = {
+        ticker_signal = {
             "signal": buffett_output.signal,
             "confidence": buffett_output.confidence, # Normalize between 0 to 100
             "reasoning": buffett_output.reasoning,
         }
 
         progress.update_status("warren_buffett_agent", ticker, "Done")
+        return ticker_signal
+
+    buffett_analysis = run_per_ticker(tickers, analyze_ticker, state["metadata"]["model_provider"])
+    if batch_size:
+        buffett_analysis = generate_signals_batched(
+            tickers,
+            buffett_analysis,
+            analysis_data,
+            generate_buffett_output,
+            WarrenBuffettSignal,
+            SYSTEM_PROMPT,
+            "warren_buffett_agent",
+            state["metadata"]["model_name"],
+            state["metadata"]["model_provider"],
+            batch_size,
+        )
 
     # Create the message
     message = HumanMessage(content=json.dumps(buffett_analysis), name="warren_buffett_agent")
@@ -382,6 +441,7 @@ def calculate_intrinsic_value(financial_line_items: list) -> dict[str, any]:
     }
 
 
+@memoize_signal("warren_buffett_agent")
 def generate_buffett_output(
     ticker: str,
     analysis_data: dict[str, any],
@@ -391,30 +451,7 @@ def generate_buffett_output(
     """Get investment decision from LLM with Buffett's principles"""
     template = ChatPromptTemplate.from_messages(
         [
-            (
-                "system",
-                """You are a Warren Buffett AI agent. Decide on investment signals based on Warren Buffett's principles:
-                - Circle of Competence: Only invest in businesses you understand
-                - Margin of Safety (> 30%): Buy at a significant discount to intrinsic value
-                - Economic Moat: Look for durable competitive advantages
-                - Quality Management: Seek conservative, shareholder-oriented teams
-                - Financial Strength: Favor low debt, strong returns on equity
-                - Long-term Horizon: Invest in businesses, not just stocks
-                - Sell only if fundamentals deteriorate or valuation far exceeds intrinsic value
-
-                When providing your reasoning, be thorough and specific by:
-                1. Explaining the key factors that influenced your decision the most (both positive and negative)
-                2. Highlighting how the company aligns with or violates specific Buffett principles
-                3. Providing quantitative evidence where relevant (e.g., specific margins, ROE values, debt levels)
-                4. Concluding with a Buffett-style assessment of the investment opportunity
-                5. Using Warren Buffett's voice and conversational style in your explanation
-
-                For example, if bullish: "I'm particularly impressed with [specific strength], reminiscent of our early investment in See's Candies where we saw [similar attribute]..."
-                For example, if bearish: "The declining returns on capital remind me of the textile operations at Berkshire that we eventually exited because..."
-
-                Follow these guidelines strictly.
-                """,
-            ),
+            ("system", SYSTEM_PROMPT),
             (
                 "human",
                 """Based on the following data, create the investment signal as Warren Buffett would:
@@ -433,7 +470,7 @@ def generate_buffett_output(
         ]
     )
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = template.invoke({"analysis_data": format_data(analysis_data), "ticker": ticker})
 
     # Default fallback signal in case parsing fails
     def create_default_warren_buffett_signal():
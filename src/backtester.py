@@ -11,16 +11,23 @@ import numpy as np
 import itertools
 
 from llm.models import LLM_ORDER, OLLAMA_LLM_ORDER, get_model_info, ModelProvider
-from utils.analysts import ANALYST_ORDER
+from utils.analysts import ANALYST_ORDER, get_price_history_bars
 from main import run_hedge_fund
 from tools.api import (
     get_company_news,
-    get_price_data,
-    get_prices,
+    get_prices_batch,
     get_financial_metrics,
     get_insider_trades,
+    load_earnings_calendar,
 )
 from utils.display import print_backtest_results, format_backtest_row
+from data.cache import get_cache
+from data.history import PriceHistory, history_start
+from llm.cache import get_llm_cache
+from llm.hedging import get_hedge_policy, get_latency_tracker
+from llm.usage import get_usage_tracker
+from utils.llm import get_llm_scheduler
+from utils.memo import DEFAULT_TOLERANCE, get_signal_memo
 from typing_extensions import Callable
 from utils.ollama import ensure_ollama_and_model
 
@@ -39,6 +46,8 @@ class Backtester:
         model_provider: str = "OpenAI",
         selected_analysts: list[str] = [],
         initial_margin_requirement: float = 0.0,
+        llm_batch_size: int | None = None,
+        no_llm: bool = False,
     ):
         """
         :param agent: The trading agent (Callable).
@@ -50,6 +59,8 @@ class Backtester:
         :param model_provider: Which LLM provider (OpenAI, etc).
         :param selected_analysts: List of analyst names or IDs to incorporate.
         :param initial_margin_requirement: The margin ratio (e.g. 0.5 = 50%).
+        :param llm_batch_size: Tickers per persona LLM call, or None for one call per ticker.
+        :param no_llm: Derive persona signals and trading decisions from the agents' scores, without LLM calls.
         """
         self.agent = agent
         self.tickers = tickers
@@ -59,6 +70,12 @@ class Backtester:
         self.model_name = model_name
         self.model_provider = model_provider
         self.selected_analysts = selected_analysts
+        self.llm_batch_size = llm_batch_size
+        self.no_llm = no_llm
+
+        # Rolling warm-up window for indicators, extended one day at a time during the backtest
+        history_bars = get_price_history_bars(selected_analysts or [value for _, value in ANALYST_ORDER])
+        self.price_history = PriceHistory(history_bars) if history_bars else None
 
         # Initialize portfolio with support for long/short positions
         self.portfolio_values = []
@@ -271,11 +288,28 @@ class Backtester:
         end_date_dt = datetime.strptime(self.end_date, "%Y-%m-%d")
         start_date_dt = end_date_dt - relativedelta(years=1)
         start_date_str = start_date_dt.strftime("%Y-%m-%d")
+        if self.price_history:
+            # Also cover the indicator warm-up before the first trading day
+            start_date_str = min(start_date_str, history_start(self.start_date, self.price_history.max_bars))
+
+        # Fetch price data for the entire period, plus 1 year, in multi-symbol batches
+        try:
+            get_prices_batch(self.tickers, start_date_str, self.end_date)
+        except Exception as e:
+            # The daily loop fetches whatever is missing, skipping days it can't price
+            print(f"Error pre-fetching prices: {e}")
+
+        if self.price_history:
+            # Seed the warm-up window with the bars before the first trading day
+            seed_end = (datetime.strptime(self.start_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+            seed_prices = get_prices_batch(self.tickers, history_start(self.start_date, self.price_history.max_bars), seed_end)
+            for ticker in self.tickers:
+                self.price_history.update(ticker, seed_prices.get(ticker, []), seed_end)
 
-        for ticker in self.tickers:
-            # Fetch price data for the entire period, plus 1 year
-            get_prices(ticker, start_date_str, self.end_date)
+        # Earnings dates for the whole period, so the daily runs refetch fundamentals only around filings
+        load_earnings_calendar(self.start_date, self.end_date, self.tickers)
 
+        for ticker in self.tickers:
             # Fetch financial metrics
             get_financial_metrics(ticker, self.end_date, limit=10)
 
@@ -317,18 +351,25 @@ class Backtester:
                 current_prices = {}
                 missing_data = False
 
+                # One lookup for the whole universe; cache misses are fetched in batches
+                try:
+                    prices_by_ticker = get_prices_batch(self.tickers, previous_date_str, current_date_str)
+                except Exception as e:
+                    print(f"Error fetching prices between {previous_date_str} and {current_date_str}: {e}")
+                    print(f"Skipping trading day {current_date_str} due to missing price data")
+                    continue
+
+                if self.price_history:
+                    for ticker in self.tickers:
+                        self.price_history.update(ticker, prices_by_ticker.get(ticker, []), current_date_str)
+
                 for ticker in self.tickers:
-                    try:
-                        price_data = get_price_data(ticker, previous_date_str, current_date_str)
-                        if price_data.empty:
-                            print(f"Warning: No price data for {ticker} on {current_date_str}")
-                            missing_data = True
-                            break
-                        current_prices[ticker] = price_data.iloc[-1]["close"]
-                    except Exception as e:
-                        print(f"Error fetching price for {ticker} between {previous_date_str} and {current_date_str}: {e}")
+                    prices = prices_by_ticker.get(ticker)
+                    if not prices:
+                        print(f"Warning: No price data for {ticker} on {current_date_str}")
                         missing_data = True
                         break
+                    current_prices[ticker] = max(prices, key=lambda p: p.time).close
 
                 if missing_data:
                     print(f"Skipping trading day {current_date_str} due to missing price data")
@@ -350,6 +391,9 @@ class Backtester:
                 model_name=self.model_name,
                 model_provider=self.model_provider,
                 selected_analysts=self.selected_analysts,
+                price_history=self.price_history,
+                llm_batch_size=self.llm_batch_size,
+                no_llm=self.no_llm,
             )
             decisions = output["decisions"]
             analyst_signals = output["analyst_signals"]
@@ -641,9 +685,25 @@ if __name__ == "__main__":
         help="Margin ratio for short positions, e.g. 0.5 for 50% (default: 0.0)",
     )
     parser.add_argument("--ollama", action="store_true", help="Use Ollama for local LLM inference")
+    parser.add_argument("--export-cache", type=str, help="Write a cache snapshot to this path when the backtest finishes")
+    parser.add_argument(
+        "--signal-tolerance",
+        type=float,
+        help=f"Relative change in numeric inputs below which persona agents reuse the previous day's signal (default: {DEFAULT_TOLERANCE})",
+    )
+    parser.add_argument("--llm-batch-size", type=int, help="Ask persona agents for up to this many tickers' signals per LLM call")
+    parser.add_argument("--no-llm", action="store_true", help="Skip the LLM: persona and portfolio decisions come from the agents' own scores")
+    parser.add_argument("--no-signal-memo", action="store_true", help="Call the LLM for every persona signal, even when inputs are unchanged")
+    parser.add_argument("--usage-report", type=str, help="Write per-call LLM token and latency usage as JSON to this path")
 
     args = parser.parse_args()
 
+    signal_memo = get_signal_memo()
+    if args.signal_tolerance is not None:
+        signal_memo.tolerance = args.signal_tolerance
+    if args.no_signal_memo:
+        signal_memo.enabled = False
+
     # Parse tickers from comma-separated string
     tickers = [ticker.strip() for ticker in args.tickers.split(",")] if args.tickers else []
 
@@ -675,7 +735,9 @@ if __name__ == "__main__":
     model_choice = None
     model_provider = None
 
-    if args.ollama:
+    if args.no_llm:
+        print(f"{Fore.CYAN}Running without LLM calls: signals and decisions are rule-based.{Style.RESET_ALL}\n")
+    elif args.ollama:
         print(f"{Fore.CYAN}Using Ollama for local LLM inference.{Style.RESET_ALL}")
 
         # Select from Ollama-specific models
@@ -741,7 +803,23 @@ if __name__ == "__main__":
         model_provider=model_provider,
         selected_analysts=selected_analysts,
         initial_margin_requirement=args.margin_requirement,
+        llm_batch_size=args.llm_batch_size,
+        no_llm=args.no_llm,
     )
 
     performance_metrics = backtester.run_backtest()
+    if get_llm_cache().enabled:
+        print(get_llm_cache().summary())
+    if scheduler_summary := get_llm_scheduler().summary():
+        print(scheduler_summary)
+    if get_hedge_policy().enabled:
+        print(get_latency_tracker().summary())
+    if get_usage_tracker().records():
+        print(get_usage_tracker().summary())
+    if args.usage_report:
+        get_usage_tracker().write(args.usage_report)
+    if signal_memo.enabled:
+        print(signal_memo.summary())
+    if args.export_cache:
+        get_cache().export_snapshot(args.export_cache)
     performance_df = backtester.analyze_performance()
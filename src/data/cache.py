@@ -1,31 +1,52 @@
+import gzip
+import json
+import os
+
+from data.models import CompanyNewsRecord, InsiderTradeRecord, PriceRecord
+from data.refresh import get_refresh_planner
+
+# Bump when the snapshot layout changes; older snapshots are ignored
+SNAPSHOT_VERSION = 2
+
+# Record-backed caches are stored as field name header + rows to keep snapshots small
+_RECORD_TYPES = {
+    "prices": PriceRecord,
+    "insider_trades": InsiderTradeRecord,
+    "company_news": CompanyNewsRecord,
+}
+
+
 class Cache:
     """In-memory cache for API responses."""
 
     def __init__(self):
-        self._prices_cache: dict[str, list[dict[str, any]]] = {}
+        self._prices_cache: dict[str, list[PriceRecord]] = {}
         self._financial_metrics_cache: dict[str, list[dict[str, any]]] = {}
         self._line_items_cache: dict[str, list[dict[str, any]]] = {}
-        self._insider_trades_cache: dict[str, list[dict[str, any]]] = {}
-        self._company_news_cache: dict[str, list[dict[str, any]]] = {}
+        self._insider_trades_cache: dict[str, list[InsiderTradeRecord]] = {}
+        self._company_news_cache: dict[str, list[CompanyNewsRecord]] = {}
 
-    def _merge_data(self, existing: list[dict] | None, new_data: list[dict], key_field: str) -> list[dict]:
-        """Merge existing and new data, avoiding duplicates based on a key field."""
+    def _merge_data(self, existing: list | None, new_data: list, key_field: str) -> list:
+        """Merge existing and new data (dicts or records), avoiding duplicates based on a key field."""
         if not existing:
             return new_data
 
+        def key(item):
+            return item[key_field] if isinstance(item, dict) else getattr(item, key_field)
+
         # Create a set of existing keys for O(1) lookup
-        existing_keys = {item[key_field] for item in existing}
+        existing_keys = {key(item) for item in existing}
 
         # Only add items that don't exist yet
         merged = existing.copy()
-        merged.extend([item for item in new_data if item[key_field] not in existing_keys])
+        merged.extend([item for item in new_data if key(item) not in existing_keys])
         return merged
 
-    def get_prices(self, ticker: str) -> list[dict[str, any]] | None:
+    def get_prices(self, ticker: str) -> list[PriceRecord] | None:
         """Get cached price data if available."""
         return self._prices_cache.get(ticker)
 
-    def set_prices(self, ticker: str, data: list[dict[str, any]]):
+    def set_prices(self, ticker: str, data: list[PriceRecord]):
         """Append new price data to cache."""
         self._prices_cache[ticker] = self._merge_data(self._prices_cache.get(ticker), data, key_field="time")
 
@@ -42,29 +63,87 @@ class Cache:
         return self._line_items_cache.get(ticker)
 
     def set_line_items(self, ticker: str, data: list[dict[str, any]]):
-        """Append new line items to cache."""
-        self._line_items_cache[ticker] = self._merge_data(self._line_items_cache.get(ticker), data, key_field="report_period")
-
-    def get_insider_trades(self, ticker: str) -> list[dict[str, any]] | None:
+        """Merge new line items into cache, combining fields reported for the same period."""
+        merged = {(item["report_period"], item["period"]): item for item in self._line_items_cache.get(ticker) or []}
+        for item in data:
+            key = (item["report_period"], item["period"])
+            merged[key] = {**merged.get(key, {}), **item}
+        self._line_items_cache[ticker] = list(merged.values())
+
+    def get_insider_trades(self, ticker: str) -> list[InsiderTradeRecord] | None:
         """Get cached insider trades if available."""
         return self._insider_trades_cache.get(ticker)
 
-    def set_insider_trades(self, ticker: str, data: list[dict[str, any]]):
+    def set_insider_trades(self, ticker: str, data: list[InsiderTradeRecord]):
         """Append new insider trades to cache."""
         self._insider_trades_cache[ticker] = self._merge_data(self._insider_trades_cache.get(ticker), data, key_field="filing_date")  # Could also use transaction_date if preferred
 
-    def get_company_news(self, ticker: str) -> list[dict[str, any]] | None:
+    def get_company_news(self, ticker: str) -> list[CompanyNewsRecord] | None:
         """Get cached company news if available."""
         return self._company_news_cache.get(ticker)
 
-    def set_company_news(self, ticker: str, data: list[dict[str, any]]):
+    def set_company_news(self, ticker: str, data: list[CompanyNewsRecord]):
         """Append new company news to cache."""
         self._company_news_cache[ticker] = self._merge_data(self._company_news_cache.get(ticker), data, key_field="date")
 
+    def export_snapshot(self, path: str):
+        """Write the cache and the refresh schedule to a single gzip-compressed JSON snapshot."""
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "financial_metrics": self._financial_metrics_cache,
+            "line_items": self._line_items_cache,
+            "refresh_schedule": get_refresh_planner().to_snapshot(),
+        }
+        for name, record_type in _RECORD_TYPES.items():
+            snapshot[name] = {
+                "fields": record_type._fields,
+                "rows": {ticker: [list(record) for record in records] for ticker, records in getattr(self, f"_{name}_cache").items()},
+            }
+
+        if directory := os.path.dirname(path):
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial snapshot
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def import_snapshot(self, path: str) -> bool:
+        """Merge a snapshot written by export_snapshot into the cache. Returns False if it is unusable."""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return False
+
+        for ticker, data in snapshot.get("financial_metrics", {}).items():
+            self.set_financial_metrics(ticker, data)
+        for ticker, data in snapshot.get("line_items", {}).items():
+            self.set_line_items(ticker, data)
+        for name, record_type in _RECORD_TYPES.items():
+            section = snapshot.get(name)
+            # Skip sections written with a different record layout
+            if not section or tuple(section["fields"]) != record_type._fields:
+                continue
+            setter = getattr(self, f"set_{name}")
+            for ticker, rows in section["rows"].items():
+                setter(ticker, [record_type(*row) for row in rows])
+
+        get_refresh_planner().load_snapshot(snapshot.get("refresh_schedule", {}))
+        return True
+
 
 # Global cache instance
 _cache = Cache()
 
+# Warm the cache from a snapshot baked into the image or mounted as a volume
+if (_snapshot_path := os.environ.get("CACHE_SNAPSHOT_PATH")) and os.path.exists(_snapshot_path):
+    try:
+        _cache.import_snapshot(_snapshot_path)
+    except (OSError, EOFError, ValueError) as e:
+        # A corrupt or truncated snapshot must not stop the app; drop anything merged before the error
+        print(f"Warning: ignoring cache snapshot {_snapshot_path}: {e}")
+        _cache = Cache()
+
 
 def get_cache() -> Cache:
     """Get the global cache instance."""
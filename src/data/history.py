@@ -0,0 +1,71 @@
+import datetime
+import math
+from collections import deque
+
+from data.models import PriceRecord
+from utils.indicators import IndicatorEngine
+
+# Trading days per calendar year, to turn a bar count into a date range
+TRADING_DAYS_PER_YEAR = 252
+# Slack for market holidays when converting bars to calendar days
+HOLIDAY_MARGIN_DAYS = 14
+
+
+def history_start(end_date: str, bars: int) -> str:
+    """Earliest calendar date whose daily bars through `end_date` include at least `bars` trading days."""
+    days = math.ceil(bars * 365 / TRADING_DAYS_PER_YEAR) + HOLIDAY_MARGIN_DAYS
+    return (datetime.date.fromisoformat(end_date[:10]) - datetime.timedelta(days=days)).isoformat()
+
+
+class PriceHistory:
+    """
+    Rolling window of each ticker's most recent `max_bars` daily bars.
+
+    The window is extended with new bars as they arrive and drops the oldest ones, so
+    indicators with long warm-ups see full windows without refetching the whole
+    history for every trading day. Every new bar is also folded into `indicators`,
+    which keeps the technical indicators up to date in O(1) per bar.
+    """
+
+    def __init__(self, max_bars: int):
+        self.max_bars = max_bars
+        self.indicators = IndicatorEngine()
+        self._bars: dict[str, deque[PriceRecord]] = {}
+        # ticker -> date through which the window holds every available bar
+        self._through: dict[str, str] = {}
+
+    def update(self, ticker: str, prices: list[PriceRecord], through: str):
+        """Append the bars newer than the window's last one, and mark it complete through `through`."""
+        bars = self._bars.get(ticker)
+        if bars is None:
+            bars = self._bars[ticker] = deque(maxlen=self.max_bars)
+        last_time = bars[-1].time if bars else None
+        new_bars = [price for price in sorted(prices, key=lambda price: price.time) if last_time is None or price.time > last_time]
+        bars.extend(new_bars)
+        self.indicators.update(ticker, new_bars)
+        self._through[ticker] = max(self._through.get(ticker, through), through)
+
+    def covers(self, ticker: str, end_date: str) -> bool:
+        """Whether the window holds every bar up to `end_date`."""
+        return self._through.get(ticker, "") >= end_date
+
+    def get(self, ticker: str, end_date: str) -> list[PriceRecord] | None:
+        """Bars up to `end_date`, oldest first, or None if the window is not complete through that date."""
+        if not self.covers(ticker, end_date):
+            return None
+        bars = self._bars[ticker]
+        if bars and bars[-1].time[:10] > end_date:
+            return [price for price in bars if price.time[:10] <= end_date]
+        return list(bars)
+
+    def get_indicators(self, ticker: str, end_date: str) -> dict[str, float] | None:
+        """
+        Latest indicator values as of `end_date`, or None if the window is not complete
+        through that date or already holds later bars.
+        """
+        if not self.covers(ticker, end_date):
+            return None
+        bars = self._bars[ticker]
+        if not bars or bars[-1].time[:10] > end_date:
+            return None
+        return self.indicators.get(ticker).values()
@@ -1,3 +1,4 @@
+from typing import NamedTuple
 from pydantic import BaseModel
 
 
@@ -10,6 +11,23 @@ class Price(BaseModel):
     time: str
 
 
+class PriceRecord(NamedTuple):
+    """Compact, unvalidated equivalent of Price for internal storage and agent consumption."""
+
+    open: float
+    close: float
+    high: float
+    low: float
+    volume: int
+    time: str
+
+    def model_dump(self) -> dict:
+        return self._asdict()
+
+    def to_model(self) -> Price:
+        return Price(**self._asdict())
+
+
 class PriceResponse(BaseModel):
     ticker: str
     prices: list[Price]
@@ -95,6 +113,30 @@ class InsiderTrade(BaseModel):
     filing_date: str
 
 
+class InsiderTradeRecord(NamedTuple):
+    """Compact, unvalidated equivalent of InsiderTrade for internal storage and agent consumption."""
+
+    ticker: str
+    issuer: str | None
+    name: str | None
+    title: str | None
+    is_board_director: bool | None
+    transaction_date: str | None
+    transaction_shares: float | None
+    transaction_price_per_share: float | None
+    transaction_value: float | None
+    shares_owned_before_transaction: float | None
+    shares_owned_after_transaction: float | None
+    security_title: str | None
+    filing_date: str
+
+    def model_dump(self) -> dict:
+        return self._asdict()
+
+    def to_model(self) -> InsiderTrade:
+        return InsiderTrade(**self._asdict())
+
+
 class InsiderTradeResponse(BaseModel):
     insider_trades: list[InsiderTrade]
 
@@ -109,6 +151,24 @@ class CompanyNews(BaseModel):
     sentiment: str | None = None
 
 
+class CompanyNewsRecord(NamedTuple):
+    """Compact, unvalidated equivalent of CompanyNews for internal storage and agent consumption."""
+
+    ticker: str
+    title: str
+    author: str
+    source: str
+    date: str
+    url: str
+    sentiment: str | None = None
+
+    def model_dump(self) -> dict:
+        return self._asdict()
+
+    def to_model(self) -> CompanyNews:
+        return CompanyNews(**self._asdict())
+
+
 class CompanyNewsResponse(BaseModel):
     news: list[CompanyNews]
 
@@ -0,0 +1,114 @@
+import datetime
+
+# Heuristic filing cadence used when no earnings calendar entry is known
+QUARTER_DAYS = 91
+# Earliest a 10-Q/10-K usually lands after the period it reports on closes
+MIN_FILING_LAG_DAYS = 20
+# How long to wait before re-checking a ticker whose expected filing is overdue
+RECHECK_DAYS = 7
+
+
+def _shift(date: str, days: int) -> str:
+    return (datetime.date.fromisoformat(date[:10]) + datetime.timedelta(days=days)).isoformat()
+
+
+# Data set of the quarterly financial metrics, fetched in full whatever the end date
+FINANCIAL_METRICS = "financial_metrics"
+
+
+def line_items_dataset(period: str, line_items: list[str]) -> str:
+    """Data set of one line-item request; requests for other periods or items are planned separately."""
+    return f"line_items:{period}:{','.join(sorted(line_items))}"
+
+
+class RefreshPlanner:
+    """Decides when a ticker's fundamentals may have changed and need to be refetched."""
+
+    def __init__(self):
+        # ticker -> data set -> {"last_report_period", "covered_through", "next_filing_date"}
+        self._schedule: dict[str, dict[str, dict[str, str | None]]] = {}
+        # ticker -> sorted upcoming earnings dates from the earnings calendar
+        self._earnings_dates: dict[str, list[str]] = {}
+
+    def add_earnings_dates(self, ticker: str, dates: list[str]):
+        """Record earnings announcement dates for a ticker, e.g. from FMP's earnings calendar."""
+        known = set(self._earnings_dates.get(ticker, []))
+        known.update(date[:10] for date in dates if date)
+        self._earnings_dates[ticker] = sorted(known)
+
+        # Tighten existing schedules if the calendar knows better than the heuristic
+        for entry in self._schedule.get(ticker, {}).values():
+            entry["next_filing_date"] = self._next_filing_date(ticker, entry["last_report_period"], entry["covered_through"])
+
+    def record_fetch(self, ticker: str, last_report_period: str | None, covered_through: str | None = None, dataset: str = FINANCIAL_METRICS):
+        """
+        Record that a data set was fetched for a ticker, and plan the next refresh.
+
+        `covered_through` is the date up to which the fetch returned every filing: the
+        requested end date, or today (the default) for fetches of the full history.
+        """
+        covered_through = covered_through or datetime.date.today().isoformat()
+        entry = self._schedule.get(ticker, {}).get(dataset)
+        if entry:
+            # The cache merges both fetches, so it covers the later of the two
+            if entry["last_report_period"] and (last_report_period is None or entry["last_report_period"] > last_report_period):
+                last_report_period = entry["last_report_period"]
+            covered_through = max(covered_through, entry["covered_through"])
+
+        self._schedule.setdefault(ticker, {})[dataset] = {
+            "last_report_period": last_report_period,
+            "covered_through": covered_through,
+            "next_filing_date": self._next_filing_date(ticker, last_report_period, covered_through),
+        }
+
+    def needs_refresh(self, ticker: str, as_of: str, dataset: str = FINANCIAL_METRICS) -> bool:
+        """Return True if the data set may be missing a filing made by `as_of` (YYYY-MM-DD)."""
+        entry = self._schedule.get(ticker, {}).get(dataset)
+        if entry is None:
+            return True
+        if as_of <= entry["covered_through"]:
+            # The fetch returned everything filed up to the date it covered
+            return False
+        return as_of >= entry["next_filing_date"]
+
+    def get_schedule(self, ticker: str, dataset: str = FINANCIAL_METRICS) -> dict[str, str | None] | None:
+        """Get the refresh schedule of a ticker's data set if one has been recorded."""
+        return self._schedule.get(ticker, {}).get(dataset)
+
+    def to_snapshot(self) -> dict:
+        """Serializable copy of the planner state, stored alongside cache snapshots."""
+        return {"schedule": self._schedule, "earnings_dates": self._earnings_dates}
+
+    def load_snapshot(self, snapshot: dict):
+        """Merge planner state from a snapshot, keeping newer local entries."""
+        for ticker, dates in snapshot.get("earnings_dates", {}).items():
+            self.add_earnings_dates(ticker, dates)
+        for ticker, datasets in snapshot.get("schedule", {}).items():
+            for dataset, entry in datasets.items():
+                current = self._schedule.get(ticker, {}).get(dataset)
+                if current is None or current["covered_through"] < entry["covered_through"]:
+                    self._schedule.setdefault(ticker, {})[dataset] = entry
+
+    def _next_filing_date(self, ticker: str, last_report_period: str | None, covered_through: str) -> str:
+        # Prefer the earnings calendar: the next announcement after the covered date is the next filing
+        for date in self._earnings_dates.get(ticker, []):
+            if date > covered_through:
+                return date
+
+        # Otherwise assume a quarterly cadence from the last reported period
+        if last_report_period:
+            expected = _shift(last_report_period, QUARTER_DAYS + MIN_FILING_LAG_DAYS)
+            if expected > covered_through:
+                return expected
+
+        # Filing is overdue or unknown; check again periodically
+        return _shift(covered_through, RECHECK_DAYS)
+
+
+# Global refresh planner instance
+_refresh_planner = RefreshPlanner()
+
+
+def get_refresh_planner() -> RefreshPlanner:
+    """Get the global refresh planner instance."""
+    return _refresh_planner
@@ -0,0 +1,151 @@
+"""Disk-backed cache of structured LLM responses."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Type
+
+from pydantic import BaseModel, ValidationError
+
+# LLM_CACHE_MODE values
+MODE_OFF = "off"
+MODE_READ_WRITE = "read_write"  # serve hits, store new responses
+MODE_READ_ONLY = "read_only"  # serve hits, never write
+MODE_REPLAY = "replay"  # serve hits, fail on a miss (e.g. for CI)
+MODES = (MODE_OFF, MODE_READ_WRITE, MODE_READ_ONLY, MODE_REPLAY)
+
+DEFAULT_CACHE_DIR = ".llm_cache"
+
+# Rough characters per token, for estimating the tokens a hit saved
+CHARS_PER_TOKEN = 4
+
+
+class LLMCacheMissError(RuntimeError):
+    """Raised in replay mode when a prompt has no cached response."""
+
+
+def _normalize_text(text: str) -> str:
+    # Line endings and trailing whitespace don't change what the model is asked
+    return "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").split("\n")).strip()
+
+
+def normalize_prompt(prompt: Any) -> list[dict[str, str]]:
+    """Reduce a prompt (string, prompt value or message list) to a list of role/content pairs."""
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, str):
+        return [{"role": "human", "content": _normalize_text(prompt)}]
+    return [{"role": message.type, "content": _normalize_text(str(message.content))} for message in prompt]
+
+
+class LLMCache:
+    """
+    Content-addressed store of structured LLM responses, one JSON file per response.
+
+    Entries are keyed by a SHA-256 of the model, the provider, the output schema and the
+    normalized prompt, so any change to the analysis data or the schema is a miss.
+    """
+
+    def __init__(self, mode: str = MODE_OFF, directory: str = DEFAULT_CACHE_DIR, ttl: float | None = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.directory = directory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMCache":
+        """Configure from LLM_CACHE_MODE, LLM_CACHE_DIR and LLM_CACHE_TTL (seconds)."""
+        ttl = os.environ.get("LLM_CACHE_TTL")
+        return cls(
+            mode=os.environ.get("LLM_CACHE_MODE", MODE_OFF).lower(),
+            directory=os.environ.get("LLM_CACHE_DIR", DEFAULT_CACHE_DIR),
+            ttl=float(ttl) if ttl else None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != MODE_OFF
+
+    def key(self, prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[BaseModel]) -> str:
+        payload = {
+            "model_name": model_name,
+            "model_provider": model_provider,
+            "schema": pydantic_model.model_json_schema(),
+            "prompt": normalize_prompt(prompt),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def get(self, key: str, pydantic_model: Type[BaseModel]) -> BaseModel | None:
+        """Get the cached response for `key`, or None on a miss. Raises LLMCacheMissError in replay mode."""
+        entry = self._read(key)
+        response = None
+        if entry is not None and (self.ttl is None or time.time() - entry["created_at"] <= self.ttl):
+            try:
+                response = pydantic_model.model_validate(entry["response"])
+            except ValidationError:
+                response = None
+
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.saved_tokens += entry["estimated_tokens"]
+
+        if response is None and self.mode == MODE_REPLAY:
+            raise LLMCacheMissError(f"No cached LLM response for {key} in replay mode")
+        return response
+
+    def put(self, key: str, prompt: Any, response: BaseModel):
+        """Store a response, unless the cache is read-only."""
+        if self.mode != MODE_READ_WRITE:
+            return
+        data = response.model_dump(mode="json")
+        prompt_chars = sum(len(message["content"]) for message in normalize_prompt(prompt))
+        entry = {
+            "created_at": time.time(),
+            "estimated_tokens": (prompt_chars + len(json.dumps(data))) // CHARS_PER_TOKEN,
+            "response": data,
+        }
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "saved_tokens": self.saved_tokens}
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return f"LLM cache ({self.mode}): {stats['hits']} hits, {stats['misses']} misses, ~{stats['saved_tokens']} tokens saved"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read(self, key: str) -> dict | None:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+# Global LLM cache instance
+_llm_cache = LLMCache.from_env()
+
+
+def get_llm_cache() -> LLMCache:
+    """Get the global LLM cache instance."""
+    return _llm_cache
@@ -0,0 +1,115 @@
+"""Latency tracking and the hedging policy for LLM requests."""
+
+import math
+import os
+import threading
+from collections import deque
+
+# Latencies kept per model to estimate its percentiles
+LATENCY_WINDOW = 200
+# Samples needed before the percentile is trusted; until then INITIAL_HEDGE_SECONDS applies
+MIN_SAMPLES = 20
+INITIAL_HEDGE_SECONDS = 20.0
+# Never hedge sooner than this, however fast the model usually is
+MIN_HEDGE_SECONDS = 1.0
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class HedgePolicy:
+    """
+    When to hedge an LLM request, and with which model.
+
+    A request that hasn't returned after the model's `percentile` latency gets a duplicate,
+    sent to `fallback_model` if one is configured, and the first response wins.
+    """
+
+    def __init__(self, percentile: float | None = None, fallback_model: str | None = None):
+        self.percentile = percentile
+        self.fallback_model = fallback_model
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        """Configure from LLM_HEDGE_PERCENTILE (e.g. 95; unset disables hedging) and LLM_HEDGE_MODEL."""
+        percentile = os.environ.get("LLM_HEDGE_PERCENTILE")
+        return cls(
+            percentile=float(percentile) if percentile else None,
+            fallback_model=os.environ.get("LLM_HEDGE_MODEL") or None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.percentile is not None
+
+
+class LatencyTracker:
+    """Rolling request latencies per model, plus call latencies and hedge counts per agent."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: dict[tuple[str, str], deque[float]] = {}
+        self._agents: dict[str, dict] = {}
+
+    def record_request(self, model_provider: str, model_name: str, seconds: float):
+        """Record how long one successful request to a model took."""
+        with self._lock:
+            self._models.setdefault((model_provider, model_name), deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def hedge_after(self, model_provider: str, model_name: str, percentile: float) -> float:
+        """Seconds after which a request to the model should be hedged."""
+        with self._lock:
+            latencies = list(self._models.get((model_provider, model_name), ()))
+        if len(latencies) < MIN_SAMPLES:
+            return INITIAL_HEDGE_SECONDS
+        return max(MIN_HEDGE_SECONDS, _percentile(latencies, percentile))
+
+    def record_call(self, agent_name: str | None, seconds: float, hedged: bool = False, hedge_won: bool = False):
+        """Record one call_llm for an agent: its end-to-end latency and whether it was hedged."""
+        with self._lock:
+            stats = self._agents.setdefault(agent_name or "unknown", {"latencies": deque(maxlen=LATENCY_WINDOW), "calls": 0, "hedged": 0, "hedge_wins": 0})
+            stats["latencies"].append(seconds)
+            stats["calls"] += 1
+            stats["hedged"] += hedged
+            stats["hedge_wins"] += hedge_won
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Tail latency and hedge rate per agent."""
+        with self._lock:
+            agents = {name: {**stats, "latencies": list(stats["latencies"])} for name, stats in self._agents.items()}
+        return {
+            name: {
+                "calls": stats["calls"],
+                "p50_seconds": _percentile(stats["latencies"], 50),
+                "p95_seconds": _percentile(stats["latencies"], 95),
+                "p99_seconds": _percentile(stats["latencies"], 99),
+                "hedge_rate": stats["hedged"] / stats["calls"],
+                "hedge_wins": stats["hedge_wins"],
+            }
+            for name, stats in agents.items()
+        }
+
+    def summary(self) -> str:
+        return "\n".join(
+            f"{name}: {stats['calls']} LLM calls, p50 {stats['p50_seconds']:.1f}s, p95 {stats['p95_seconds']:.1f}s, "
+            f"p99 {stats['p99_seconds']:.1f}s, {stats['hedge_rate']:.0%} hedged ({stats['hedge_wins']} won by the hedge)"
+            for name, stats in sorted(self.stats().items())
+        )
+
+
+# Global hedging policy and latency tracker instances
+_hedge_policy = HedgePolicy.from_env()
+_latency_tracker = LatencyTracker()
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """Get the global hedging policy."""
+    return _hedge_policy
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Get the global latency tracker."""
+    return _latency_tracker
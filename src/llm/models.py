@@ -1,4 +1,5 @@
 import os
+import threading
 from langchain_anthropic import ChatAnthropic
 from langchain_deepseek import ChatDeepSeek
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -177,7 +178,28 @@ def get_model_info(model_name: str) -> LLMModel | None:
     all_models = AVAILABLE_MODELS + OLLAMA_MODELS
     return next((model for model in all_models if model.model_name == model_name), None)
 
+# Ollama serves on its default local port
+OLLAMA_BASE_URL = "http://localhost:11434"
+
+# One client per (provider, model, base URL), so every agent and ticker shares its connection pool
+_models: dict[tuple[str, str, str | None], ChatOpenAI | ChatGroq | ChatOllama] = {}
+_models_lock = threading.Lock()
+
+
 def get_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | ChatGroq | ChatOllama | None:
+    """Get the chat model client for a model, created on first use and reused afterwards."""
+    provider = getattr(model_provider, "value", model_provider)
+    base_url = OLLAMA_BASE_URL if provider == ModelProvider.OLLAMA.value else None
+    key = (provider, model_name, base_url)
+    with _models_lock:
+        if (model := _models.get(key)) is None:
+            model = _create_model(model_name, model_provider, base_url)
+            if model is not None:
+                _models[key] = model
+        return model
+
+
+def _create_model(model_name: str, model_provider: ModelProvider, base_url: str | None) -> ChatOpenAI | ChatGroq | ChatOllama | None:
     if model_provider == ModelProvider.GROQ:
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
@@ -214,7 +236,6 @@ def get_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | Ch
     elif model_provider == ModelProvider.OLLAMA:
         # For Ollama, we use a base URL instead of an API key\
         # due to issues reading the environment variable correctly here.
-        base_url = "http://localhost:11434"
         return ChatOllama(
             model=model_name, 
             base_url=base_url,
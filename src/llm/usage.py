@@ -0,0 +1,154 @@
+"""Token and latency accounting for LLM calls."""
+
+import json
+import os
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable
+
+# Ticker (or comma-separated batch of tickers) being analyzed in the current context
+_current_ticker: ContextVar[str | None] = ContextVar("llm_ticker", default=None)
+
+# Counters summed when aggregating records
+_TOTALS = ("calls", "prompt_tokens", "completion_tokens", "cache_read_tokens", "cache_creation_tokens", "latency_seconds", "retries", "cache_hits", "hedged", "failed")
+
+
+def set_current_ticker(ticker: str | None):
+    """Tag LLM calls made from this context with `ticker`. Returns a token for reset_current_ticker."""
+    return _current_ticker.set(ticker)
+
+
+def reset_current_ticker(token):
+    _current_ticker.reset(token)
+
+
+def get_current_ticker() -> str | None:
+    return _current_ticker.get()
+
+
+class LLMCallRecord:
+    """Tokens, latency and outcome of one call_llm, across its retries and hedges."""
+
+    def __init__(self, agent_name: str | None, ticker: str | None, model_name: str, model_provider: str):
+        self.agent_name = agent_name
+        self.ticker = ticker
+        self.model_name = model_name
+        self.model_provider = model_provider
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_creation_tokens = 0
+        self.latency_seconds = 0.0
+        self.retries = 0
+        self.cache_hit = False
+        self.hedged = False
+        self.failed = False
+        self._lock = threading.Lock()
+
+    def add_usage(self, usage_metadata: dict | None, response_metadata: dict | None = None):
+        """
+        Add one response's token usage (LangChain's `usage_metadata`), if the provider reported it.
+        Prompt tokens served from the provider's prefix cache are counted in `cache_read_tokens` too.
+        """
+        if not usage_metadata:
+            return
+        details = usage_metadata.get("input_token_details") or {}
+        cache_read = details.get("cache_read")
+        if cache_read is None:
+            # DeepSeek reports its prefix cache hits only in the raw token usage
+            cache_read = ((response_metadata or {}).get("token_usage") or {}).get("prompt_cache_hit_tokens")
+        with self._lock:
+            self.prompt_tokens += usage_metadata.get("input_tokens", 0)
+            self.completion_tokens += usage_metadata.get("output_tokens", 0)
+            self.cache_read_tokens += cache_read or 0
+            self.cache_creation_tokens += details.get("cache_creation") or 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "agent": self.agent_name,
+            "ticker": self.ticker,
+            "model_name": self.model_name,
+            "model_provider": self.model_provider,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_creation_tokens": self.cache_creation_tokens,
+            "latency_seconds": round(self.latency_seconds, 3),
+            "retries": self.retries,
+            "cache_hit": self.cache_hit,
+            "hedged": self.hedged,
+            "failed": self.failed,
+        }
+
+
+def _aggregate(records: list[dict], key: Callable[[dict], Any]) -> dict[str, dict]:
+    groups = {}
+    for record in records:
+        totals = groups.setdefault(str(key(record)), dict.fromkeys(_TOTALS, 0))
+        totals["calls"] += 1
+        totals["prompt_tokens"] += record["prompt_tokens"]
+        totals["completion_tokens"] += record["completion_tokens"]
+        totals["cache_read_tokens"] += record["cache_read_tokens"]
+        totals["cache_creation_tokens"] += record["cache_creation_tokens"]
+        totals["latency_seconds"] += record["latency_seconds"]
+        totals["retries"] += record["retries"]
+        totals["cache_hits"] += record["cache_hit"]
+        totals["hedged"] += record["hedged"]
+        totals["failed"] += record["failed"]
+    for totals in groups.values():
+        totals["latency_seconds"] = round(totals["latency_seconds"], 3)
+    return groups
+
+
+class UsageTracker:
+    """Every call_llm of a run, aggregated per agent, ticker and model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: list[dict] = []
+
+    def record(self, record: LLMCallRecord):
+        with self._lock:
+            self._records.append(record.to_dict())
+
+    def records(self) -> list[dict]:
+        with self._lock:
+            return list(self._records)
+
+    def report(self) -> dict[str, Any]:
+        records = self.records()
+        return {
+            "totals": _aggregate(records, lambda record: "all").get("all", dict.fromkeys(_TOTALS, 0)),
+            "by_agent": _aggregate(records, lambda record: record["agent"]),
+            # Calls made outside a per-ticker analysis (e.g. the portfolio manager's) cover every ticker
+            "by_ticker": _aggregate(records, lambda record: record["ticker"] or "all"),
+            "by_model": _aggregate(records, lambda record: f"{record['model_provider']}:{record['model_name']}"),
+            "calls": records,
+        }
+
+    def summary(self) -> str:
+        """Per-agent totals, heaviest token users first."""
+        by_agent = self.report()["by_agent"]
+        lines = [f"{'Agent':<32}{'Calls':>7}{'Prompt tok':>12}{'Cache read':>12}{'Output tok':>12}{'Seconds':>10}{'Retries':>9}{'Cached':>8}"]
+        for agent, totals in sorted(by_agent.items(), key=lambda item: -(item[1]["prompt_tokens"] + item[1]["completion_tokens"])):
+            lines.append(
+                f"{agent:<32}{totals['calls']:>7}{totals['prompt_tokens']:>12}{totals['cache_read_tokens']:>12}{totals['completion_tokens']:>12}"
+                f"{totals['latency_seconds']:>10.1f}{totals['retries']:>9}{totals['cache_hits']:>8}"
+            )
+        return "\n".join(lines)
+
+    def write(self, path: str):
+        """Write the report, including every call, as JSON."""
+        if directory := os.path.dirname(path):
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+# Global usage tracker instance
+_usage_tracker = UsageTracker()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Get the global usage tracker instance."""
+    return _usage_tracker
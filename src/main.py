@@ -1,3 +1,4 @@
+import asyncio
 import sys
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
@@ -8,10 +9,18 @@ from agents.portfolio_manager import portfolio_management_agent
 from agents.risk_manager import risk_management_agent
 from graph.state import AgentState
 from utils.display import print_trading_output
-from utils.analysts import ANALYST_ORDER, get_analyst_nodes
+from utils.analysts import ANALYST_ORDER, get_analyst_nodes, get_data_requirements
 from utils.progress import progress
+from utils.concurrency import make_async_node, with_deadline
 from llm.models import LLM_ORDER, OLLAMA_LLM_ORDER, get_model_info, ModelProvider
 from utils.ollama import ensure_ollama_and_model
+from data.cache import get_cache
+from llm.cache import get_llm_cache
+from llm.hedging import get_hedge_policy, get_latency_tracker
+from llm.usage import get_usage_tracker
+from utils.llm import get_llm_scheduler
+from data.history import PriceHistory
+from tools.data_context import build_data_context
 
 import argparse
 from datetime import datetime
@@ -51,6 +60,10 @@ def run_hedge_fund(
     selected_analysts: list[str] = [],
     model_name: str = "gpt-4o",
     model_provider: str = "OpenAI",
+    analyst_deadline: float | None = None,
+    price_history: PriceHistory | None = None,
+    llm_batch_size: int | None = None,
+    no_llm: bool = False,
 ):
     # Start progress tracking
     progress.start()
@@ -63,26 +76,17 @@ def run_hedge_fund(
         else:
             agent = app
 
+        # Fetch the union of every analyst's data once, shared by all agents in the run
+        data_context = build_data_context(
+            tickers,
+            start_date,
+            end_date,
+            get_data_requirements(selected_analysts or [value for _, value in ANALYST_ORDER]),
+            price_history,
+        )
+
         final_state = agent.invoke(
-            {
-                "messages": [
-                    HumanMessage(
-                        content="Make trading decisions based on the provided data.",
-                    )
-                ],
-                "data": {
-                    "tickers": tickers,
-                    "portfolio": portfolio,
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "analyst_signals": {},
-                },
-                "metadata": {
-                    "show_reasoning": show_reasoning,
-                    "model_name": model_name,
-                    "model_provider": model_provider,
-                },
-            },
+            create_initial_state(tickers, start_date, end_date, portfolio, data_context, show_reasoning, model_name, model_provider, analyst_deadline, llm_batch_size, no_llm),
         )
 
         return {
@@ -94,16 +98,87 @@ def run_hedge_fund(
         progress.stop()
 
 
+async def run_hedge_fund_async(
+    tickers: list[str],
+    start_date: str,
+    end_date: str,
+    portfolio: dict,
+    show_reasoning: bool = False,
+    selected_analysts: list[str] = [],
+    model_name: str = "gpt-4o",
+    model_provider: str = "OpenAI",
+    analyst_deadline: float | None = None,
+    price_history: PriceHistory | None = None,
+    llm_batch_size: int | None = None,
+    no_llm: bool = False,
+):
+    """Run the hedge fund with async graph nodes, so every node's LLM calls overlap on one event loop."""
+    progress.start()
+
+    try:
+        agent = create_workflow(selected_analysts or None, use_async=True).compile()
+
+        data_context = await asyncio.to_thread(
+            build_data_context,
+            tickers,
+            start_date,
+            end_date,
+            get_data_requirements(selected_analysts or [value for _, value in ANALYST_ORDER]),
+            price_history,
+        )
+
+        final_state = await agent.ainvoke(
+            create_initial_state(tickers, start_date, end_date, portfolio, data_context, show_reasoning, model_name, model_provider, analyst_deadline, llm_batch_size, no_llm),
+        )
+
+        return {
+            "decisions": parse_hedge_fund_response(final_state["messages"][-1].content),
+            "analyst_signals": final_state["data"]["analyst_signals"],
+        }
+    finally:
+        progress.stop()
+
+
+def create_initial_state(tickers, start_date, end_date, portfolio, data_context, show_reasoning, model_name, model_provider, analyst_deadline=None, llm_batch_size=None, no_llm=False) -> AgentState:
+    """Build the graph input shared by the sync and async runners."""
+    return {
+        "messages": [
+            HumanMessage(
+                content="Make trading decisions based on the provided data.",
+            )
+        ],
+        "data": {
+            "tickers": tickers,
+            "portfolio": portfolio,
+            "start_date": start_date,
+            "end_date": end_date,
+            "analyst_signals": {},
+            "data_context": data_context,
+        },
+        "metadata": {
+            "show_reasoning": show_reasoning,
+            "model_name": model_name,
+            "model_provider": model_provider,
+            "analyst_deadline": analyst_deadline,
+            "llm_batch_size": llm_batch_size,
+            "no_llm": no_llm,
+        },
+    }
+
+
 def start(state: AgentState):
     """Initialize the workflow with the input message."""
     return state
 
 
-def create_workflow(selected_analysts=None):
-    """Create the workflow with selected analysts."""
+def create_workflow(selected_analysts=None, use_async=False):
+    """Create the workflow with selected analysts, optionally with async nodes for ainvoke."""
     workflow = StateGraph(AgentState)
     workflow.add_node("start_node", start)
 
+    # Async nodes run each agent in a worker thread and await its LLM calls on the graph's loop
+    wrap = make_async_node if use_async else (lambda node_func: node_func)
+
     # Get analyst nodes from the configuration
     analyst_nodes = get_analyst_nodes()
 
@@ -113,12 +188,12 @@ def create_workflow(selected_analysts=None):
     # Add selected analyst nodes
     for analyst_key in selected_analysts:
         node_name, node_func = analyst_nodes[analyst_key]
-        workflow.add_node(node_name, node_func)
+        workflow.add_node(node_name, wrap(with_deadline(node_name, node_func)))
         workflow.add_edge("start_node", node_name)
 
     # Always add risk and portfolio management
-    workflow.add_node("risk_management_agent", risk_management_agent)
-    workflow.add_node("portfolio_management_agent", portfolio_management_agent)
+    workflow.add_node("risk_management_agent", wrap(risk_management_agent))
+    workflow.add_node("portfolio_management_agent", wrap(portfolio_management_agent))
 
     # Connect selected analysts to risk management
     for analyst_key in selected_analysts:
@@ -148,6 +223,12 @@ if __name__ == "__main__":
     parser.add_argument("--ollama", action="store_true", help="Use Ollama for local LLM inference")
     parser.add_argument("--all-analysts", action="store_true", help="Use all analysts instead of selecting")
     parser.add_argument("--model", type=str, help="Use a specific model for the hedge fund")
+    parser.add_argument("--async-graph", action="store_true", help="Run the agent graph with async nodes so LLM calls overlap on one event loop")
+    parser.add_argument("--analyst-deadline", type=float, help="Seconds each analyst may take before the run continues with the signals that are ready")
+    parser.add_argument("--llm-batch-size", type=int, help="Ask persona agents for up to this many tickers' signals per LLM call")
+    parser.add_argument("--no-llm", action="store_true", help="Skip the LLM: persona and portfolio decisions come from the agents' own scores")
+    parser.add_argument("--export-cache", type=str, help="Write a cache snapshot to this path after the run")
+    parser.add_argument("--usage-report", type=str, help="Write per-call LLM token and latency usage as JSON to this path")
 
     args = parser.parse_args()
 
@@ -199,7 +280,9 @@ if __name__ == "__main__":
     model_choice = None
     model_provider = None
 
-    if args.ollama:
+    if args.no_llm:
+        print(f"{Fore.CYAN}Running without LLM calls: signals and decisions are rule-based.{Style.RESET_ALL}\n")
+    elif args.ollama:
         print(f"{Fore.CYAN}Using Ollama for local LLM inference.{Style.RESET_ALL}")
         if args.model:
             model_choice = args.model
@@ -317,7 +400,7 @@ if __name__ == "__main__":
     }
 
     # Run the hedge fund
-    result = run_hedge_fund(
+    run_kwargs = dict(
         tickers=tickers,
         start_date=start_date,
         end_date=end_date,
@@ -326,5 +409,26 @@ if __name__ == "__main__":
         selected_analysts=selected_analysts,
         model_name=model_choice,
         model_provider=model_provider,
+        analyst_deadline=args.analyst_deadline,
+        llm_batch_size=args.llm_batch_size,
+        no_llm=args.no_llm,
     )
+    if args.async_graph:
+        result = asyncio.run(run_hedge_fund_async(**run_kwargs))
+    else:
+        result = run_hedge_fund(**run_kwargs)
     print_trading_output(result)
+
+    if get_llm_cache().enabled:
+        print(get_llm_cache().summary())
+    if scheduler_summary := get_llm_scheduler().summary():
+        print(scheduler_summary)
+    if get_hedge_policy().enabled:
+        print(get_latency_tracker().summary())
+    if get_usage_tracker().records():
+        print(get_usage_tracker().summary())
+    if args.usage_report:
+        get_usage_tracker().write(args.usage_report)
+
+    if args.export_cache:
+        get_cache().export_snapshot(args.export_cache)
@@ -1,9 +1,14 @@
 import fmpsdk
 import enum
 from tqdm import tqdm
-from datetime import datetime
+from datetime import datetime, timedelta
 
 class FMP:
+    # Most symbols FMP accepts in one multi-symbol request
+    PRICE_BATCH_SIZE = 5
+    # Longest date range the earnings calendar returns in one request
+    EARNINGS_CALENDAR_DAYS = 90
+
     def __init__(self, api_key):
         self.api_key = api_key
 
@@ -39,18 +44,82 @@ class FMP:
         prices = self.handle_request(func, args)
         return prices
 
-    def insider_trading(self, symbol):
+    def historical_prices_batch(self, symbols, _from, to):
+        """
+        Fetch daily prices for up to PRICE_BATCH_SIZE symbols in a single request.
+
+        Returns a dict of symbol -> list of price rows, in the same row format as
+        historical_prices_raw. Symbols without data map to an empty list.
+        """
+        args = {"apikey": self.api_key, "symbol": list(symbols), "from_date": _from.strftime("%Y-%m-%d"), "to_date": to.strftime("%Y-%m-%d")}
+        func = fmpsdk.historical_price_full
+        response = self.handle_request(func, args)
+
+        prices = {symbol: [] for symbol in symbols}
+        if isinstance(response, dict):
+            # Multi-symbol responses are wrapped in historicalStockList, single ones are not
+            for entry in response.get("historicalStockList", [response]):
+                if entry.get("symbol") in prices:
+                    prices[entry["symbol"]] = entry.get("historical", [])
+        else:
+            for row in response or []:
+                if row.get("symbol") in prices:
+                    prices[row["symbol"]].append(row)
+        return prices
+
+    def iterate_pages(self, func, args, stop=None, max_records=None):
+        """
+        Lazily yield records from a paginated endpoint, one page at a time.
+
+        Pages are requested only as the caller consumes records. Paging ends on an
+        empty or short page, once `max_records` records have been yielded, or once
+        `stop(record)` is true for the last record of a page. FMP returns these
+        endpoints newest first, so checking the oldest record of each page lets the
+        caller stop as soon as a page reaches past the date window it cares about.
+        """
+        page = 0
+        yielded = 0
+        page_size = args.get("limit")
+        while True:
+            records = self.handle_request(func, {**args, "page": page})
+            if not records:
+                return
+            for record in records:
+                yield record
+                yielded += 1
+                if max_records is not None and yielded >= max_records:
+                    return
+            if stop is not None and stop(records[-1]):
+                return
+            if page_size is not None and len(records) < page_size:
+                return
+            page += 1
+
+    def insider_trading(self, symbol, since=None, max_records=None):
+        """Stream insider trades, newest first, stopping once trades predate `since` (YYYY-MM-DD)."""
         args = {"apikey": self.api_key, "symbol": symbol, "limit": 1000}
-        iterable_args = {"func": fmpsdk.insider_trading, "args": args}
-        func = fmpsdk.iterate_over_pages
-        return self.handle_request(func, iterable_args)
-    
-    def company_news(self, symbol, _from=datetime(2024, 1, 1), to=datetime.now()):
-        args = {"apikey": self.api_key, "symbols": symbol, "from_date": _from.strftime("%Y-%m-%d"), "to_date": to.strftime("%Y-%m-%d"), "limit": 250}
-        iterable_args = {"func": fmpsdk.company_news, "args": args}
-        func = fmpsdk.iterate_over_pages
-        return self.handle_request(func, iterable_args)
+        stop = None
+        if since is not None:
+            stop = lambda trade: (trade.get("transactionDate") or trade.get("filingDate") or "")[:10] < since
+        return self.iterate_pages(fmpsdk.insider_trading, args, stop=stop, max_records=max_records)
+
+    def company_news(self, symbol, _from=datetime(2024, 1, 1), to=datetime.now(), max_records=None):
+        """Stream company news between `_from` and `to`, newest first."""
+        since = _from.strftime("%Y-%m-%d")
+        args = {"apikey": self.api_key, "symbols": symbol, "from_date": since, "to_date": to.strftime("%Y-%m-%d"), "limit": 250}
+        stop = lambda item: (item.get("publishedDate") or "")[:10] < since
+        return self.iterate_pages(fmpsdk.company_news, args, stop=stop, max_records=max_records)
     
+    def earnings_calendar(self, _from, to):
+        """Earnings announcements for all companies between `_from` and `to`, requested in EARNINGS_CALENDAR_DAYS windows."""
+        entries = []
+        while _from <= to:
+            window_end = min(to, _from + timedelta(days=self.EARNINGS_CALENDAR_DAYS - 1))
+            args = {"apikey": self.api_key, "from_date": _from.strftime("%Y-%m-%d"), "to_date": window_end.strftime("%Y-%m-%d")}
+            entries.extend(self.handle_request(fmpsdk.earning_calendar, args) or [])
+            _from = window_end + timedelta(days=1)
+        return entries
+
     def financial_ratios(self, symbol, period="annual"):
         args = {"apikey": self.api_key, "symbol": symbol, "period": period, "limit": 1000}
         func = fmpsdk.financial_ratios
@@ -9,29 +9,45 @@ import pandas as pd
 import requests
 from dotenv import load_dotenv
 from data.cache import get_cache
+from data.refresh import QUARTER_DAYS, get_refresh_planner, line_items_dataset
 from data.models import (
-    CompanyNews,
+    CompanyNewsRecord,
     FinancialMetrics,
-    Price,
-    PriceResponse,
+    PriceRecord,
     LineItem,
     LineItemResponse,
-    InsiderTrade,
+    InsiderTradeRecord,
 )
 
 load_dotenv()
 
 # Global cache instance
 _cache = get_cache()
+# Global refresh planner deciding when cached fundamentals may be stale
+_refresh_planner = get_refresh_planner()
+# (start date, end date, tickers or None for all) of the earnings calendar ranges already loaded
+_earnings_calendar_ranges: list[tuple[str, str, frozenset | None]] = []
 fmp = FMP(os.environ.get("FINANCIAL_MODELING_PREP_API_KEY"))
 
 
-def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+def _price_record(price_data: dict) -> PriceRecord:
+    """Convert an FMP price row into a compact price record."""
+    return PriceRecord(
+        open=float(price_data['open']),
+        close=float(price_data['close']),
+        high=float(price_data['high']),
+        low=float(price_data['low']),
+        volume=int(price_data['volume']),
+        time=price_data['date'],
+    )
+
+
+def get_prices(ticker: str, start_date: str, end_date: str) -> list[PriceRecord]:
     """Fetch price data from cache or API."""
     # Check cache first
     if cached_data := _cache.get_prices(ticker):
-        # Filter cached data by date range and convert to Price objects
-        filtered_data = [Price(**price) for price in cached_data if start_date <= price["time"] <= end_date]
+        # Filter cached data by date range
+        filtered_data = [price for price in cached_data if start_date <= price.time <= end_date]
         if filtered_data:
             return filtered_data
     
@@ -39,32 +55,44 @@ def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
     end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d")
     response = fmp.historical_prices_raw(ticker, start_date, end_date)
 
-    # Parse response with Pydantic model
-    # Convert the response to a list of Price objects
-    prices = []
-    for price_data in response:
-        price = Price(
-            open=price_data['open'],
-            close=price_data['close'],
-            high=price_data['high'],
-            low=price_data['low'],
-            volume=price_data['volume'],
-            time=price_data['date']
-        )
-        prices.append(price)
-    
-    # Create PriceResponse object
-    price_response = PriceResponse(ticker=ticker, prices=prices)
-    prices = price_response.prices
+    # Convert the response to a list of price records
+    prices = [_price_record(price_data) for price_data in response]
 
     if not prices:
         return []
 
-    # Cache the results as dicts
-    _cache.set_prices(ticker, [p.model_dump() for p in prices])
+    # Cache the records
+    _cache.set_prices(ticker, prices)
     return prices
 
 
+def get_prices_batch(tickers: list[str], start_date: str, end_date: str) -> dict[str, list[PriceRecord]]:
+    """Fetch price data for many tickers, batching cache misses into multi-symbol requests."""
+    results = {}
+    missing = []
+    for ticker in tickers:
+        if cached_data := _cache.get_prices(ticker):
+            filtered_data = [price for price in cached_data if start_date <= price.time <= end_date]
+            if filtered_data:
+                results[ticker] = filtered_data
+                continue
+        missing.append(ticker)
+
+    _from = datetime.datetime.strptime(start_date, "%Y-%m-%d")
+    to = datetime.datetime.strptime(end_date, "%Y-%m-%d")
+    for i in range(0, len(missing), fmp.PRICE_BATCH_SIZE):
+        batch = missing[i : i + fmp.PRICE_BATCH_SIZE]
+        response = fmp.historical_prices_batch(batch, _from, to)
+        for ticker in batch:
+            prices = [_price_record(price_data) for price_data in response.get(ticker, [])]
+            results[ticker] = prices
+            if prices:
+                # Cache the results per ticker so get_prices is served from cache
+                _cache.set_prices(ticker, prices)
+
+    return results
+
+
 def get_financial_metrics(
     ticker: str,
     end_date: str,
@@ -72,8 +100,8 @@ def get_financial_metrics(
     limit: int = 10,
 ) -> list[FinancialMetrics]:
     """Fetch financial metrics from cache or API."""
-    # Check cache first
-    if cached_data := _cache.get_financial_metrics(ticker):
+    # Check cache first, unless a new filing may have landed since it was filled
+    if (cached_data := _cache.get_financial_metrics(ticker)) and not _refresh_planner.needs_refresh(ticker, end_date):
         # Filter cached data by date and limit
         filtered_data = [FinancialMetrics(**metric) for metric in cached_data if metric["report_period"] <= end_date]
         filtered_data.sort(key=lambda x: x.report_period, reverse=True)
@@ -114,6 +142,9 @@ def get_financial_metrics(
             # Update the existing entry with income statement data
             merged_data[date].update(statement)
 
+    # Plan the next refetch from the latest period the provider knows about
+    _refresh_planner.record_fetch(ticker, max(merged_data.keys(), default=None))
+
     # Convert back to list
     merged_data = list(merged_data.values())
     df = pd.DataFrame(merged_data)
@@ -198,7 +229,16 @@ def search_line_items(
     period: str = "ttm",
     limit: int = 10,
 ) -> list[LineItem]:
-    """Fetch line items from API."""
+    """Fetch line items from cache or API."""
+    dataset = line_items_dataset(period, line_items)
+    # Check cache first, unless a new filing may have landed since it was filled
+    if (cached_data := _cache.get_line_items(ticker)) and not _refresh_planner.needs_refresh(ticker, end_date, dataset):
+        filtered_data = [LineItem(**item) for item in cached_data if item["period"] == period and item["report_period"] <= end_date and all(line_item in item for line_item in line_items)]
+        filtered_data.sort(key=lambda x: x.report_period, reverse=True)
+        # A fetch at a later end date may hold fewer than `limit` periods before this one
+        if len(filtered_data) >= limit:
+            return filtered_data[:limit]
+
     # If not in cache or insufficient data, fetch from API
     headers = {}
     if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
@@ -223,56 +263,98 @@ def search_line_items(
         return []
 
     # Cache the results
+    _cache.set_line_items(ticker, [item.model_dump() for item in search_results])
+    # The response holds the newest periods up to end_date, not filings made since
+    _refresh_planner.record_fetch(ticker, max(item.report_period for item in search_results), end_date, dataset)
     return search_results[:limit]
 
 
+def _earnings_calendar_loaded(start_date: str, end_date: str, symbols: frozenset | None) -> bool:
+    for start, end, loaded in _earnings_calendar_ranges:
+        if start <= start_date and end_date <= end and (loaded is None or (symbols is not None and symbols <= loaded)):
+            return True
+    return False
+
+
+def load_earnings_calendar(start_date: str, end_date: str, tickers: list[str] | None = None):
+    """
+    Feed earnings dates between `start_date` and a quarter after `end_date` into the refresh
+    planner, so the next filing after the last day is known too.
+
+    Ranges already loaded for the same tickers are skipped, so this is cheap to call per run.
+    """
+    to = datetime.datetime.strptime(end_date, "%Y-%m-%d") + datetime.timedelta(days=QUARTER_DAYS)
+    to_date = to.strftime("%Y-%m-%d")
+    symbols = frozenset(tickers) if tickers is not None else None
+    if _earnings_calendar_loaded(start_date, to_date, symbols):
+        return
+
+    try:
+        entries = fmp.earnings_calendar(datetime.datetime.strptime(start_date, "%Y-%m-%d"), to)
+    except Exception as e:
+        # The planner falls back to its filing-date heuristic
+        print(f"Warning: could not load the earnings calendar: {e}")
+        return
+
+    dates_by_ticker = {}
+    for entry in entries:
+        symbol = entry.get("symbol")
+        if symbol and (symbols is None or symbol in symbols):
+            dates_by_ticker.setdefault(symbol, []).append(entry.get("date"))
+
+    for ticker, dates in dates_by_ticker.items():
+        _refresh_planner.add_earnings_dates(ticker, dates)
+    _earnings_calendar_ranges.append((start_date, to_date, symbols))
+
+
 def get_insider_trades(
     ticker: str,
     end_date: str,
     start_date: str | None = None,
     limit: int = 1000,
-) -> list[InsiderTrade]:
+) -> list[InsiderTradeRecord]:
     """Fetch insider trades from cache or API."""
     # Check cache first
     if cached_data := _cache.get_insider_trades(ticker):
         # Filter cached data by date range
-        filtered_data = [InsiderTrade(**trade) for trade in cached_data 
-                        if (start_date is None or (trade.get("transaction_date") or trade["filing_date"]) >= start_date)
-                        and (trade.get("transaction_date") or trade["filing_date"]) <= end_date]
+        filtered_data = [trade for trade in cached_data 
+                        if (start_date is None or (trade.transaction_date or trade.filing_date) >= start_date)
+                        and (trade.transaction_date or trade.filing_date) <= end_date]
         filtered_data.sort(key=lambda x: x.transaction_date or x.filing_date, reverse=True)
         if filtered_data:
             return filtered_data
 
 
-    insider_trades = fmp.insider_trading(ticker)
-    df = pd.DataFrame(insider_trades)
-    df = df.sort_values(by='transactionDate', ascending=False)
-    df = df[df['transactionDate'] >= start_date]
-    df = df[df['transactionDate'] <= end_date]
-    
+    # Stream trades newest first; paging stops once a page reaches past start_date
     all_trades = []
-    for index, row in df.iterrows():
-        all_trades.append(InsiderTrade(
+    for trade in fmp.insider_trading(ticker, since=start_date):
+        trade_date = (trade.get("transactionDate") or trade["filingDate"])[:10]
+        if trade_date > end_date or (start_date is not None and trade_date < start_date):
+            continue
+        all_trades.append(InsiderTradeRecord(
             ticker=ticker,
             issuer=None,
-            name=row['reportingName'],
-            title=row['typeOfOwner'],
-            is_board_director=row['typeOfOwner'] == 'director',
-            transaction_date=row['transactionDate'],
-            transaction_shares=row['securitiesTransacted'],
-            transaction_price_per_share=row['price'],
-            transaction_value=row['securitiesTransacted'] * row['price'],
-            shares_owned_before_transaction=row['securitiesOwned'],
-            shares_owned_after_transaction=row['securitiesOwned'] - row['securitiesTransacted'] if row['acquisitionOrDisposition'] == "D" else row['securitiesOwned'] + row['securitiesTransacted'],
-            security_title=row['securityName'],
-            filing_date=row['filingDate'],
+            name=trade['reportingName'],
+            title=trade['typeOfOwner'],
+            is_board_director=trade['typeOfOwner'] == 'director',
+            transaction_date=trade['transactionDate'],
+            transaction_shares=trade['securitiesTransacted'],
+            transaction_price_per_share=trade['price'],
+            transaction_value=trade['securitiesTransacted'] * trade['price'],
+            shares_owned_before_transaction=trade['securitiesOwned'],
+            shares_owned_after_transaction=trade['securitiesOwned'] - trade['securitiesTransacted'] if trade['acquisitionOrDisposition'] == "D" else trade['securitiesOwned'] + trade['securitiesTransacted'],
+            security_title=trade['securityName'],
+            filing_date=trade['filingDate'],
         ))
+        if len(all_trades) >= limit:
+            break
+    all_trades.sort(key=lambda x: x.transaction_date or x.filing_date, reverse=True)
 
     if not all_trades:
         return []
     
     # Cache the results
-    _cache.set_insider_trades(ticker, [trade.model_dump() for trade in all_trades])
+    _cache.set_insider_trades(ticker, all_trades)
     return all_trades
 
 
@@ -281,14 +363,14 @@ def get_company_news(
     end_date: str,
     start_date: str | None = None,
     limit: int = 1000,
-) -> list[CompanyNews]:
+) -> list[CompanyNewsRecord]:
     """Fetch company news from cache or API."""
     # Check cache first
     if cached_data := _cache.get_company_news(ticker):
         # Filter cached data by date range
-        filtered_data = [CompanyNews(**news) for news in cached_data 
-                        if (start_date is None or news["date"] >= start_date)
-                        and news["date"] <= end_date]
+        filtered_data = [news for news in cached_data 
+                        if (start_date is None or news.date >= start_date)
+                        and news.date <= end_date]
         filtered_data.sort(key=lambda x: x.date, reverse=True)
         if filtered_data:
             return filtered_data
@@ -296,14 +378,14 @@ def get_company_news(
     
     end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d")
     if start_date is None:
-        news = fmp.company_news([ticker], to=end_date)
+        news = fmp.company_news([ticker], to=end_date, max_records=limit)
     else:
         start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d")
-        news = fmp.company_news([ticker], _from=start_date, to=end_date)
+        news = fmp.company_news([ticker], _from=start_date, to=end_date, max_records=limit)
     
     company_news = []
     for item in news:
-        company_news.append(CompanyNews(
+        company_news.append(CompanyNewsRecord(
             ticker=ticker,
             title=item.get('title', ''),
             author=item.get('publisher', ''),
@@ -317,7 +399,7 @@ def get_company_news(
         return []
 
     # Cache the results
-    _cache.set_company_news(ticker, [news.model_dump() for news in company_news])
+    _cache.set_company_news(ticker, company_news)
     return company_news
 
 
@@ -348,9 +430,9 @@ def get_market_cap(
     return market_cap
 
 
-def prices_to_df(prices: list[Price]) -> pd.DataFrame:
+def prices_to_df(prices: list[PriceRecord]) -> pd.DataFrame:
     """Convert prices to a DataFrame."""
-    df = pd.DataFrame([p.model_dump() for p in prices])
+    df = pd.DataFrame.from_records(prices, columns=PriceRecord._fields)
     df["Date"] = pd.to_datetime(df["time"])
     df.set_index("Date", inplace=True)
     numeric_cols = ["open", "close", "high", "low", "volume"]
@@ -0,0 +1,228 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from data.history import PriceHistory, history_start
+from data.models import LineItem
+from tools.api import (
+    get_company_news,
+    get_financial_metrics,
+    get_insider_trades,
+    get_market_cap,
+    get_prices,
+    load_earnings_calendar,
+    search_line_items,
+)
+
+
+def _lookback_start(end_date: str, lookback_days: int | None) -> str | None:
+    if lookback_days is None:
+        return None
+    return (datetime.date.fromisoformat(end_date) - datetime.timedelta(days=lookback_days)).isoformat()
+
+
+def _earliest(a: str | None, b: str | None) -> str | None:
+    # None means "no lower bound", which covers any bounded window
+    if a is None or b is None:
+        return None
+    return min(a, b)
+
+
+class DataContext:
+    """
+    Per-run store of ticker data shared by every analyst.
+
+    `prefetch` resolves the union of the selected analysts' data requirements once per
+    ticker, in parallel. Agents then read their slice through methods that mirror
+    tools.api. Anything the context does not hold, such as a different end date or a
+    wider window, falls through to tools.api.
+
+    Indicator warm-up prices come from a rolling `PriceHistory`. A backtest passes in one
+    that it extends day by day; otherwise the context fills its own at prefetch time.
+    """
+
+    def __init__(self, tickers: list[str], start_date: str, end_date: str, price_history: PriceHistory | None = None):
+        self.tickers = tickers
+        self.start_date = start_date
+        self.end_date = end_date
+        self.price_history = price_history
+        # Union of requirements: limits, period -> (line items, limit), and (start_date, limit) windows
+        self._metrics_limit = 0
+        self._line_item_requests: dict[str, tuple[set[str], int]] = {}
+        self._insider_window: tuple[str | None, int] | None = None
+        self._news_window: tuple[str | None, int] | None = None
+        self._needs_market_cap = False
+        self._needs_prices = False
+        self._history_bars = 0
+        # Resolved data, keyed by ticker (and period for line items)
+        self._financial_metrics: dict[str, list] = {}
+        self._line_items: dict[tuple[str, str], list[LineItem]] = {}
+        self._insider_trades: dict[str, list] = {}
+        self._company_news: dict[str, list] = {}
+        self._market_caps: dict[str, float | None] = {}
+        self._prices: dict[str, list] = {}
+
+    def add_requirements(self, requirements: dict):
+        """Merge one analyst's declared data requirements into the union."""
+        if metrics := requirements.get("financial_metrics"):
+            # get_financial_metrics returns the same quarterly metrics whatever the period
+            self._metrics_limit = max(self._metrics_limit, metrics.get("limit", 10))
+
+        if line_items := requirements.get("line_items"):
+            period = line_items.get("period", "ttm")
+            items, limit = self._line_item_requests.get(period, (set(), 0))
+            self._line_item_requests[period] = (items | set(line_items["items"]), max(limit, line_items.get("limit", 10)))
+
+        if insider := requirements.get("insider_trades"):
+            start = _lookback_start(self.end_date, insider.get("lookback_days"))
+            limit = insider.get("limit", 1000)
+            if self._insider_window is None:
+                self._insider_window = (start, limit)
+            else:
+                self._insider_window = (_earliest(self._insider_window[0], start), max(self._insider_window[1], limit))
+
+        if news := requirements.get("company_news"):
+            start = _lookback_start(self.end_date, news.get("lookback_days"))
+            limit = news.get("limit", 1000)
+            if self._news_window is None:
+                self._news_window = (start, limit)
+            else:
+                self._news_window = (_earliest(self._news_window[0], start), max(self._news_window[1], limit))
+
+        self._needs_market_cap |= bool(requirements.get("market_cap"))
+        self._needs_prices |= bool(requirements.get("prices"))
+        if history := requirements.get("price_history"):
+            self._history_bars = max(self._history_bars, history["bars"])
+
+    def prefetch(self, max_workers: int = 8):
+        """Fetch every required data set for every ticker in parallel."""
+        tasks = []
+        for ticker in self.tickers:
+            if self._metrics_limit:
+                tasks.append((self._financial_metrics, ticker, get_financial_metrics, (ticker, self.end_date, "ttm", self._metrics_limit)))
+            for period, (items, limit) in self._line_item_requests.items():
+                # One combined request per (ticker, period) covers every analyst's subset
+                tasks.append((self._line_items, (ticker, period), search_line_items, (ticker, sorted(items), self.end_date, period, limit)))
+            if self._insider_window:
+                start, limit = self._insider_window
+                tasks.append((self._insider_trades, ticker, get_insider_trades, (ticker, self.end_date, start, limit)))
+            if self._news_window:
+                start, limit = self._news_window
+                tasks.append((self._company_news, ticker, get_company_news, (ticker, self.end_date, start, limit)))
+            if self._needs_market_cap:
+                tasks.append((self._market_caps, ticker, get_market_cap, (ticker, self.end_date)))
+            if self._needs_prices:
+                tasks.append((self._prices, ticker, get_prices, (ticker, self.start_date, self.end_date)))
+
+        history_prices = {}
+        if self._history_bars:
+            if self.price_history is None or self.price_history.max_bars < self._history_bars:
+                self.price_history = PriceHistory(self._history_bars)
+            start = history_start(self.end_date, self._history_bars)
+            for ticker in self.tickers:
+                if not self.price_history.covers(ticker, self.end_date):
+                    tasks.append((history_prices, ticker, get_prices, (ticker, start, self.end_date)))
+
+        def run(task):
+            store, key, func, args = task
+            try:
+                store[key] = func(*args)
+            except Exception as e:
+                # Leave the slot empty; the agent's own request falls through to the API
+                print(f"Error pre-fetching {func.__name__} for {key}: {e}")
+
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+                list(executor.map(run, tasks))
+
+        for ticker, prices in history_prices.items():
+            self.price_history.update(ticker, prices, self.end_date)
+
+    def get_financial_metrics(self, ticker: str, end_date: str, period: str = "ttm", limit: int = 10) -> list:
+        metrics = self._financial_metrics.get(ticker)
+        if metrics is None or end_date != self.end_date or limit > self._metrics_limit:
+            return get_financial_metrics(ticker, end_date, period=period, limit=limit)
+        return metrics[:limit]
+
+    def search_line_items(self, ticker: str, line_items: list[str], end_date: str, period: str = "ttm", limit: int = 10) -> list[LineItem]:
+        results = self._line_items.get((ticker, period))
+        if results is None or end_date != self.end_date:
+            return search_line_items(ticker, line_items, end_date, period=period, limit=limit)
+        items, union_limit = self._line_item_requests[period]
+        if limit > union_limit or not items.issuperset(line_items):
+            return search_line_items(ticker, line_items, end_date, period=period, limit=limit)
+
+        # Project the combined result onto the fields this caller asked for
+        projected = []
+        for result in results[:limit]:
+            fields = {name: value for name, value in (result.model_extra or {}).items() if name in line_items}
+            projected.append(LineItem(ticker=result.ticker, report_period=result.report_period, period=result.period, currency=result.currency, **fields))
+        return projected
+
+    def get_insider_trades(self, ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> list:
+        trades = self._insider_trades.get(ticker)
+        if trades is None or not self._covers(self._insider_window, end_date, start_date, limit):
+            return get_insider_trades(ticker, end_date, start_date=start_date, limit=limit)
+        if start_date is not None:
+            trades = [trade for trade in trades if (trade.transaction_date or trade.filing_date) >= start_date]
+        return trades[:limit]
+
+    def get_company_news(self, ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> list:
+        news = self._company_news.get(ticker)
+        if news is None or not self._covers(self._news_window, end_date, start_date, limit):
+            return get_company_news(ticker, end_date, start_date=start_date, limit=limit)
+        if start_date is not None:
+            news = [item for item in news if item.date >= start_date]
+        return news[:limit]
+
+    def get_market_cap(self, ticker: str, end_date: str) -> float | None:
+        if ticker not in self._market_caps or end_date != self.end_date:
+            return get_market_cap(ticker, end_date)
+        return self._market_caps[ticker]
+
+    def get_prices(self, ticker: str, start_date: str, end_date: str) -> list:
+        prices = self._prices.get(ticker)
+        if prices is None or start_date < self.start_date or end_date > self.end_date:
+            return get_prices(ticker, start_date, end_date)
+        return [price for price in prices if start_date <= price.time <= end_date]
+
+    def get_price_history(self, ticker: str, end_date: str, bars: int) -> list:
+        """The last `bars` daily bars up to `end_date`, whatever the run's start date."""
+        if self.price_history is not None and self.price_history.max_bars >= bars:
+            if (prices := self.price_history.get(ticker, end_date)) is not None:
+                return prices[-bars:]
+        prices = get_prices(ticker, history_start(end_date, bars), end_date)
+        return sorted(prices, key=lambda price: price.time)[-bars:]
+
+    def get_indicators(self, ticker: str, end_date: str) -> dict[str, float] | None:
+        """Incrementally maintained indicator values up to `end_date`, if the price history has them."""
+        if self.price_history is None:
+            return None
+        return self.price_history.get_indicators(ticker, end_date)
+
+    def _covers(self, window: tuple[str | None, int] | None, end_date: str, start_date: str | None, limit: int) -> bool:
+        """Whether a prefetched (start, limit) window contains the newest `limit` items since `start_date`."""
+        if window is None or end_date != self.end_date:
+            return False
+        window_start, window_limit = window
+        if window_start is not None and (start_date is None or start_date < window_start):
+            return False
+        return limit <= window_limit
+
+
+def build_data_context(tickers: list[str], start_date: str, end_date: str, requirements: list[dict], price_history: PriceHistory | None = None) -> DataContext:
+    """Create a data context for a run and resolve the union of `requirements` up front."""
+    context = DataContext(tickers, start_date, end_date, price_history)
+    for requirement in requirements:
+        context.add_requirements(requirement)
+    # Let the refresh planner time fundamentals refetches by the earnings calendar
+    load_earnings_calendar(end_date, end_date, tickers)
+    context.prefetch()
+    return context
+
+
+def get_data_context(state) -> DataContext:
+    """Get the run's data context from the agent state, or an empty one that reads straight from the API."""
+    data = state["data"]
+    if context := data.get("data_context"):
+        return context
+    return DataContext(data["tickers"], data.get("start_date"), data["end_date"])
@@ -1,18 +1,18 @@
 """Constants and utilities related to analysts configuration."""
 
-from agents.ben_graham import ben_graham_agent
-from agents.bill_ackman import bill_ackman_agent
-from agents.cathie_wood import cathie_wood_agent
-from agents.charlie_munger import charlie_munger_agent
+from agents.ben_graham import LINE_ITEMS as BEN_GRAHAM_LINE_ITEMS, ben_graham_agent
+from agents.bill_ackman import LINE_ITEMS as BILL_ACKMAN_LINE_ITEMS, bill_ackman_agent
+from agents.cathie_wood import LINE_ITEMS as CATHIE_WOOD_LINE_ITEMS, cathie_wood_agent
+from agents.charlie_munger import LINE_ITEMS as CHARLIE_MUNGER_LINE_ITEMS, charlie_munger_agent
 from agents.fundamentals import fundamentals_agent
-from agents.michael_burry import michael_burry_agent
-from agents.phil_fisher import phil_fisher_agent
-from agents.peter_lynch import peter_lynch_agent
+from agents.michael_burry import LINE_ITEMS as MICHAEL_BURRY_LINE_ITEMS, michael_burry_agent
+from agents.phil_fisher import LINE_ITEMS as PHIL_FISHER_LINE_ITEMS, phil_fisher_agent
+from agents.peter_lynch import LINE_ITEMS as PETER_LYNCH_LINE_ITEMS, peter_lynch_agent
 from agents.sentiment import sentiment_agent
-from agents.stanley_druckenmiller import stanley_druckenmiller_agent
-from agents.technicals import technical_analyst_agent
-from agents.valuation import valuation_agent
-from agents.warren_buffett import warren_buffett_agent
+from agents.stanley_druckenmiller import LINE_ITEMS as STANLEY_DRUCKENMILLER_LINE_ITEMS, stanley_druckenmiller_agent
+from agents.technicals import WARMUP_BARS, technical_analyst_agent
+from agents.valuation import LINE_ITEMS as VALUATION_LINE_ITEMS, valuation_agent
+from agents.warren_buffett import LINE_ITEMS as WARREN_BUFFETT_LINE_ITEMS, warren_buffett_agent
 
 # Define analyst configuration - single source of truth
 ANALYST_CONFIG = {
@@ -20,69 +20,144 @@ ANALYST_CONFIG = {
         "display_name": "Ben Graham",
         "agent_func": ben_graham_agent,
         "order": 0,
+        "data_requirements": {
+            "line_items": {"items": BEN_GRAHAM_LINE_ITEMS, "period": "annual", "limit": 10},
+            "financial_metrics": {"period": "annual", "limit": 10},
+            "market_cap": True,
+        },
     },
     "bill_ackman": {
         "display_name": "Bill Ackman",
         "agent_func": bill_ackman_agent,
         "order": 1,
+        "data_requirements": {
+            "line_items": {"items": BILL_ACKMAN_LINE_ITEMS, "period": "annual", "limit": 5},
+            "financial_metrics": {"period": "annual", "limit": 5},
+            "market_cap": True,
+        },
     },
     "cathie_wood": {
         "display_name": "Cathie Wood",
         "agent_func": cathie_wood_agent,
         "order": 2,
+        "data_requirements": {
+            "line_items": {"items": CATHIE_WOOD_LINE_ITEMS, "period": "annual", "limit": 5},
+            "financial_metrics": {"period": "annual", "limit": 5},
+            "market_cap": True,
+        },
     },
     "charlie_munger": {
         "display_name": "Charlie Munger",
         "agent_func": charlie_munger_agent,
         "order": 3,
+        "data_requirements": {
+            "line_items": {"items": CHARLIE_MUNGER_LINE_ITEMS, "period": "annual", "limit": 10},
+            "financial_metrics": {"period": "annual", "limit": 10},
+            "market_cap": True,
+            "insider_trades": {"limit": 100},
+            "company_news": {"limit": 100},
+        },
     },
     "michael_burry": {
         "display_name": "Michael Burry",
         "agent_func": michael_burry_agent,
         "order": 4,
+        "data_requirements": {
+            "line_items": {"items": MICHAEL_BURRY_LINE_ITEMS, "period": "ttm", "limit": 10},
+            "financial_metrics": {"period": "ttm", "limit": 5},
+            "market_cap": True,
+            "insider_trades": {"lookback_days": 365, "limit": 1000},
+            "company_news": {"lookback_days": 365, "limit": 250},
+        },
     },
     "peter_lynch": {
         "display_name": "Peter Lynch",
         "agent_func": peter_lynch_agent,
         "order": 5,
+        "data_requirements": {
+            "line_items": {"items": PETER_LYNCH_LINE_ITEMS, "period": "annual", "limit": 5},
+            "financial_metrics": {"period": "annual", "limit": 5},
+            "market_cap": True,
+            "insider_trades": {"limit": 50},
+            "company_news": {"limit": 50},
+            "prices": True,
+        },
     },
     "phil_fisher": {
         "display_name": "Phil Fisher",
         "agent_func": phil_fisher_agent,
         "order": 6,
+        "data_requirements": {
+            "line_items": {"items": PHIL_FISHER_LINE_ITEMS, "period": "annual", "limit": 5},
+            "financial_metrics": {"period": "annual", "limit": 5},
+            "market_cap": True,
+            "insider_trades": {"limit": 50},
+            "company_news": {"limit": 50},
+        },
     },
     "stanley_druckenmiller": {
         "display_name": "Stanley Druckenmiller",
         "agent_func": stanley_druckenmiller_agent,
         "order": 7,
+        "data_requirements": {
+            "line_items": {"items": STANLEY_DRUCKENMILLER_LINE_ITEMS, "period": "annual", "limit": 5},
+            "financial_metrics": {"period": "annual", "limit": 5},
+            "market_cap": True,
+            "insider_trades": {"limit": 50},
+            "company_news": {"limit": 50},
+            "prices": True,
+        },
     },
     "warren_buffett": {
         "display_name": "Warren Buffett",
         "agent_func": warren_buffett_agent,
         "order": 8,
+        "data_requirements": {
+            "line_items": {"items": WARREN_BUFFETT_LINE_ITEMS, "period": "ttm", "limit": 10},
+            "financial_metrics": {"period": "ttm", "limit": 5},
+            "market_cap": True,
+        },
     },
     "technical_analyst": {
         "display_name": "Technical Analyst",
         "agent_func": technical_analyst_agent,
         "order": 9,
+        "data_requirements": {
+            "price_history": {"bars": WARMUP_BARS},
+        },
     },
     "fundamentals_analyst": {
         "display_name": "Fundamentals Analyst",
         "agent_func": fundamentals_agent,
         "order": 10,
+        "data_requirements": {
+            "financial_metrics": {"period": "ttm", "limit": 10},
+        },
     },
     "sentiment_analyst": {
         "display_name": "Sentiment Analyst",
         "agent_func": sentiment_agent,
         "order": 11,
+        "data_requirements": {
+            "insider_trades": {"limit": 1000},
+            "company_news": {"limit": 100},
+        },
     },
     "valuation_analyst": {
         "display_name": "Valuation Analyst",
         "agent_func": valuation_agent,
         "order": 12,
+        "data_requirements": {
+            "line_items": {"items": VALUATION_LINE_ITEMS, "period": "ttm", "limit": 2},
+            "financial_metrics": {"period": "ttm", "limit": 8},
+            "market_cap": True,
+        },
     },
 }
 
+# Data the risk manager needs regardless of which analysts are selected
+RISK_MANAGER_DATA_REQUIREMENTS = {"prices": True}
+
 # Derive ANALYST_ORDER from ANALYST_CONFIG for backwards compatibility
 ANALYST_ORDER = [(config["display_name"], key) for key, config in sorted(ANALYST_CONFIG.items(), key=lambda x: x[1]["order"])]
 
@@ -90,3 +165,13 @@ ANALYST_ORDER = [(config["display_name"], key) for key, config in sorted(ANALYST
 def get_analyst_nodes():
     """Get the mapping of analyst keys to their (node_name, agent_func) tuples."""
     return {key: (f"{key}_agent", config["agent_func"]) for key, config in ANALYST_CONFIG.items()}
+
+
+def get_data_requirements(selected_analysts: list[str]) -> list[dict]:
+    """Get the declared data requirements of the selected analysts plus the risk manager."""
+    return [ANALYST_CONFIG[key].get("data_requirements", {}) for key in selected_analysts] + [RISK_MANAGER_DATA_REQUIREMENTS]
+
+
+def get_price_history_bars(selected_analysts: list[str]) -> int:
+    """Get the longest price warm-up, in daily bars, that the selected analysts declare."""
+    return max((requirements.get("price_history", {}).get("bars", 0) for requirements in get_data_requirements(selected_analysts)), default=0)
@@ -0,0 +1,157 @@
+"""Generate persona signals for several tickers per LLM call."""
+
+import functools
+from typing import Any, Callable, Type
+
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, ValidationError, create_model
+
+from llm.cache import LLMCacheMissError
+from utils.concurrency import run_per_ticker, timed_out_signal
+from utils.llm import call_llm
+from utils.memo import get_signal_memo
+from utils.progress import progress
+from utils.prompt_format import format_data
+
+BATCH_HUMAN_PROMPT = """Based on the following analysis data, create an investment signal for each ticker.
+
+Analysis Data by ticker:
+{analysis_data}
+
+Return one signal for each of these tickers: {tickers}
+Use the following JSON format exactly:
+{{
+  "signals": {{
+    "<ticker>": {{
+      "signal": "bullish" | "bearish" | "neutral",
+      "confidence": float between 0 and 100,
+      "reasoning": "string"
+    }}
+  }}
+}}
+"""
+
+# Outcome of one batch's LLM call, returned alongside its signals
+BATCH_OK = "ok"
+BATCH_TIMED_OUT = "timed_out"  # the node deadline passed; its tickers time out too
+BATCH_FAILED = "failed"  # the call raised; its tickers fall back to their own prompts
+
+
+@functools.cache
+def _batch_model(signal_model: Type[BaseModel]) -> Type[BaseModel]:
+    # Entries are validated one by one, so a single malformed ticker doesn't discard the batch.
+    # Cached so every call shares one class, and with it one structured-output runnable.
+    return create_model(f"{signal_model.__name__}Batch", signals=(dict[str, dict[str, Any]], ...))
+
+
+def generate_signals_batched(
+    tickers: list[str],
+    ready_signals: dict[str, dict],
+    analysis_data: dict[str, dict],
+    generate: Callable,
+    signal_model: Type[BaseModel],
+    system_prompt: str,
+    agent_name: str,
+    model_name: str,
+    model_provider: str,
+    batch_size: int,
+) -> dict[str, dict]:
+    """
+    Ask for the signals of up to `batch_size` tickers per prompt, sharing one system prompt.
+
+    Each batch's response is a dict of ticker to signal. Tickers missing from it, or whose
+    entry fails to validate against `signal_model`, fall back to the agent's per-ticker
+    `generate(ticker, analysis_data, model_name, model_provider)`. Signals the memo can
+    reuse are not asked for at all, and `ready_signals` from the per-ticker phase (e.g.
+    timed-out or failed tickers) are kept as they are.
+    """
+    memo = get_signal_memo()
+    batch_model = _batch_model(signal_model)
+    template = ChatPromptTemplate.from_messages([("system", system_prompt), ("human", BATCH_HUMAN_PROMPT)])
+
+    outputs = {}
+    fingerprints = {}
+    pending = []
+    for ticker in tickers:
+        if ticker not in analysis_data or ticker in ready_signals:
+            continue
+        if memo.enabled:
+            output, fingerprints[ticker] = memo.lookup(agent_name, ticker, analysis_data[ticker], model_name, model_provider)
+            if output is not None:
+                outputs[ticker] = output
+                continue
+        pending.append(ticker)
+
+    batches = {",".join(pending[i : i + batch_size]): pending[i : i + batch_size] for i in range(0, len(pending), batch_size)}
+
+    def generate_batch(key: str) -> tuple[str, dict[str, BaseModel]]:
+        batch = batches[key]
+        for ticker in batch:
+            progress.update_status(agent_name, ticker, f"Generating signal with {len(batch) - 1} other tickers")
+        try:
+            prompt = template.invoke({"analysis_data": format_data({ticker: analysis_data[ticker] for ticker in batch}), "tickers": ", ".join(batch)})
+            response = call_llm(
+                prompt=prompt,
+                model_name=model_name,
+                model_provider=model_provider,
+                pydantic_model=batch_model,
+                agent_name=agent_name,
+                default_factory=lambda: batch_model(signals={}),
+            )
+        except (TimeoutError, LLMCacheMissError):
+            # Left to run_per_ticker, which times the batch out or fails the node
+            raise
+        except Exception as e:
+            print(f"Error generating signals for {key}: {e}")
+            return BATCH_FAILED, {}
+
+        signals = {}
+        for ticker in batch:
+            try:
+                signals[ticker] = signal_model.model_validate(response.signals[ticker])
+            except (KeyError, ValidationError):
+                continue
+        return BATCH_OK, signals
+
+    timed_out = set()
+    for key, (status, signals) in run_per_ticker(list(batches), generate_batch, model_provider, on_timeout=lambda: (BATCH_TIMED_OUT, {})).items():
+        if status == BATCH_TIMED_OUT:
+            timed_out.update(batches[key])
+            continue
+        if status == BATCH_FAILED:
+            # Its tickers fall back to their own prompts
+            continue
+        for ticker, output in signals.items():
+            outputs[ticker] = output
+            if memo.enabled:
+                memo.store(agent_name, ticker, fingerprints[ticker], output)
+
+    # Anything the batches didn't return a valid signal for gets its own prompt
+    fallback = [ticker for ticker in pending if ticker not in outputs and ticker not in timed_out]
+
+    def to_signal(ticker: str, output: BaseModel) -> dict:
+        progress.update_status(agent_name, ticker, "Done")
+        return {"signal": output.signal, "confidence": output.confidence, "reasoning": output.reasoning}
+
+    def generate_single(ticker: str) -> dict:
+        progress.update_status(agent_name, ticker, "Batch response incomplete, generating signal on its own")
+        # The memo was already consulted above, so skip the memoized wrapper
+        output = getattr(generate, "__wrapped__", generate)(ticker, analysis_data[ticker], model_name=model_name, model_provider=model_provider)
+        if memo.enabled:
+            memo.store(agent_name, ticker, fingerprints[ticker], output)
+        return to_signal(ticker, output)
+
+    # Already signal dicts, including timed-out and failed placeholders from run_per_ticker
+    fallback_signals = run_per_ticker(fallback, generate_single, model_provider)
+
+    results = {}
+    for ticker in tickers:
+        if ticker in ready_signals:
+            results[ticker] = ready_signals[ticker]
+        elif ticker in timed_out:
+            results[ticker] = timed_out_signal()
+        elif ticker in fallback_signals:
+            results[ticker] = fallback_signals[ticker]
+        elif ticker in outputs:
+            results[ticker] = to_signal(ticker, outputs[ticker])
+    return results
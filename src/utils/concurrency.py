@@ -0,0 +1,154 @@
+"""Run an agent's per-ticker work concurrently."""
+
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from typing import Any, Callable
+
+from llm.cache import LLMCacheMissError
+from llm.usage import reset_current_ticker, set_current_ticker
+from utils.llm import PROVIDER_MAX_IN_FLIGHT, reset_llm_event_loop, set_llm_event_loop
+from utils.progress import progress
+
+# Pool size for agents that make no LLM calls, or for unknown providers
+DEFAULT_CONCURRENCY = 4
+
+# time.monotonic() by which the analyst node running in this context must finish
+_deadline: ContextVar[float | None] = ContextVar("analyst_deadline", default=None)
+
+
+def get_remaining_time() -> float | None:
+    """Seconds left before the current analyst node's deadline, or None if it has none."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def timed_out_signal() -> dict:
+    """Placeholder signal for a ticker whose analysis missed the node deadline."""
+    return {"signal": "neutral", "confidence": 0.0, "reasoning": "Timed out before the analysis finished", "timed_out": True}
+
+
+def failed_signal(error: Exception) -> dict:
+    """Placeholder signal for a ticker whose analysis raised."""
+    return {"signal": "neutral", "confidence": 0.0, "reasoning": f"Analysis failed: {error}"}
+
+
+def get_max_concurrency(model_provider: str | None = None) -> int:
+    """
+    Get the number of tickers an agent analyzes at once, overridable with AGENT_MAX_CONCURRENCY.
+
+    Defaults to the provider's cap on LLM requests in flight; more tickers than that would
+    only queue for the LLM scheduler's slots.
+    """
+    if override := os.environ.get("AGENT_MAX_CONCURRENCY"):
+        return max(1, int(override))
+    return PROVIDER_MAX_IN_FLIGHT.get(model_provider, DEFAULT_CONCURRENCY)
+
+
+def run_per_ticker(
+    tickers: list[str],
+    analyze: Callable[[str], Any],
+    model_provider: str | None = None,
+    on_timeout: Callable[[], Any] = timed_out_signal,
+) -> dict[str, Any]:
+    """
+    Run `analyze(ticker)` for every ticker on a bounded thread pool.
+
+    Results are gathered in ticker order; tickers for which `analyze` returns None are
+    skipped. `model_provider` sizes the pool; the provider's limit across agents running
+    side by side is enforced per LLM request by the LLM scheduler.
+    If the node has a deadline, tickers still running when it passes get `on_timeout()`
+    (a timed-out signal by default) and are abandoned. A ticker whose analysis raises gets
+    a neutral signal (`on_timeout()` for TimeoutError) instead of failing the whole node,
+    except for LLMCacheMissError, which fails the node so a replay run can't silently diverge.
+    """
+    if not tickers:
+        return {}
+    max_workers = min(get_max_concurrency(model_provider), len(tickers))
+    remaining = get_remaining_time()
+
+    def run(ticker: str) -> Any:
+        # Tag the ticker's LLM calls for usage accounting
+        token = set_current_ticker(ticker)
+        try:
+            return analyze(ticker)
+        except TimeoutError:
+            # call_llm raises once the deadline has passed
+            return on_timeout()
+        except LLMCacheMissError:
+            # A replay that needs a new LLM response must fail the run, not degrade a signal
+            raise
+        except Exception as e:
+            print(f"Error analyzing {ticker}: {e}")
+            return failed_signal(e)
+        finally:
+            reset_current_ticker(token)
+
+    if max_workers <= 1 and remaining is None:
+        results = [run(ticker) for ticker in tickers]
+    else:
+        # Carry the caller's context (e.g. the async graph's event loop) into the workers
+        contexts = [contextvars.copy_context() for _ in tickers]
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = [executor.submit(context.run, run, ticker) for context, ticker in zip(contexts, tickers)]
+        try:
+            done, _ = wait(futures, timeout=remaining)
+        finally:
+            # Drop queued tickers; stragglers stop at their next LLM call
+            executor.shutdown(wait=False, cancel_futures=True)
+        results = [future.result() if future in done else on_timeout() for future in futures]
+
+    return {ticker: result for ticker, result in zip(tickers, results) if result is not None}
+
+
+def with_deadline(node_name: str, agent_func: Callable[[dict], dict]) -> Callable[[dict], dict]:
+    """
+    Bound an analyst node by `state["metadata"]["analyst_deadline"]` seconds.
+
+    When the deadline passes the node returns the signals that are ready, and marks the
+    missing tickers as timed out so the risk and portfolio managers can proceed.
+    """
+
+    @functools.wraps(agent_func)
+    def node(state):
+        seconds = state["metadata"].get("analyst_deadline")
+        if not seconds:
+            return agent_func(state)
+
+        token = _deadline.set(time.monotonic() + seconds)
+        try:
+            result = agent_func(state)
+        finally:
+            _deadline.reset(token)
+
+        signals = state["data"]["analyst_signals"].get(node_name, {})
+        if timed_out := sum(1 for signal in signals.values() if signal.get("timed_out")):
+            progress.update_status(node_name, None, f"Timed out on {timed_out} of {len(signals)} tickers")
+        return result
+
+    return node
+
+
+def make_async_node(agent_func: Callable[[dict], dict]) -> Callable:
+    """
+    Wrap a synchronous agent as an async graph node.
+
+    The agent's analysis runs in a worker thread, while its LLM requests are awaited on
+    the graph's event loop, so every node in a superstep overlaps on a single loop.
+    """
+
+    @functools.wraps(agent_func)
+    async def node(state):
+        token = set_llm_event_loop(asyncio.get_running_loop())
+        try:
+            return await asyncio.to_thread(agent_func, state)
+        finally:
+            reset_llm_event_loop(token)
+
+    return node
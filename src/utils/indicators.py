@@ -0,0 +1,219 @@
+"""
+Incremental technical indicators.
+
+Each indicator keeps just enough running state to fold in one new bar in O(1). The
+results match the batch functions in agents.technicals (calculate_ema, calculate_rsi,
+calculate_adx, calculate_atr) over the same bars, up to floating point rounding.
+
+data.history.PriceHistory folds every new bar in, so a backtest advances the indicators
+one day at a time. They then cover every bar seen since the history was seeded, as a
+recompute over that whole history would, rather than only the rolling window.
+"""
+
+import math
+from collections import deque
+
+NAN = float("nan")
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """Division with numpy semantics: x/0 is +-inf and 0/0 is NaN."""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return NAN
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+class EWMean:
+    """Exponentially weighted mean, identical to pandas' `Series.ewm(span=span, adjust=adjust).mean()`."""
+
+    def __init__(self, span: int, adjust: bool = True):
+        alpha = 2.0 / (span + 1.0)
+        self._old_wt_factor = 1.0 - alpha
+        self._new_wt = 1.0 if adjust else alpha
+        self._adjust = adjust
+        self._old_wt = 1.0
+        self._started = False
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        # Same recurrence as pandas' ewm kernel; a missing value only decays the old weight
+        is_observation = not math.isnan(x)
+        if not self._started:
+            self.value = x
+            self._started = True
+        elif not math.isnan(self.value):
+            self._old_wt *= self._old_wt_factor
+            if is_observation:
+                if self.value != x:
+                    self.value = (self._old_wt * self.value + self._new_wt * x) / (self._old_wt + self._new_wt)
+                self._old_wt = self._old_wt + self._new_wt if self._adjust else 1.0
+        elif is_observation:
+            self.value = x
+        return self.value
+
+
+class RollingMean:
+    """Rolling mean over a fixed window kept in a ring buffer, like `Series.rolling(window).mean()`."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._count = 0  # non-NaN values in the window
+        self._sum = 0.0
+        self._compensation = 0.0  # Kahan compensation, as pandas uses
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if len(self._values) == self.window:
+            self._add(-self._values[0], remove=True)
+        self._values.append(x)
+        self._add(x)
+
+        if len(self._values) < self.window or self._count < self.window:
+            self.value = NAN
+        else:
+            self.value = self._sum / self._count
+        return self.value
+
+    def _add(self, x: float, remove: bool = False):
+        if math.isnan(x):
+            return
+        self._count += -1 if remove else 1
+        y = x - self._compensation
+        t = self._sum + y
+        self._compensation = t - self._sum - y
+        self._sum = t
+
+
+class RSI:
+    """Relative strength index from rolling mean gains and losses, as calculate_rsi."""
+
+    def __init__(self, period: int = 14):
+        self._gains = RollingMean(period)
+        self._losses = RollingMean(period)
+        self._prev_close = NAN
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        delta = close - self._prev_close
+        self._prev_close = close
+        # A missing delta (first bar) counts as neither gain nor loss
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = self._gains.update(gain)
+        avg_loss = self._losses.update(loss)
+        rs = _divide(avg_gain, avg_loss)
+        self.value = 100 - _divide(100, 1 + rs)
+        return self.value
+
+
+class TrueRange:
+    """True range of a bar given the previous close; the first bar is just high - low."""
+
+    def __init__(self):
+        self._prev_close = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        ranges = [high - low, abs(high - self._prev_close), abs(low - self._prev_close)]
+        self._prev_close = close
+        ranges = [r for r in ranges if not math.isnan(r)]
+        return max(ranges) if ranges else NAN
+
+
+class ATR:
+    """Average true range as a rolling mean of true ranges, as calculate_atr."""
+
+    def __init__(self, period: int = 14):
+        self._true_range = TrueRange()
+        self._mean = RollingMean(period)
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.value = self._mean.update(self._true_range.update(high, low, close))
+        return self.value
+
+
+class ADX:
+    """Average directional index with +DI and -DI, as calculate_adx."""
+
+    def __init__(self, period: int = 14):
+        self._true_range = TrueRange()
+        self._tr = EWMean(period)
+        self._plus_dm = EWMean(period)
+        self._minus_dm = EWMean(period)
+        self._adx = EWMean(period)
+        self._prev_high = NAN
+        self._prev_low = NAN
+        self.value = NAN
+        self.plus_di = NAN
+        self.minus_di = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = self._true_range.update(high, low, close)
+        up_move = high - self._prev_high
+        down_move = self._prev_low - low
+        self._prev_high, self._prev_low = high, low
+
+        plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+        minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+
+        tr_mean = self._tr.update(tr)
+        self.plus_di = 100 * _divide(self._plus_dm.update(plus_dm), tr_mean)
+        self.minus_di = 100 * _divide(self._minus_dm.update(minus_dm), tr_mean)
+        dx = 100 * _divide(abs(self.plus_di - self.minus_di), self.plus_di + self.minus_di)
+        self.value = self._adx.update(dx)
+        return self.value
+
+
+class TickerIndicators:
+    """Running indicator state for one ticker, advanced one daily bar at a time."""
+
+    def __init__(self, ema_windows=(8, 21, 55), rsi_periods=(14, 28), adx_period: int = 14, atr_period: int = 14):
+        self.emas = {window: EWMean(window, adjust=False) for window in ema_windows}
+        self.rsis = {period: RSI(period) for period in rsi_periods}
+        self.adx = ADX(adx_period)
+        self.atr = ATR(atr_period)
+        self.last_time: str | None = None
+
+    def update(self, high: float, low: float, close: float, time: str | None = None):
+        """Fold in one bar. Bars at or before the last seen `time` are ignored, so overlapping windows are safe."""
+        if time is not None:
+            if self.last_time is not None and time <= self.last_time:
+                return
+            self.last_time = time
+
+        for ema in self.emas.values():
+            ema.update(close)
+        for rsi in self.rsis.values():
+            rsi.update(close)
+        self.adx.update(high, low, close)
+        self.atr.update(high, low, close)
+
+    def values(self) -> dict[str, float]:
+        """Latest value of every indicator."""
+        values = {f"ema_{window}": ema.value for window, ema in self.emas.items()}
+        values.update({f"rsi_{period}": rsi.value for period, rsi in self.rsis.items()})
+        values.update({"adx": self.adx.value, "+di": self.adx.plus_di, "-di": self.adx.minus_di, "atr": self.atr.value})
+        return values
+
+
+class IndicatorEngine:
+    """Per-ticker incremental indicators, e.g. kept across the days of a backtest."""
+
+    def __init__(self, **indicator_kwargs):
+        self._indicator_kwargs = indicator_kwargs
+        self._tickers: dict[str, TickerIndicators] = {}
+
+    def update(self, ticker: str, prices: list) -> dict[str, float]:
+        """Fold price records (oldest first) into the ticker's state and return the latest values."""
+        indicators = self._tickers.get(ticker)
+        if indicators is None:
+            indicators = self._tickers[ticker] = TickerIndicators(**self._indicator_kwargs)
+        for price in prices:
+            indicators.update(price.high, price.low, price.close, price.time)
+        return indicators.values()
+
+    def get(self, ticker: str) -> TickerIndicators | None:
+        return self._tickers.get(ticker)
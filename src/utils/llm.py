@@ -1,12 +1,348 @@
 """Helper functions for LLM"""
 
+import asyncio
+import concurrent.futures
 import json
-from typing import TypeVar, Type, Optional, Any
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import TypeVar, Type, Optional, Any, Callable
 from pydantic import BaseModel
+from llm.cache import CHARS_PER_TOKEN, get_llm_cache, normalize_prompt
+from llm.hedging import get_hedge_policy, get_latency_tracker
+from llm.usage import LLMCallRecord, get_current_ticker, get_usage_tracker
+from llm.models import ModelProvider
 from utils.progress import progress
 
 T = TypeVar('T', bound=BaseModel)
 
+# Event loop of the async graph run, if any; synchronous agent code running in worker
+# threads hands its LLM requests to this loop so they overlap with every other node's
+_llm_event_loop: ContextVar[Optional[asyncio.AbstractEventLoop]] = ContextVar("llm_event_loop", default=None)
+
+
+# Structured-output runnables per (client, output model); clients live for the process, so ids are stable
+_structured_llms: dict[tuple[int, type], Any] = {}
+_structured_llms_lock = threading.Lock()
+
+
+def set_llm_event_loop(loop: Optional[asyncio.AbstractEventLoop]):
+    """Route call_llm requests made from this context onto `loop`. Returns a token for reset_llm_event_loop."""
+    return _llm_event_loop.set(loop)
+
+
+def reset_llm_event_loop(token):
+    _llm_event_loop.reset(token)
+
+
+# Providers that cache a prompt prefix only where the request marks one with cache_control
+EXPLICIT_PREFIX_CACHE_PROVIDERS = {ModelProvider.ANTHROPIC.value}
+
+# Requests each provider may have in flight at once, across all agents
+PROVIDER_MAX_IN_FLIGHT = {
+    ModelProvider.OPENAI.value: 16,
+    ModelProvider.ANTHROPIC.value: 8,
+    ModelProvider.DEEPSEEK.value: 8,
+    ModelProvider.GEMINI.value: 8,
+    ModelProvider.GROQ.value: 4,
+    ModelProvider.OLLAMA.value: 1,
+}
+
+# Token-per-minute budgets, overridable with e.g. OPENAI_TOKENS_PER_MINUTE; None means unlimited
+PROVIDER_TOKENS_PER_MINUTE = {
+    ModelProvider.OPENAI.value: 450_000,
+    ModelProvider.ANTHROPIC.value: 80_000,
+    ModelProvider.DEEPSEEK.value: None,
+    ModelProvider.GEMINI.value: 1_000_000,
+    ModelProvider.GROQ.value: 6_000,
+    ModelProvider.OLLAMA.value: None,
+}
+
+# Tokens budgeted for a structured response on top of the prompt
+EXPECTED_OUTPUT_TOKENS = 500
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server errors and overload
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+# Exception names of provider SDK errors that carry no status code but are transient
+RETRYABLE_ERROR_NAMES = ("RateLimit", "Timeout", "Connection", "Overloaded", "ServiceUnavailable", "InternalServer")
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+
+def _status_code(error: Exception) -> int | None:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(error: Exception) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class SlotTimeoutError(TimeoutError):
+    """Waiting for a provider slot or token budget outlasted the caller's deadline."""
+
+
+class _ProviderLimiter:
+    """
+    Concurrency slots and a token bucket for one provider.
+
+    Slots are shared by threads and by coroutines on the graph's event loop. A waiting
+    coroutine awaits a future rather than blocking a thread, and a released slot is handed
+    straight to the longest waiter.
+    """
+
+    def __init__(self, max_in_flight: int, tokens_per_minute: int | None):
+        self.max_in_flight = max_in_flight
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # Wake-up callbacks of waiters, oldest first; each returns False if its waiter is gone
+        self._waiters: deque[Callable[[], bool]] = deque()
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        # Metrics
+        self.waiting = 0
+        self.max_waiting = 0
+        self.requests = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self, tokens: int, timeout: float | None = None):
+        """Wait for a free slot and `tokens` of budget. Raises TimeoutError if that takes longer than `timeout`."""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        woken = threading.Event()
+
+        def wake() -> bool:
+            woken.set()
+            return True
+
+        self._start_wait()
+        try:
+            if self._enqueue(wake) and not woken.wait(timeout) and not self._withdraw(wake):
+                raise SlotTimeoutError("Timed out waiting for an LLM request slot")
+            try:
+                while wait := self._reserve_tokens(tokens, deadline):
+                    time.sleep(wait)
+            except BaseException:
+                self.release()
+                raise
+        finally:
+            self._end_wait(start)
+
+    async def acquire_async(self, tokens: int, timeout: float | None = None):
+        """Async counterpart of `acquire` that waits on the event loop."""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        loop = asyncio.get_running_loop()
+        woken = loop.create_future()
+
+        def wake() -> bool:
+            try:
+                loop.call_soon_threadsafe(lambda: woken.done() or woken.set_result(None))
+            except RuntimeError:
+                # The loop has closed
+                return False
+            return True
+
+        self._start_wait()
+        try:
+            if self._enqueue(wake):
+                try:
+                    await asyncio.wait_for(asyncio.shield(woken), timeout)
+                except asyncio.CancelledError:
+                    if self._withdraw(wake):
+                        # Handed a slot just as the request was cancelled
+                        self.release()
+                    raise
+                except asyncio.TimeoutError:
+                    # Unless a slot was handed over just as the wait timed out
+                    if not self._withdraw(wake):
+                        raise SlotTimeoutError("Timed out waiting for an LLM request slot") from None
+            try:
+                while wait := self._reserve_tokens(tokens, deadline):
+                    await asyncio.sleep(wait)
+            except BaseException:
+                self.release()
+                raise
+        finally:
+            self._end_wait(start)
+
+    def release(self):
+        with self._lock:
+            # The slot passes to the next waiter still waiting, so the count in flight is unchanged
+            while self._waiters:
+                if self._waiters.popleft()():
+                    return
+            self._in_flight -= 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "requests": self.requests,
+                "retries": self.retries,
+                "avg_wait_seconds": self.wait_seconds / self.requests if self.requests else 0.0,
+            }
+
+    def drain(self):
+        """Empty the token bucket after a rate limit, so every queued request backs off with the failed one."""
+        if self.tokens_per_minute:
+            with self._lock:
+                self._tokens = 0.0
+                self._updated = time.monotonic()
+
+    def _enqueue(self, wake: Callable[[], bool]) -> bool:
+        """Take a free slot, or queue `wake` to be called when one is handed over. Returns True if queued."""
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                return False
+            self._waiters.append(wake)
+            return True
+
+    def _withdraw(self, wake: Callable[[], bool]) -> bool:
+        """Leave the queue after giving up. Returns True if a slot was handed over first, and is now held."""
+        with self._lock:
+            if wake in self._waiters:
+                self._waiters.remove(wake)
+                return False
+            return True
+
+    def _start_wait(self):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def _end_wait(self, start: float):
+        with self._lock:
+            self.waiting -= 1
+            self.requests += 1
+            self.wait_seconds += time.monotonic() - start
+
+    def _reserve_tokens(self, tokens: int, deadline: float | None) -> float:
+        """Take `tokens` from the bucket and return 0, or return the seconds to wait before trying again."""
+        if not self.tokens_per_minute:
+            return 0.0
+        # A request larger than the whole budget waits for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.tokens_per_minute, self._tokens + (now - self._updated) * self.tokens_per_minute / 60)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            wait = (tokens - self._tokens) * 60 / self.tokens_per_minute
+        if deadline is not None and now + wait > deadline:
+            raise SlotTimeoutError("Timed out waiting for LLM token budget")
+        return wait
+
+
+class LLMScheduler:
+    """
+    Per-provider admission control for LLM requests.
+
+    Each provider has a cap on requests in flight and a token-per-minute budget, charged
+    with an estimate of each request's size. Failed requests are retried with exponential
+    backoff and full jitter when the error is transient, and a rate limit drains the
+    provider's budget so the requests queued behind it back off too.
+    """
+
+    def __init__(self):
+        self._limiters: dict[str, _ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, model_provider: str) -> _ProviderLimiter:
+        provider = getattr(model_provider, "value", model_provider)
+        with self._lock:
+            if provider not in self._limiters:
+                tokens_per_minute = os.environ.get(f"{provider.upper()}_TOKENS_PER_MINUTE")
+                self._limiters[provider] = _ProviderLimiter(
+                    PROVIDER_MAX_IN_FLIGHT.get(provider, 4),
+                    int(tokens_per_minute) if tokens_per_minute else PROVIDER_TOKENS_PER_MINUTE.get(provider),
+                )
+            return self._limiters[provider]
+
+    @staticmethod
+    def estimate_tokens(prompt: Any) -> int:
+        return sum(len(message["content"]) for message in normalize_prompt(prompt)) // CHARS_PER_TOKEN + EXPECTED_OUTPUT_TOKENS
+
+    @contextmanager
+    def slot(self, model_provider: str, prompt: Any, timeout: float | None = None):
+        """Hold one of the provider's request slots, charged for `prompt`, for the duration of a request."""
+        limiter = self._limiter(model_provider)
+        limiter.acquire(self.estimate_tokens(prompt), timeout)
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    @asynccontextmanager
+    async def async_slot(self, model_provider: str, prompt: Any, timeout: float | None = None):
+        """Async counterpart of `slot`; the wait happens on the event loop, without holding a thread."""
+        limiter = self._limiter(model_provider)
+        await limiter.acquire_async(self.estimate_tokens(prompt), timeout)
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    def retry_delay(self, model_provider: str, error: Exception, attempt: int) -> float | None:
+        """Seconds to wait before retrying after `error`, 0 to retry at once, or None if retrying is pointless."""
+        limiter = self._limiter(model_provider)
+        status = _status_code(error)
+        transient = status in RETRYABLE_STATUS_CODES or isinstance(error, (TimeoutError, ConnectionError)) or any(name in type(error).__name__ for name in RETRYABLE_ERROR_NAMES)
+        if not transient and status is not None and 400 <= status < 500:
+            # Bad request, authentication or a missing model: the same call fails again
+            return None
+
+        limiter.record_retry()
+        if not transient:
+            # e.g. a response that didn't parse; a fresh sample may
+            return 0.0
+        if status == 429 or "RateLimit" in type(error).__name__:
+            limiter.drain()
+        delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt))
+        return max(delay, _retry_after(error) or 0.0)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Queue depth, wait time and retries per provider."""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {provider: limiter.stats() for provider, limiter in limiters.items()}
+
+    def summary(self) -> str:
+        return "\n".join(
+            f"LLM requests ({provider}): {stats['requests']} sent, {stats['retries']} retried, "
+            f"queue depth up to {stats['max_waiting']}, {stats['avg_wait_seconds']:.2f}s average wait"
+            for provider, stats in self.stats().items()
+        )
+
+
+# Global LLM scheduler instance
+_scheduler = LLMScheduler()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Get the global LLM scheduler instance."""
+    return _scheduler
+
+
 def call_llm(
     prompt: Any,
     model_name: str,
@@ -30,47 +366,334 @@ def call_llm(
         
     Returns:
         An instance of the specified Pydantic model
+
+    Raises:
+        TimeoutError: If the analyst node's deadline passes before the call succeeds
     """
+    from utils.concurrency import get_remaining_time
+
+    remaining = get_remaining_time()
+    if remaining is not None and remaining <= 0:
+        # The analyst node's deadline has passed; don't start a request nobody will wait for
+        raise TimeoutError(f"Deadline passed before calling {model_name}")
+
+    loop = _llm_event_loop.get()
+    if loop is not None and loop.is_running() and not _on_loop_thread(loop):
+        # Called from a worker thread of an async graph node: await the request on the graph's loop
+        future = asyncio.run_coroutine_threadsafe(
+            call_llm_async(prompt, model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory),
+            loop,
+        )
+        try:
+            return future.result(timeout=remaining)
+        except concurrent.futures.TimeoutError:
+            # Cancel the in-flight request on the loop instead of letting it run on
+            future.cancel()
+            raise
+
+    record = LLMCallRecord(agent_name, get_current_ticker(), model_name, model_provider)
+
+    # Serve identical prompts from the response cache
+    cache = get_llm_cache()
+    if cache.enabled:
+        cache_key = cache.key(prompt, model_name, model_provider, pydantic_model)
+        if (cached := cache.get(cache_key, pydantic_model)) is not None:
+            record.cache_hit = True
+            get_usage_tracker().record(record)
+            return cached
+
+    scheduler = get_llm_scheduler()
+    start = time.monotonic()
+    hedged = hedge_won = False
+
+    # Call the LLM with retries
+    try:
+        for attempt in range(max_retries):
+            record.retries = attempt
+            try:
+                result, was_hedged, hedge_won = _request_hedged(prompt, model_name, model_provider, pydantic_model, get_remaining_time(), record)
+                hedged |= was_hedged
+                if cache.enabled:
+                    cache.put(cache_key, prompt, result)
+                return result
+
+            except Exception as e:
+                try:
+                    delay = _next_retry_delay(scheduler, model_provider, e, attempt, max_retries, agent_name)
+                except TimeoutError:
+                    record.failed = True
+                    raise
+                if delay is None:
+                    record.failed = True
+                    # Use default_factory if provided, otherwise create a basic default
+                    return default_factory() if default_factory else create_default_response(pydantic_model)
+                time.sleep(delay)
+
+        record.failed = True
+        return default_factory() if default_factory else create_default_response(pydantic_model)
+    finally:
+        record.latency_seconds = time.monotonic() - start
+        record.hedged = hedged
+        get_latency_tracker().record_call(agent_name, record.latency_seconds, hedged, hedge_won)
+        get_usage_tracker().record(record)
+
+async def call_llm_async(
+    prompt: Any,
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str] = None,
+    max_retries: int = 3,
+    default_factory = None
+) -> T:
+    """Async counterpart of call_llm that awaits the model with `ainvoke`."""
+    record = LLMCallRecord(agent_name, get_current_ticker(), model_name, model_provider)
+    cache = get_llm_cache()
+    if cache.enabled:
+        cache_key = cache.key(prompt, model_name, model_provider, pydantic_model)
+        if (cached := cache.get(cache_key, pydantic_model)) is not None:
+            record.cache_hit = True
+            get_usage_tracker().record(record)
+            return cached
+
+    scheduler = get_llm_scheduler()
+    start = time.monotonic()
+    hedged = hedge_won = False
+
+    try:
+        for attempt in range(max_retries):
+            record.retries = attempt
+            try:
+                result, was_hedged, hedge_won = await _arequest_hedged(prompt, model_name, model_provider, pydantic_model, record)
+                hedged |= was_hedged
+                if cache.enabled:
+                    cache.put(cache_key, prompt, result)
+                return result
+
+            except Exception as e:
+                try:
+                    delay = _next_retry_delay(scheduler, model_provider, e, attempt, max_retries, agent_name)
+                except TimeoutError:
+                    record.failed = True
+                    raise
+                if delay is None:
+                    record.failed = True
+                    return default_factory() if default_factory else create_default_response(pydantic_model)
+                await asyncio.sleep(delay)
+
+        record.failed = True
+        return default_factory() if default_factory else create_default_response(pydantic_model)
+    finally:
+        record.latency_seconds = time.monotonic() - start
+        record.hedged = hedged
+        get_latency_tracker().record_call(agent_name, record.latency_seconds, hedged, hedge_won)
+        get_usage_tracker().record(record)
+
+
+def _parse_response(result: Any, model_info, pydantic_model: Type[T], record: LLMCallRecord | None = None) -> T:
+    # Structured output comes with the raw message, which carries the token usage
+    raw = result["raw"] if isinstance(result, dict) else result
+    if record is not None:
+        record.add_usage(getattr(raw, "usage_metadata", None), getattr(raw, "response_metadata", None))
+    if isinstance(result, dict):
+        if result["parsing_error"] is not None:
+            raise result["parsing_error"]
+        return result["parsed"]
+
+    # For non-JSON support models, we need to extract and parse the JSON manually
+    if model_info and not model_info.has_json_mode():
+        parsed_result = extract_json_from_response(result.content)
+        if not parsed_result:
+            raise ValueError("No JSON found in the model's response")
+        result = pydantic_model(**parsed_result)
+    return result
+
+
+def _with_cache_hints(prompt: Any, model_provider: str) -> Any:
+    """
+    Mark the system messages, the static part of every agent's prompt, as a cacheable prefix
+    for providers that only cache marked prefixes. OpenAI, DeepSeek and Gemini cache repeated
+    prefixes on their own.
+    """
+    if model_provider not in EXPLICIT_PREFIX_CACHE_PROVIDERS or isinstance(prompt, str):
+        return prompt
+    messages = list(prompt.to_messages() if hasattr(prompt, "to_messages") else prompt)
+    last_system = max((i for i, message in enumerate(messages) if message.type == "system"), default=None)
+    if last_system is None or not isinstance(messages[last_system].content, str):
+        return prompt
+    system = messages[last_system]
+    messages[last_system] = system.model_copy(update={"content": [{"type": "text", "text": system.content, "cache_control": {"type": "ephemeral"}}]})
+    return messages
+
+
+def _request(prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[T], timeout: float | None, sent: threading.Event | None = None, record: LLMCallRecord | None = None) -> T:
+    """
+    Send one request once the provider has capacity, recording how long the model took
+    and adding its token usage to `record`. Sets `sent` once it's sent (or failed).
+    """
+    try:
+        llm, model_info = _get_llm(model_name, model_provider, pydantic_model)
+        with get_llm_scheduler().slot(model_provider, prompt, timeout=timeout):
+            if sent is not None:
+                sent.set()
+            start = time.monotonic()
+            result = llm.invoke(_with_cache_hints(prompt, model_provider))
+            get_latency_tracker().record_request(model_provider, model_name, time.monotonic() - start)
+    finally:
+        if sent is not None:
+            sent.set()
+    return _parse_response(result, model_info, pydantic_model, record)
+
+
+async def _arequest(prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[T], sent: asyncio.Event | None = None, record: LLMCallRecord | None = None) -> T:
+    """Async counterpart of _request."""
+    try:
+        llm, model_info = _get_llm(model_name, model_provider, pydantic_model)
+        async with get_llm_scheduler().async_slot(model_provider, prompt):
+            if sent is not None:
+                sent.set()
+            start = time.monotonic()
+            result = await llm.ainvoke(_with_cache_hints(prompt, model_provider))
+            get_latency_tracker().record_request(model_provider, model_name, time.monotonic() - start)
+    finally:
+        if sent is not None:
+            sent.set()
+    return _parse_response(result, model_info, pydantic_model, record)
+
+
+def _hedge_target(model_name: str, model_provider: str) -> tuple[str, str]:
+    """Model a hedge request goes to: the policy's fallback if it's one of AVAILABLE_MODELS, else the same model again."""
+    from llm.models import AVAILABLE_MODELS
+
+    fallback_model = get_hedge_policy().fallback_model
+    fallback = next((model for model in AVAILABLE_MODELS if model.model_name == fallback_model), None)
+    if fallback is None:
+        return model_name, model_provider
+    return fallback.model_name, fallback.provider.value
+
+
+# Threads that race a hedge request against a slow one when call_llm runs synchronously
+_hedge_executor = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+def _request_hedged(prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[T], timeout: float | None, record: LLMCallRecord | None = None) -> tuple[T, bool, bool]:
+    """
+    Send a request and, if hedging is enabled and it outlasts the model's hedge threshold,
+    a second one to the hedge target. The first successful response wins.
+
+    Returns (response, whether a hedge was sent, whether the hedge won). A request can't be
+    interrupted in a thread, so the loser finishes in the background and is discarded.
+    """
+    policy = get_hedge_policy()
+    if not policy.enabled:
+        return _request(prompt, model_name, model_provider, pydantic_model, timeout, record=record), False, False
+
+    hedge_after = get_latency_tracker().hedge_after(model_provider, model_name, policy.percentile)
+    sent = threading.Event()
+    primary = _hedge_executor.submit(_request, prompt, model_name, model_provider, pydantic_model, timeout, sent, record)
+    # Time the request itself, not its wait for a provider slot
+    sent.wait()
+    try:
+        return primary.result(timeout=hedge_after), False, False
+    except concurrent.futures.TimeoutError:
+        pass
+
+    hedge = _hedge_executor.submit(_request, prompt, *_hedge_target(model_name, model_provider), pydantic_model, timeout, None, record)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result(), True, future is hedge
+            error = error or future.exception()
+    raise error
+
+
+async def _arequest_hedged(prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[T], record: LLMCallRecord | None = None) -> tuple[T, bool, bool]:
+    """Async counterpart of _request_hedged; the losing request is cancelled."""
+    policy = get_hedge_policy()
+    if not policy.enabled:
+        return await _arequest(prompt, model_name, model_provider, pydantic_model, record=record), False, False
+
+    hedge_after = get_latency_tracker().hedge_after(model_provider, model_name, policy.percentile)
+    sent = asyncio.Event()
+    primary = asyncio.ensure_future(_arequest(prompt, model_name, model_provider, pydantic_model, sent, record))
+    tasks = {primary}
+    try:
+        # Time the request itself, not its wait for a provider slot
+        await sent.wait()
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return primary.result(), False, False
+
+        hedge = asyncio.ensure_future(_arequest(prompt, *_hedge_target(model_name, model_provider), pydantic_model, record=record))
+        tasks.add(hedge)
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), True, task is hedge
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _next_retry_delay(scheduler: LLMScheduler, model_provider: str, error: Exception, attempt: int, max_retries: int, agent_name: Optional[str]) -> float | None:
+    """
+    Backoff before the next attempt, or None once the call should give up and fall back to a default.
+
+    Raises TimeoutError instead when the analyst's deadline is why the call gives up, so the
+    ticker is reported as timed out rather than given a default response.
+    """
+    from utils.concurrency import get_remaining_time
+
+    remaining = get_remaining_time()
+    if isinstance(error, SlotTimeoutError) or (remaining is not None and remaining <= 0):
+        raise TimeoutError(f"Deadline passed during the LLM call: {error}") from error
+
+    delay = None
+    if attempt < max_retries - 1:
+        delay = scheduler.retry_delay(model_provider, error, attempt)
+    if delay is not None and remaining is not None and delay >= remaining:
+        raise TimeoutError(f"Deadline would pass while backing off after: {error}") from error
+
+    if delay is None:
+        print(f"Error in LLM call after {attempt + 1} attempts: {error}")
+    elif agent_name:
+        progress.update_status(agent_name, None, f"Error - retry {attempt + 1}/{max_retries}")
+    return delay
+
+def _get_llm(model_name: str, model_provider: str, pydantic_model: Type[T]):
+    """Get the chat model for a call, with structured output when the model supports JSON mode."""
     from llm.models import get_model, get_model_info
-    
+
     model_info = get_model_info(model_name)
     llm = get_model(model_name, model_provider)
-    
+
     # For non-JSON support models, we can use structured output
     if not (model_info and not model_info.has_json_mode()):
-        llm = llm.with_structured_output(
-            pydantic_model,
-            method="json_mode",
-        )
-    
-    # Call the LLM with retries
-    for attempt in range(max_retries):
-        try:
-            # Call the LLM
-            result = llm.invoke(prompt)
-            
-            # For non-JSON support models, we need to extract and parse the JSON manually
-            if model_info and not model_info.has_json_mode():
-                parsed_result = extract_json_from_response(result.content)
-                if parsed_result:
-                    return pydantic_model(**parsed_result)
-            else:
-                return result
-                
-        except Exception as e:
-            raise e
-            if agent_name:
-                progress.update_status(agent_name, None, f"Error - retry {attempt + 1}/{max_retries}")
-            
-            if attempt == max_retries - 1:
-                print(f"Error in LLM call after {max_retries} attempts: {e}")
-                # Use default_factory if provided, otherwise create a basic default
-                if default_factory:
-                    return default_factory()
-                return create_default_response(pydantic_model)
-
-    # This should never be reached due to the retry logic above
-    return create_default_response(pydantic_model)
+        key = (id(llm), pydantic_model)
+        with _structured_llms_lock:
+            if (structured_llm := _structured_llms.get(key)) is None:
+                structured_llm = _structured_llms[key] = llm.with_structured_output(
+                    pydantic_model,
+                    method="json_mode",
+                    # Keep the raw message for its token usage
+                    include_raw=True,
+                )
+        llm = structured_llm
+    return llm, model_info
+
+def _on_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
 
 def create_default_response(model_class: Type[T]) -> T:
     """Creates a safe default response based on the model's fields."""
@@ -0,0 +1,143 @@
+"""Reuse persona agents' LLM signals while their analysis inputs are effectively unchanged."""
+
+import functools
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from typing import Any, Callable
+
+from utils.progress import progress
+
+# Default relative tolerance within which numeric inputs (e.g. market cap) count as unchanged
+DEFAULT_TOLERANCE = 0.05
+
+# Numbers embedded in text, e.g. "Margin of safety 23.4%" in an analysis detail
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+
+def _split(value: Any, numbers: list[float]) -> Any:
+    """Replace every number in `value` (including numbers in text) with a placeholder, collecting them in order."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        numbers.append(float(value))
+        return "#"
+    if isinstance(value, str):
+        numbers.extend(float(match) for match in _NUMBER.findall(value))
+        return _NUMBER.sub("#", value)
+    if isinstance(value, dict):
+        return {str(key): _split(item, numbers) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_split(item, numbers) for item in value]
+    return _split(str(value), numbers)
+
+
+def _close(a: float, b: float, tolerance: float) -> bool:
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=tolerance, abs_tol=1e-12)
+
+
+class SignalMemo:
+    """
+    Last signal of each (agent, ticker), reused while the agent's analysis data stays
+    effectively unchanged.
+
+    Analysis data is fingerprinted as its structure and text with the numbers taken out,
+    plus the numbers themselves. A signal is reused while the structure is identical and
+    every number, including numbers inside text, is within a relative tolerance of its
+    value when the signal was generated. Day-to-day drift in market cap and the ratios
+    derived from it then doesn't trigger a new LLM call, while a new filing does.
+    """
+
+    def __init__(self, tolerance: float = DEFAULT_TOLERANCE, enabled: bool = True):
+        self.tolerance = tolerance
+        self.enabled = enabled
+        # (agent, ticker) -> (structure hash, numbers, output)
+        self._entries: dict[tuple[str, str], tuple[str, list[float], Any]] = {}
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.generated = 0
+
+    @classmethod
+    def from_env(cls) -> "SignalMemo":
+        """Configure from SIGNAL_MEMO (set to "off" to disable) and SIGNAL_MEMO_TOLERANCE."""
+        tolerance = os.environ.get("SIGNAL_MEMO_TOLERANCE")
+        return cls(
+            tolerance=float(tolerance) if tolerance else DEFAULT_TOLERANCE,
+            enabled=os.environ.get("SIGNAL_MEMO", "on").lower() != "off",
+        )
+
+    @staticmethod
+    def fingerprint(analysis_data: Any, *exact: Any) -> tuple[str, list[float]]:
+        """Split analysis data into a structure hash and its numbers; `exact` values (e.g. the model) go in the hash as-is."""
+        numbers = []
+        structure = [_split(analysis_data, numbers), [str(value) for value in exact]]
+        return hashlib.sha256(json.dumps(structure, sort_keys=True).encode()).hexdigest(), numbers
+
+    def get(self, agent_name: str, ticker: str, fingerprint: tuple[str, list[float]]) -> Any | None:
+        structure, numbers = fingerprint
+        with self._lock:
+            entry = self._entries.get((agent_name, ticker))
+            if entry is not None and entry[0] == structure and all(_close(a, b, self.tolerance) for a, b in zip(numbers, entry[1])):
+                self.reused += 1
+                return entry[2]
+            self.generated += 1
+            return None
+
+    def put(self, agent_name: str, ticker: str, fingerprint: tuple[str, list[float]], output: Any):
+        with self._lock:
+            self._entries[(agent_name, ticker)] = (*fingerprint, output)
+
+    def lookup(self, agent_name: str, ticker: str, analysis_data: Any, model_name: str, model_provider: str) -> tuple[Any | None, tuple[str, list[float]]]:
+        """Get the reusable signal for these inputs, if any, and the fingerprint to store a new one under."""
+        fingerprint = self.fingerprint(analysis_data, model_name, model_provider)
+        output = self.get(agent_name, ticker, fingerprint)
+        if output is not None:
+            progress.update_status(agent_name, ticker, "Inputs unchanged, reusing previous signal")
+        return output, fingerprint
+
+    def store(self, agent_name: str, ticker: str, fingerprint: tuple[str, list[float]], output: Any):
+        """Remember a freshly generated signal. Error fallbacks have zero confidence and are skipped, so the next day retries."""
+        if output.confidence:
+            self.put(agent_name, ticker, fingerprint, output)
+
+    def summary(self) -> str:
+        with self._lock:
+            return f"Persona signals: {self.reused} reused, {self.generated} generated (tolerance {self.tolerance:.0%})"
+
+
+# Global signal memo instance
+_signal_memo = SignalMemo.from_env()
+
+
+def get_signal_memo() -> SignalMemo:
+    """Get the global signal memo instance."""
+    return _signal_memo
+
+
+def memoize_signal(agent_name: str) -> Callable:
+    """
+    Decorate an agent's `generate_*_output(ticker, analysis_data, model_name, model_provider)`
+    so it reuses the ticker's previous signal until the analysis data's fingerprint changes.
+    """
+
+    def decorator(generate: Callable) -> Callable:
+        @functools.wraps(generate)
+        def wrapper(ticker: str, analysis_data: dict, model_name: str, model_provider: str):
+            memo = get_signal_memo()
+            if not memo.enabled:
+                return generate(ticker, analysis_data, model_name=model_name, model_provider=model_provider)
+
+            output, fingerprint = memo.lookup(agent_name, ticker, analysis_data, model_name, model_provider)
+            if output is None:
+                output = generate(ticker, analysis_data, model_name=model_name, model_provider=model_provider)
+                memo.store(agent_name, ticker, fingerprint, output)
+            return output
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,223 @@
+"""
+Vectorized technical metrics for many tickers at once.
+
+Prices are aligned into 2-D arrays of shape (bars, tickers). Each ticker's history is
+right-aligned so the last row is every ticker's latest bar, and shorter histories are
+padded with NaN at the top. Trailing windows then behave exactly as they do on a single
+ticker's DataFrame in agents.technicals. Only the latest value of each metric is computed
+unless a whole series is needed by a later step.
+"""
+
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def align_prices(prices_by_ticker: dict[str, list]) -> tuple[list[str], dict[str, np.ndarray]]:
+    """Right-align each ticker's price records (oldest first) into (bars, tickers) arrays."""
+    tickers = [ticker for ticker, prices in prices_by_ticker.items() if prices]
+    length = max((len(prices_by_ticker[ticker]) for ticker in tickers), default=0)
+    panel = {field: np.full((length, len(tickers)), np.nan) for field in ("close", "high", "low", "volume")}
+    for column, ticker in enumerate(tickers):
+        prices = sorted(prices_by_ticker[ticker], key=lambda price: price.time)
+        start = length - len(prices)
+        for field, values in panel.items():
+            values[start:, column] = [getattr(price, field) for price in prices]
+    return tickers, panel
+
+
+def ewm_mean(x: np.ndarray, span: int, adjust: bool = True) -> np.ndarray:
+    """Column-wise `ewm(span=span, adjust=adjust).mean()`, using pandas' recurrence and NaN handling."""
+    alpha = 2.0 / (span + 1.0)
+    old_wt_factor = 1.0 - alpha
+    new_wt = 1.0 if adjust else alpha
+
+    out = np.empty_like(x)
+    weighted = x[0].copy()
+    old_wt = np.ones(x.shape[1])
+    out[0] = weighted
+    with np.errstate(invalid="ignore"):
+        for t in range(1, len(x)):
+            current = x[t]
+            observed = ~np.isnan(current)
+            started = ~np.isnan(weighted)
+
+            old_wt = np.where(started, old_wt * old_wt_factor, old_wt)
+            update = started & observed
+            blend = update & (weighted != current)
+            weighted = np.where(blend, (old_wt * weighted + new_wt * current) / (old_wt + new_wt), weighted)
+            old_wt = np.where(update, old_wt + new_wt if adjust else 1.0, old_wt)
+            weighted = np.where(~started & observed, current, weighted)
+            out[t] = weighted
+    return out
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    shifted = np.empty_like(x)
+    shifted[0] = np.nan
+    shifted[1:] = x[:-1]
+    return shifted
+
+
+def _last_window(x: np.ndarray, window: int) -> np.ndarray:
+    """The trailing `window` rows, padded with NaN when the panel is shorter."""
+    if len(x) >= window:
+        return x[-window:]
+    return np.vstack([np.full((window - len(x), x.shape[1]), np.nan), x])
+
+
+def _last_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Latest value of `rolling(window).mean()`; NaN if the window has any gap."""
+    return _last_window(x, window).mean(axis=0)
+
+
+def _last_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Latest value of `rolling(window).std()`."""
+    return _last_window(x, window).std(axis=0, ddof=1)
+
+
+def _last_moments(x: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Latest bias-corrected skewness and excess kurtosis, as `rolling(window).skew()` / `.kurt()`."""
+    values = _last_window(x, window)
+    n = window
+    deviations = values - values.mean(axis=0)
+    m2 = (deviations**2).mean(axis=0)
+    m3 = (deviations**3).mean(axis=0)
+    m4 = (deviations**4).mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skew = math.sqrt(n * (n - 1)) / (n - 2) * m3 / m2**1.5
+        kurt = ((n * n - 1) * m4 / m2**2 - 3 * (n - 1) ** 2) / ((n - 2) * (n - 3))
+    # A constant window has no defined shape
+    flat = m2 <= 1e-14
+    skew[flat] = np.nan
+    kurt[flat] = np.nan
+    return skew, kurt
+
+
+def hurst_exponents(closes: np.ndarray, max_lag: int = 20, chunk_size: int = 256) -> np.ndarray:
+    """
+    Hurst exponent of every column of a (bars, tickers) close array.
+
+    The standard deviation of lag-k differences scales as k**H, so H is the slope of
+    log(std) against log(k). One strided view supplies the differences for every lag, and
+    the deviations and fits are batched across lags and tickers. Columns with too little
+    history return 0.5 (random walk).
+    """
+    closes = np.asarray(closes, dtype=float)
+    if closes.ndim == 1:
+        closes = closes[:, None]
+    lags = np.arange(2, max_lag)
+    hurst = np.full(closes.shape[1], 0.5)
+    if len(closes) < max_lag + 1:
+        return hurst
+
+    log_lags = np.log(lags)
+    centered_log_lags = log_lags - log_lags.mean()
+
+    # Bound memory on large universes by processing tickers in chunks
+    for start in range(0, closes.shape[1], chunk_size):
+        columns = slice(start, start + chunk_size)
+        # windows[t, ticker, k] == closes[t + k, ticker]
+        windows = sliding_window_view(closes[:, columns], max_lag, axis=0)
+        differences = windows[:, :, lags] - windows[:, :, :1]
+
+        valid = ~np.isnan(differences)
+        count = valid.sum(axis=0)
+        differences = np.where(valid, differences, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = differences.sum(axis=0) / count
+            variance = (np.where(valid, differences - mean, 0.0) ** 2).sum(axis=0) / count
+        # Floor to avoid log(0) on flat series
+        log_tau = np.log(np.maximum(np.sqrt(variance), 1e-8))
+
+        slopes = ((log_tau - log_tau.mean(axis=1, keepdims=True)) * centered_log_lags).sum(axis=1) / (centered_log_lags**2).sum()
+        enough = count.min(axis=1) >= 2
+        hurst[columns] = np.where(enough, slopes, 0.5)
+
+    return hurst
+
+
+def compute_panel_metrics(panel: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Latest technical metrics for every ticker in an aligned panel, one array per metric.
+
+    Mirrors the metric calculations of the strategy functions in agents.technicals.
+    """
+    close, high, low, volume = panel["close"], panel["high"], panel["low"], panel["volume"]
+    valid = ~np.isnan(close)
+    prev_close = _shift(close)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = close / prev_close - 1
+
+        # Trend: EMAs and ADX
+        ema_8 = ewm_mean(close, 8, adjust=False)[-1]
+        ema_21 = ewm_mean(close, 21, adjust=False)[-1]
+        ema_55 = ewm_mean(close, 55, adjust=False)[-1]
+
+        true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        up_move = high - _shift(high)
+        down_move = _shift(low) - low
+        # Padding rows stay NaN so each ticker's averages start at its own first bar
+        plus_dm = np.where(valid, np.where((up_move > down_move) & (up_move > 0), up_move, 0.0), np.nan)
+        minus_dm = np.where(valid, np.where((down_move > up_move) & (down_move > 0), down_move, 0.0), np.nan)
+        tr_mean = ewm_mean(true_range, 14)
+        plus_di = 100 * (ewm_mean(plus_dm, 14) / tr_mean)
+        minus_di = 100 * (ewm_mean(minus_dm, 14) / tr_mean)
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx = ewm_mean(dx, 14)[-1]
+
+        # Mean reversion: z-score, Bollinger bands and RSI
+        last_close = close[-1]
+        z_score = (last_close - _last_mean(close, 50)) / _last_std(close, 50)
+        sma_20 = _last_mean(close, 20)
+        std_20 = _last_std(close, 20)
+        bb_upper, bb_lower = sma_20 + std_20 * 2, sma_20 - std_20 * 2
+        price_vs_bb = (last_close - bb_lower) / (bb_upper - bb_lower)
+
+        delta = close - prev_close
+        gain = np.where(valid, np.where(delta > 0, delta, 0.0), np.nan)
+        loss = np.where(valid, np.where(delta < 0, -delta, 0.0), np.nan)
+        rsi = {}
+        for period in (14, 28):
+            rs = _last_mean(gain, period) / _last_mean(loss, period)
+            rsi[period] = 100 - (100 / (1 + rs))
+
+        # Momentum
+        mom_1m = _last_window(returns, 21).sum(axis=0)
+        mom_3m = _last_window(returns, 63).sum(axis=0)
+        mom_6m = _last_window(returns, 126).sum(axis=0)
+        volume_momentum = volume[-1] / _last_mean(volume, 21)
+
+        # Volatility: the regime needs the last 63 values of the 21-day volatility
+        recent_returns = _last_window(returns, 63 + 21 - 1)
+        hist_vol = sliding_window_view(recent_returns, 21, axis=0).std(axis=-1, ddof=1) * math.sqrt(252)
+        vol_ma = hist_vol.mean(axis=0)
+        vol_regime = hist_vol[-1] / vol_ma
+        vol_z_score = (hist_vol[-1] - vol_ma) / hist_vol.std(axis=0, ddof=1)
+        atr_ratio = _last_mean(true_range, 14) / last_close
+
+        # Statistical arbitrage: return distribution shape
+        skew, kurt = _last_moments(returns, 63)
+
+    return {
+        "ema_8": ema_8,
+        "ema_21": ema_21,
+        "ema_55": ema_55,
+        "adx": adx,
+        "z_score": z_score,
+        "price_vs_bb": price_vs_bb,
+        "rsi_14": rsi[14],
+        "rsi_28": rsi[28],
+        "momentum_1m": mom_1m,
+        "momentum_3m": mom_3m,
+        "momentum_6m": mom_6m,
+        "volume_momentum": volume_momentum,
+        "historical_volatility": hist_vol[-1],
+        "volatility_regime": vol_regime,
+        "volatility_z_score": vol_z_score,
+        "atr_ratio": atr_ratio,
+        "skewness": skew,
+        "kurtosis": kurt,
+    }
@@ -0,0 +1,71 @@
+"""Serialize agent data for LLM prompts with as few tokens as possible."""
+
+import csv
+import io
+import json
+import math
+import os
+from typing import Any
+
+# PROMPT_FORMAT values
+FORMAT_COMPACT = "compact"  # minified JSON and CSV-like tables, floats rounded
+FORMAT_JSON = "json"  # indented JSON, as the prompts were originally written
+FORMATS = (FORMAT_COMPACT, FORMAT_JSON)
+
+# Significant digits kept for floats in compact prompts
+FLOAT_DIGITS = 4
+
+
+def get_prompt_format() -> str:
+    """Get the prompt format from PROMPT_FORMAT (default: json)."""
+    # Compact prompts stay opt-in until a replay shows they lead to the same decisions
+    prompt_format = os.environ.get("PROMPT_FORMAT", FORMAT_JSON).lower()
+    if prompt_format not in FORMATS:
+        raise ValueError(f"Unknown prompt format {prompt_format!r}, expected one of {', '.join(FORMATS)}")
+    return prompt_format
+
+
+def _round(value: Any) -> Any:
+    """Round every float in `value` to FLOAT_DIGITS significant digits, dropping the fraction of whole numbers."""
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return value
+        rounded = float(f"{value:.{FLOAT_DIGITS}g}")
+        return int(rounded) if rounded.is_integer() and abs(rounded) < 1e15 else rounded
+    if isinstance(value, dict):
+        return {key: _round(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_round(item) for item in value]
+    return value
+
+
+def format_data(data: Any) -> str:
+    """Serialize arbitrary data (e.g. an agent's analysis data), as minified JSON with rounded floats in compact format."""
+    if get_prompt_format() == FORMAT_JSON:
+        return json.dumps(data, indent=2)
+    return json.dumps(_round(data), separators=(",", ":"))
+
+
+def format_table(data: dict[str, dict], index: str = "ticker", nested: str | None = None) -> str:
+    """
+    Serialize per-ticker records as a CSV-like table, so keys are written once in the header
+    instead of once per ticker.
+
+    With `nested`, `data` maps each ticker to a dict of records (e.g. agent to signal) and
+    gets one row per inner record, with the inner key in a `nested` column.
+    """
+    if get_prompt_format() == FORMAT_JSON:
+        return json.dumps(data, indent=2)
+
+    if nested:
+        rows = [{index: key, nested: inner_key, **record} for key, records in data.items() for inner_key, record in records.items()]
+    else:
+        rows = [{index: key, **record} for key, record in data.items()]
+    columns = list(dict.fromkeys(column for row in rows for column in row)) or [index]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(["" if row.get(column) is None else _round(row[column]) for column in columns])
+    return buffer.getvalue().rstrip("\n")
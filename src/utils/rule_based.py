@@ -0,0 +1,38 @@
+"""Persona signals derived from the agents' own scores, without an LLM call."""
+
+
+def _normalized_score(analysis_data: dict) -> float:
+    max_score = analysis_data.get("max_score")
+    if not max_score:
+        return 0.5
+    return min(1.0, max(0.0, analysis_data["score"] / max_score))
+
+
+def rule_based_signal(analysis_data: dict) -> dict:
+    """
+    Turn a persona agent's analysis data into a signal without calling the LLM.
+
+    The signal is the agent's own rule-based one. Confidence is how strongly the normalized
+    score (score / max_score) supports it: the score itself for bullish, its complement for
+    bearish, and its closeness to the midpoint for neutral. The reasoning holds the score and
+    each sub-analysis's score and details.
+    """
+    signal = analysis_data["signal"]
+    normalized = _normalized_score(analysis_data)
+    if signal == "bullish":
+        confidence = normalized
+    elif signal == "bearish":
+        confidence = 1 - normalized
+    else:
+        confidence = 1 - abs(2 * normalized - 1)
+
+    reasoning = {"score": f"{analysis_data['score']:.1f} of {analysis_data.get('max_score') or 0:.1f} ({normalized:.0%})"}
+    for key, value in analysis_data.items():
+        if isinstance(value, dict) and "details" in value:
+            details = value["details"]
+            reasoning[key] = {"score": value.get("score")}
+            if "max_score" in value:
+                reasoning[key]["max_score"] = value["max_score"]
+            reasoning[key]["details"] = "; ".join(details) if isinstance(details, list) else details
+
+    return {"signal": signal, "confidence": round(confidence * 100, 1), "reasoning": reasoning}
@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# The application imports its modules relative to src/
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "src"))
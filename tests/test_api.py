@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("fmpsdk")
+
+import tools.api as api
+from data.cache import Cache
+from data.refresh import RefreshPlanner
+
+PERIODS = ["2023-09-30", "2023-12-31", "2024-03-31", "2024-06-30"]
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        # The provider returns the newest periods up to the requested end date
+        periods = sorted((period for period in PERIODS if period <= self.body["end_date"]), reverse=True)[: self.body["limit"]]
+        return {"search_results": [{"ticker": self.body["tickers"][0], "report_period": period, "period": self.body["period"], "currency": "USD", "revenue": 1.0} for period in periods]}
+
+
+@pytest.fixture
+def fresh_api(monkeypatch):
+    monkeypatch.setattr(api, "_cache", Cache())
+    monkeypatch.setattr(api, "_refresh_planner", RefreshPlanner())
+    requests = []
+
+    def post(url, headers=None, json=None):
+        requests.append(json)
+        return FakeResponse(json)
+
+    monkeypatch.setattr(api.requests, "post", post)
+    return requests
+
+
+def test_later_end_date_returns_newer_line_items(fresh_api):
+    early = api.search_line_items("AAPL", ["revenue"], "2024-01-15", limit=2)
+    assert [item.report_period for item in early] == ["2023-12-31", "2023-09-30"]
+
+    later = api.search_line_items("AAPL", ["revenue"], "2024-07-30", limit=2)
+    assert [item.report_period for item in later] == ["2024-06-30", "2024-03-31"]
+    assert len(fresh_api) == 2
+
+
+def test_line_items_within_the_fetched_window_come_from_cache(fresh_api):
+    api.search_line_items("AAPL", ["revenue"], "2024-01-15", limit=2)
+    cached = api.search_line_items("AAPL", ["revenue"], "2024-01-10", limit=2)
+
+    assert [item.report_period for item in cached] == ["2023-12-31", "2023-09-30"]
+    assert len(fresh_api) == 1
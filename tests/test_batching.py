@@ -0,0 +1,79 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("rich")
+
+from pydantic import BaseModel
+
+import utils.batching as batching
+from utils.memo import SignalMemo
+
+TICKERS = ["AAA", "BBB", "CCC", "DDD"]
+
+
+class Signal(BaseModel):
+    signal: str
+    confidence: float
+    reasoning: str
+
+
+def generate(ticker, analysis_data, model_name, model_provider):
+    return Signal(signal="bearish", confidence=40, reasoning="single")
+
+
+def run_batched(monkeypatch, batch_call, tickers=TICKERS, ready_signals=None):
+    monkeypatch.setattr(batching, "call_llm", batch_call)
+    monkeypatch.setattr(batching, "get_signal_memo", lambda: SignalMemo(enabled=False))
+    return batching.generate_signals_batched(
+        tickers,
+        ready_signals or {},
+        {ticker: {"price": 1.0} for ticker in tickers},
+        generate,
+        Signal,
+        "system",
+        agent_name="test_agent",
+        model_name="model",
+        model_provider="OpenAI",
+        batch_size=2,
+    )
+
+
+def batch_response(pydantic_model, tickers):
+    return pydantic_model(signals={ticker: {"signal": "bullish", "confidence": 80, "reasoning": "batch"} for ticker in tickers})
+
+
+def test_failed_batch_falls_back_to_single_prompts(monkeypatch):
+    def batch_call(prompt, pydantic_model, **kwargs):
+        if "AAA" in str(prompt):
+            raise RuntimeError("provider error")
+        return batch_response(pydantic_model, ["CCC", "DDD"])
+
+    signals = run_batched(monkeypatch, batch_call)
+
+    assert signals["AAA"]["reasoning"] == signals["BBB"]["reasoning"] == "single"
+    assert signals["CCC"]["reasoning"] == signals["DDD"]["reasoning"] == "batch"
+
+
+def test_timed_out_batch_times_out_its_tickers(monkeypatch):
+    def batch_call(prompt, pydantic_model, **kwargs):
+        if "AAA" in str(prompt):
+            raise TimeoutError
+        return batch_response(pydantic_model, ["CCC", "DDD"])
+
+    signals = run_batched(monkeypatch, batch_call)
+
+    assert signals["AAA"].get("timed_out") and signals["BBB"].get("timed_out")
+    assert signals["CCC"]["reasoning"] == "batch"
+
+
+def test_batch_signals_are_read_whatever_the_tickers_are_called(monkeypatch):
+    # Tickers that look like signal fields must not be mistaken for a failed batch
+    tickers = ["signal", "timed_out", "EEE"]
+
+    def batch_call(prompt, pydantic_model, **kwargs):
+        return batch_response(pydantic_model, tickers)
+
+    signals = run_batched(monkeypatch, batch_call, tickers=tickers, ready_signals={"EEE": {"signal": "neutral", "confidence": 0.0, "reasoning": "ready"}})
+
+    assert [signals[ticker]["reasoning"] for ticker in tickers] == ["batch", "batch", "ready"]
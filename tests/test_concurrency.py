@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("rich")
+
+from pydantic import BaseModel
+
+import llm.models
+from llm.cache import MODE_REPLAY, LLMCache, LLMCacheMissError
+from utils import llm as llm_utils
+from utils.concurrency import run_per_ticker, with_deadline
+
+TICKERS = ["AAA", "BBB", "CCC"]
+
+
+class Signal(BaseModel):
+    signal: str
+    confidence: float
+    reasoning: str
+
+
+class SlowModel:
+    """Chat model stand-in that answers every prompt after `seconds`."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def with_structured_output(self, *args, **kwargs):
+        return self
+
+    def invoke(self, prompt):
+        time.sleep(self.seconds)
+        return {"raw": None, "parsed": Signal(signal="bullish", confidence=80, reasoning="slow"), "parsing_error": None}
+
+
+@pytest.fixture
+def slow_model(monkeypatch):
+    model = SlowModel(1.0)
+    monkeypatch.setattr(llm.models, "get_model", lambda model_name, model_provider: model)
+    monkeypatch.setattr(llm.models, "get_model_info", lambda model_name: None)
+    monkeypatch.setattr(llm_utils, "_scheduler", llm_utils.LLMScheduler())
+    # More tickers in flight than Ollama's single request slot, so some wait for it
+    monkeypatch.setenv("AGENT_MAX_CONCURRENCY", str(len(TICKERS)))
+    return model
+
+
+def agent(state):
+    """Analyst node asking the LLM for one signal per ticker."""
+
+    def analyze(ticker):
+        signal = llm_utils.call_llm(
+            prompt=f"Analyze {ticker}",
+            model_name="slow",
+            model_provider="Ollama",
+            pydantic_model=Signal,
+            agent_name="test_agent",
+            default_factory=lambda: Signal(signal="neutral", confidence=0.0, reasoning="default"),
+        )
+        return signal.model_dump()
+
+    state["data"]["analyst_signals"]["test_agent"] = run_per_ticker(state["data"]["tickers"], analyze, "Ollama")
+    return {"data": state["data"]}
+
+
+def test_llm_calls_past_the_deadline_mark_tickers_timed_out(slow_model):
+    state = {"data": {"tickers": TICKERS, "analyst_signals": {}}, "metadata": {"analyst_deadline": 0.3}}
+    with_deadline("test_agent", agent)(state)
+
+    signals = state["data"]["analyst_signals"]["test_agent"]
+    assert set(signals) == set(TICKERS)
+    assert all(signal.get("timed_out") for signal in signals.values())
+
+
+def test_replay_cache_miss_fails_the_graph(slow_model, monkeypatch, tmp_path):
+    langgraph = pytest.importorskip("langgraph.graph")
+    from graph.state import AgentState
+
+    cache = LLMCache(mode=MODE_REPLAY, directory=str(tmp_path))
+    monkeypatch.setattr(llm_utils, "get_llm_cache", lambda: cache)
+
+    workflow = langgraph.StateGraph(AgentState)
+    workflow.add_node("test_agent", with_deadline("test_agent", agent))
+    workflow.set_entry_point("test_agent")
+    workflow.add_edge("test_agent", langgraph.END)
+
+    with pytest.raises(LLMCacheMissError):
+        workflow.compile().invoke({"messages": [], "data": {"tickers": TICKERS, "analyst_signals": {}}, "metadata": {}})
+
+
+def test_replay_cache_miss_is_not_a_neutral_signal(slow_model, monkeypatch, tmp_path):
+    cache = LLMCache(mode=MODE_REPLAY, directory=str(tmp_path))
+    monkeypatch.setattr(llm_utils, "get_llm_cache", lambda: cache)
+
+    with pytest.raises(LLMCacheMissError):
+        with_deadline("test_agent", agent)({"data": {"tickers": TICKERS, "analyst_signals": {}}, "metadata": {"analyst_deadline": 5}})
@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pytest
+
+from data.history import PriceHistory
+from data.models import PriceRecord
+from utils.indicators import TickerIndicators
+
+
+def make_bars(count: int, seed: int = 7) -> list[PriceRecord]:
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, count)))
+    # A flat stretch exercises the 0/0 branches of RSI and ADX
+    closes[40:60] = closes[40]
+    bars = []
+    for day, close in enumerate(closes):
+        spread = 0.0 if 40 <= day < 60 else abs(rng.normal(0, 0.01)) * close
+        date = np.datetime64("2023-01-02") + np.timedelta64(day, "D")
+        bars.append(PriceRecord(open=float(close), close=float(close), high=float(close + spread), low=float(close - spread), volume=1000 + day, time=str(date)))
+    return bars
+
+
+def assert_close(actual: float, expected: float):
+    if math.isnan(expected):
+        assert math.isnan(actual)
+    else:
+        assert actual == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def assert_same_signal(actual: dict, expected: dict):
+    assert actual["signal"] == expected["signal"]
+    assert actual["confidence"] == pytest.approx(expected["confidence"], rel=1e-9, nan_ok=True)
+    assert actual["metrics"] == pytest.approx(expected["metrics"], rel=1e-9, nan_ok=True)
+
+
+def test_price_history_advances_indicators_with_each_bar():
+    bars = make_bars(300)
+    history = PriceHistory(127)
+    reference = TickerIndicators()
+    for bar in bars:
+        history.update("AAPL", [bar], bar.time)
+        reference.update(bar.high, bar.low, bar.close, bar.time)
+
+        values = history.get_indicators("AAPL", bar.time)
+        for name, expected in reference.values().items():
+            assert_close(values[name], expected)
+
+
+def test_price_history_has_no_indicators_past_or_before_its_window():
+    bars = make_bars(80)
+    history = PriceHistory(127)
+    history.update("AAPL", bars, bars[-1].time)
+
+    assert history.get_indicators("AAPL", bars[10].time) is None
+    assert history.get_indicators("AAPL", "2030-01-01") is None
+    assert history.get_indicators("MSFT", bars[-1].time) is None
+
+
+def test_matches_full_recompute():
+    pytest.importorskip("langchain_core")
+    pytest.importorskip("fmpsdk")
+    pytest.importorskip("rich")
+    from agents import technicals
+    from tools.api import prices_to_df
+
+    bars = make_bars(600)
+    df = prices_to_df(bars)
+    indicators = TickerIndicators()
+    for end in range(1, len(bars) + 1):
+        bar = bars[end - 1]
+        indicators.update(bar.high, bar.low, bar.close, bar.time)
+        if end % 50:
+            continue
+
+        window = df.iloc[:end]
+        values = indicators.values()
+        for window_size in (8, 21, 55):
+            assert_close(values[f"ema_{window_size}"], technicals.calculate_ema(window, window_size).iloc[-1])
+        for period in (14, 28):
+            assert_close(values[f"rsi_{period}"], technicals.calculate_rsi(window, period).iloc[-1])
+        adx = technicals.calculate_adx(window, 14).iloc[-1]
+        assert_close(values["adx"], adx["adx"])
+        assert_close(values["+di"], adx["+di"])
+        assert_close(values["-di"], adx["-di"])
+        assert_close(values["atr"], technicals.calculate_atr(window).iloc[-1])
+
+        # The agent's signals come out the same either way
+        assert_same_signal(technicals.calculate_trend_signals(window, values), technicals.calculate_trend_signals(window))
+        assert_same_signal(technicals.calculate_mean_reversion_signals(window, values), technicals.calculate_mean_reversion_signals(window))
+        assert_same_signal(technicals.calculate_volatility_signals(window, values), technicals.calculate_volatility_signals(window))
@@ -0,0 +1,30 @@
+from data.refresh import FINANCIAL_METRICS, RefreshPlanner, line_items_dataset
+
+
+def test_fetch_covers_only_its_end_date():
+    planner = RefreshPlanner()
+    dataset = line_items_dataset("ttm", ["net_income", "revenue"])
+    planner.record_fetch("AAPL", "2023-12-31", "2024-01-15", dataset)
+
+    assert not planner.needs_refresh("AAPL", "2024-01-10", dataset)
+    # Periods filed after the fetch's end date were not returned by it
+    assert planner.needs_refresh("AAPL", "2024-07-30", dataset)
+
+
+def test_data_sets_are_planned_separately():
+    planner = RefreshPlanner()
+    planner.record_fetch("AAPL", "2024-06-30")
+
+    assert not planner.needs_refresh("AAPL", "2024-07-30", FINANCIAL_METRICS)
+    assert planner.needs_refresh("AAPL", "2024-07-30", line_items_dataset("ttm", ["revenue"]))
+    assert planner.needs_refresh("MSFT", "2024-07-30", FINANCIAL_METRICS)
+
+
+def test_earnings_calendar_sets_next_filing():
+    planner = RefreshPlanner()
+    dataset = line_items_dataset("annual", ["revenue"])
+    planner.record_fetch("AAPL", "2023-12-31", "2024-01-15", dataset)
+    planner.add_earnings_dates("AAPL", ["2024-02-01"])
+
+    assert not planner.needs_refresh("AAPL", "2024-01-31", dataset)
+    assert planner.needs_refresh("AAPL", "2024-02-01", dataset)